@@ -0,0 +1,62 @@
+"""
+Compara la evaluación vectorizada de src/analysis.py con un bucle de
+Table.check_winner sobre las mismas posiciones.
+
+Uso: python benchmarks/bench_batch_eval.py [posiciones]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import analysis
+from models.Board import ListBoard
+from models.Table import Table
+
+
+def random_boards(count, seed=1):
+    #Tableros al azar (no necesariamente alcanzables): sirven para medir y comparar
+    return np.random.default_rng(seed).integers(0, 3, size=(count, 9), dtype=np.int8)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    boards = random_boards(count)
+
+    start = time.perf_counter()
+    x, o = analysis.pack(boards)
+    packing = time.perf_counter() - start
+    result = analysis.evaluate(x=x, o=o)
+    analysis.legal_moves(x=x, o=o)
+    analysis.phases(x=x, o=o)
+    batch = time.perf_counter() - start
+
+    # El bucle con Table es mucho más lento: se mide sobre una muestra y se extrapola
+    sample = min(count, 100_000)
+    table = Table(0, board_class=ListBoard)
+    symbols = np.array([' ', 'X', 'O'])
+    cell_lists = symbols[boards[:sample]].tolist()
+    start = time.perf_counter()
+    winners = []
+    for cells in cell_lists:
+        table.board.game_board = cells
+        winners.append(table.check_winner())
+    loop = (time.perf_counter() - start) * count / sample
+
+    mismatches = analysis.check_results(boards[:sample], winners)
+    # Tableros con dos ganadores a la vez no son alcanzables; check_winner y evaluate los ordenan distinto
+    both = analysis.WIN_TABLE[x[:sample]] & analysis.WIN_TABLE[o[:sample]]
+    assert set(mismatches) <= set(np.flatnonzero(both)), 'Resultados distintos'
+    print(f"posiciones: {count:,}  (en curso: {(result == analysis.ONGOING).sum():,})")
+    print(f"vectorizado (resultado + jugadas + fase): {batch:.3f} s  ({count / batch:,.0f} tableros/s, "
+          f"{packing:.3f} s empaquetando)")
+    print(f"bucle check_winner:                        {loop:.3f} s  ({count / loop:,.0f} tableros/s)")
+    print(f"aceleración: x{loop / batch:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compara movimientos por segundo de Table con el tablero original (ListBoard)
+y con el tablero en bitboards (BitBoard).
+
+Uso: python benchmarks/bench_board_engines.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.Board import BitBoard, ListBoard
+from models.Table import Table
+
+GAMES = 20000
+
+
+def random_games(count, seed=1):
+    #Genera órdenes de casillas al azar; cada partida se juega hasta que termina
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        order = list(range(9))
+        rng.shuffle(order)
+        games.append(order)
+    return games
+
+
+def play(board_class, games):
+    moves = 0
+    results = []
+    start = time.perf_counter()
+    for order in games:
+        table = Table(0, board_class=board_class)
+        table.add_player('a', None)
+        table.add_player('b', None)
+        players = ('a', 'b')
+        for turn, position in enumerate(order):
+            table.make_move(position, players[turn % 2])
+            moves += 1
+            if table.winner:
+                break
+        results.append(table.winner)
+    return moves / (time.perf_counter() - start), results
+
+
+def main():
+    games = random_games(GAMES)
+    list_rate, list_results = play(ListBoard, games)
+    bit_rate, bit_results = play(BitBoard, games)
+    assert list_results == bit_results, 'Los motores no coinciden'
+    print(f"ListBoard: {list_rate:>12,.0f} movimientos/s")
+    print(f"BitBoard:  {bit_rate:>12,.0f} movimientos/s  (x{bit_rate / list_rate:.2f})")
+
+
+if __name__ == '__main__':
+    main()
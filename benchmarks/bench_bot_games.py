@@ -0,0 +1,87 @@
+"""
+Latencia de MAKE_MOVE en partidas contra el bot del servidor (la respuesta
+incluye la jugada del bot) con cada vez más partidas simultáneas, y tiempo
+que el servidor dedica a calcular y aplicar cada jugada del bot.
+
+Uso: python benchmarks/bench_bot_games.py
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bot import BotClient
+from models.Solver import Solver
+from server import GameServer
+
+PORT = 8880
+SIZES = [1, 100, 1000, 2000]
+
+
+async def play(bot, rng, latencies):
+    #Juega una partida contra el bot con movimientos al azar
+    table_id = await bot.play_vs_bot(rng.choice(['easy', 'medium', 'hard']))
+    if table_id is None:
+        return
+    board = bot.table['board']
+    while True:
+        await asyncio.sleep(rng.uniform(0.05, 0.15))  # Tiempo de reflexión del jugador
+        position = rng.choice([i for i, cell in enumerate(board) if cell == ' '])
+        start = time.perf_counter()
+        response = await bot.command(
+            {'command': 'MAKE_MOVE', 'table_id': table_id, 'position': position},
+            lambda d: d['type'] == 'table_move' and (d['winner'] or d['turn'] == 'X')
+        )
+        latencies.append(time.perf_counter() - start)
+        if response['type'] == 'error' or response['table']['winner']:
+            return
+        board = response['table']['board']
+
+
+async def run(size, port):
+    server = GameServer(port=port)
+    bot_time = []
+    play_bot_move = server.play_bot_move
+
+    async def timed(table):
+        start = time.perf_counter()
+        await play_bot_move(table)
+        bot_time.append(time.perf_counter() - start)
+
+    server.play_bot_move = timed
+    task = asyncio.create_task(server.start())
+    await asyncio.sleep(0.2)
+    bots = [BotClient(f'ws://127.0.0.1:{port}') for _ in range(size)]
+    for i in range(0, size, 100):
+        # Por tandas, para no desbordar la cola de conexiones pendientes del servidor
+        await asyncio.gather(*(bot.connect() for bot in bots[i:i + 100]))
+    latencies = []
+    rng = random.Random(1)
+    await asyncio.gather(*(play(bot, rng, latencies) for bot in bots))
+    await asyncio.gather(*(bot.close() for bot in bots))
+    task.cancel()
+    latencies.sort()
+    return latencies, sum(bot_time) / max(len(bot_time), 1)
+
+
+def main():
+    start = time.perf_counter()
+    Solver()
+    print(f"Tabla del bot calculada en {(time.perf_counter() - start) * 1000:.0f} ms")
+    # Con más de 50 salas a la vez el tope de salas en espera no afecta: las salas contra el bot empiezan llenas
+    print(f"{'partidas':>9} {'movimientos':>12} {'p50 ms':>8} {'p99 ms':>8} {'bot us':>8}")
+    for i, size in enumerate(SIZES):
+        sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+        latencies, bot_time = asyncio.run(run(size, PORT + i))
+        sys.stdout = stdout
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+        print(f"{size:>9} {len(latencies):>12} {p50:>8.2f} {p99:>8.2f} {bot_time * 1e6:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Cliente Tk: latencia desde el clic en una casilla hasta ver el movimiento
+pintado, despertares del bucle de Tk con el cliente parado y casillas que se
+repintan por cada estado recibido. Compara el cliente, que despierta a Tk
+solo cuando llega un mensaje, con el sondeo anterior de la cola cada 100 ms.
+
+Juega partidas contra el bot del servidor, que arranca en un hilo del propio
+proceso. Necesita pantalla (o un servidor X virtual, p. ej. xvfb-run).
+
+Uso: python benchmarks/bench_client_render.py [movimientos]
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from client import GameClient
+from server import GameServer
+
+PORT = 8795
+IDLE_SECONDS = 2.0
+THINK = 0.05  # Pausa antes de cada clic, como un jugador muy rápido
+
+
+class PollingClient(GameClient):
+    #Comportamiento anterior: la interfaz mira la cola cada 100 ms, haya mensajes o no
+    def post(self, msg_type, msg_data):
+        self.message_queue.put((msg_type, msg_data))
+
+    def start_processing(self):
+        self.poll_messages()
+
+
+def run_server():
+    server = GameServer(port=PORT)
+    threading.Thread(target=asyncio.run, args=(server.start(),), daemon=True).start()
+    time.sleep(1.0)
+
+
+def measure(client_class, moves):
+    client = client_class(url=f'ws://127.0.0.1:{PORT}')
+    wakeups = [0]
+    process_messages = client.process_messages
+
+    def counted():
+        wakeups[0] += 1
+        process_messages()
+    client.process_messages = counted
+
+    repaints = [0]
+    for button in client.board_buttons:
+        def config(*args, _config=button.config, **kwargs):
+            repaints[0] += 1
+            return _config(*args, **kwargs)
+        button.config = config
+
+    states = [0]
+    update_game_state = client.update_game_state
+
+    def counted_state(state):
+        states[0] += 1
+        update_game_state(state)
+    client.update_game_state = counted_state
+
+    played = [0]
+    phase = {'name': 'play', 'since': None, 'requested': 'ninguna'}
+
+    def tick():
+        if phase['name'] == 'play':
+            if played[0] >= moves:
+                phase.update(name='idle', since=time.perf_counter(), wakeups=wakeups[0])
+            elif client.websocket and client.pending_input is None:
+                view = client.board_view
+                finished = client.labels_view.get(client.game_status_label, '').endswith('Finalizado')
+                if client.current_table is None or finished:
+                    if phase['requested'] != client.current_table:
+                        phase['requested'] = client.current_table  # Una sola partida nueva por sala terminada
+                        client.play_vs_bot()
+                elif client.labels_view.get(client.table_info_label, '').endswith('Turno: X'):
+                    free = [i for i, cell in enumerate(view) if cell and cell[1] == 'normal']
+                    if free:
+                        played[0] += 1
+                        client.board_buttons[free[0]].invoke()
+            client.root.after(int(THINK * 1000), tick)
+        elif time.perf_counter() - phase['since'] >= IDLE_SECONDS:
+            phase['idle'] = wakeups[0] - phase['wakeups']
+            client.root.quit()
+        else:
+            client.root.after(int(IDLE_SECONDS * 1000), tick)
+
+    client.root.after(500, tick)
+    client.root.mainloop()
+    client.loop.call_soon_threadsafe(client.loop.stop)
+    client.root.destroy()
+    p50, p99, count = client.latency_summary()
+    return p50, p99, count, phase['idle'] / IDLE_SECONDS, repaints[0] / max(states[0], 1)
+
+
+def main():
+    moves = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        print(f"Sin pantalla, no se puede medir el cliente Tk: {e}")
+        return
+    run_server()
+    print(f"{'cliente':<12}{'p50 ms':>9}{'p99 ms':>9}{'clics':>7}{'despertares/s parado':>22}{'casillas/estado':>17}")
+    for name, client_class in (('eventos', GameClient), ('sondeo', PollingClient)):
+        p50, p99, count, idle, repaints = measure(client_class, moves)
+        print(f"{name:<12}{p50 * 1000:>9.1f}{p99 * 1000:>9.1f}{count:>7}{idle:>22.1f}{repaints:>17.2f}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+Micro-benchmark del registro de salas de Game: crear, buscar, contar salas en
+espera y eliminar deben costar lo mismo con 1k que con 100k salas. Falla si
+con 100k salas alguna operación supera su máximo en MAX_US (un índice que
+desplaza listas en cada cambio ronda los 9-11 us por eliminación).
+
+Uso: python benchmarks/bench_game_registry.py
+"""
+
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.Game import Game
+
+SIZES = [1000, 10000, 100000]
+LOOKUPS = 100000
+REPEATS = 3  # Se toma la mejor de varias pasadas, para que una pausa ajena no cuente
+MAX_US = {'crear': 20, 'buscar': 2, 'contar': 1, 'eliminar': 7}  # Máximo por operación con 100k salas
+
+
+def per_op_us(func, count):
+    #Sin el recolector de basura, que con muchas salas vivas añade pausas ajenas al registro
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        func()
+        return (time.perf_counter() - start) / count * 1e6
+    finally:
+        gc.enable()
+
+
+def run(size):
+    game = Game()
+    ids = []
+
+    def create():
+        for i in range(size):
+            table = game.create_table()
+            # Llenar la sala para no chocar con el tope de 50 salas en espera
+            table.add_player(f'a{i}', None)
+            table.add_player(f'b{i}', None)
+            ids.append(table.id)
+
+    create_us = per_op_us(create, size)
+    sample = [random.choice(ids) for _ in range(LOOKUPS)]
+    lookup_us = per_op_us(lambda: [game.get_table(table_id) for table_id in sample], LOOKUPS)
+    count_us = per_op_us(lambda: [game.count_tables('waiting') for _ in range(LOOKUPS)], LOOKUPS)
+    random.shuffle(ids)
+    remove_us = per_op_us(lambda: [game.remove_table(table_id) for table_id in ids], size)
+    return create_us, lookup_us, count_us, remove_us
+
+
+def main():
+    print(f"{'salas':>8} {'crear us':>9} {'buscar us':>10} {'contar us':>10} {'eliminar us':>12}")
+    results = {}
+    for size in SIZES:
+        runs = [run(size) for _ in range(REPEATS)]
+        create_us, lookup_us, count_us, remove_us = results[size] = tuple(map(min, zip(*runs)))
+        print(f"{size:>8} {create_us:>9.2f} {lookup_us:>10.3f} {count_us:>10.3f} {remove_us:>12.2f}")
+
+    slow = [f"{name} {cost:.2f} us > {MAX_US[name]} us"
+            for name, cost in zip(MAX_US, results[100000]) if cost > MAX_US[name]]
+    if slow:
+        print(f"con 100000 salas: {', '.join(slow)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
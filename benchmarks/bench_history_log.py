@@ -0,0 +1,124 @@
+"""
+Historial binario de partidas: coste de anexar registros desde el bucle,
+velocidad de escritura por lotes y de reproducción con mmap. Comprueba además
+que las partidas en tableros de otras medidas se reproducen en su tablero
+(termina con código 1 si alguna no da el mismo ganador).
+
+Uso: python benchmarks/bench_history_log.py [partidas]
+"""
+
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from history import GameLog, HistoryReader, RECORD
+from models.Board import BitBoard, ListBoard
+
+GEOMETRIES = ((3, 3), (4, 3), (7, 4), (15, 5))  # (lado, fichas en raya) de la comprobación
+
+
+async def write(directory, games, rng):
+    log = GameLog(directory, max_bytes=16 * 1024 * 1024)
+    log.start()
+    records = 0
+    append_time = 0.0
+    for table_id in range(1, games + 1):
+        board = BitBoard()
+        cells = list(range(9))
+        rng.shuffle(cells)
+        symbol = 'X'
+        start = time.perf_counter()
+        for seq, cell in enumerate(cells, 1):
+            winner = board.place(cell, symbol)
+            log.append_move(table_id, seq, cell, symbol)
+            records += 1
+            if winner:
+                log.append_result(table_id, seq + 1, winner)
+                records += 1
+                break
+            symbol = 'O' if symbol == 'X' else 'X'
+        append_time += time.perf_counter() - start
+        if table_id % 1000 == 0:
+            await asyncio.sleep(0)  # Dejar correr la tarea de escritura periódica
+    start = time.perf_counter()
+    log.close()
+    return records, append_time, time.perf_counter() - start
+
+
+def check_geometries(directory, games, rng):
+    #Partidas al azar en tableros de varias medidas, con su registro de inicio como las anota el servidor;
+    #retorna cuántas dan otro ganador al reproducirlas con cada motor
+    log = GameLog(directory)
+    table_id = 0
+    for size, win in GEOMETRIES:
+        for _ in range(games):
+            table_id += 1
+            board = BitBoard(size, win)
+            cells = list(range(size * size))
+            rng.shuffle(cells)
+            log.append_start(table_id, size, win)
+            winner = None
+            for seq, cell in enumerate(cells, 1):
+                symbol = 'XO'[seq % 2 == 0]
+                winner = board.place(cell, symbol)
+                log.append_move(table_id, seq, cell, symbol)
+                if winner:
+                    break
+            log.append_result(table_id, seq + 1, winner)
+    log.close()
+    reader = HistoryReader(directory)
+    return sum(winner != result for board_class in (BitBoard, ListBoard)
+               for _, winner, result in reader.replay(board_class))
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    directory = tempfile.mkdtemp(prefix='historial-')
+    try:
+        start = time.perf_counter()
+        records, append_time, close_time = asyncio.run(write(directory, games, random.Random(1)))
+        elapsed = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(f"partidas: {games:,}  registros: {records:,}  ({RECORD.size} bytes/registro, "
+              f"{size / 2 ** 20:.1f} MiB en {len(os.listdir(directory))} segmentos)")
+        print(f"anexar (incluye jugar la partida): {append_time / records * 1e6:.2f} us/registro")
+        print(f"escritura total: {elapsed:.2f} s  (vaciado final {close_time * 1000:.0f} ms)")
+
+        start = time.perf_counter()
+        mismatches = replayed = 0
+        for _, winner, result in HistoryReader(directory).replay(BitBoard):
+            replayed += 1
+            mismatches += winner != result
+        elapsed = time.perf_counter() - start
+        print(f"reproducción: {replayed:,} partidas en {elapsed:.2f} s  ({replayed / elapsed:,.0f} partidas/s, "
+              f"discrepancias {mismatches})")
+
+        # Segunda pasada solo para medir memoria: mmap no carga el fichero en el heap
+        tracemalloc.start()
+        count = sum(1 for _ in HistoryReader(directory).records())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"recorrido de {count:,} registros con pico de memoria de {peak / 1024:.0f} KiB")
+    finally:
+        shutil.rmtree(directory)
+
+    directory = tempfile.mkdtemp(prefix='historial-')
+    try:
+        mismatches = check_geometries(directory, 200, random.Random(2))
+    finally:
+        shutil.rmtree(directory)
+    print(f"reproducción en {', '.join(f'{size}×{size} ({win} en raya)' for size, win in GEOMETRIES)}: "
+          f"discrepancias {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
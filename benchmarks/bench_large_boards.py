@@ -0,0 +1,147 @@
+"""
+Tableros grandes (N×N, k en raya): coste de procesar un movimiento.
+
+Primero el motor: microsegundos por movimiento de Table con ListBoard, que
+evalúa todas las rayas del tablero tras cada movimiento, frente a BitBoard,
+que solo recorre las cuatro líneas que pasan por la última casilla (O(k)).
+
+Después el servidor completo en 15×15 con 5 en raya: CPU y bytes enviados
+por movimiento cuando los jugadores reciben solo el delta (table_move) frente
+a reenviar el tablero entero en cada movimiento, en JSON y en binario. Las
+conexiones son simuladas en el propio proceso para medir solo el servidor.
+
+Uso: python benchmarks/bench_large_boards.py [partidas]
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bench_quick_match import FakeSocket
+from models.Board import BitBoard, ListBoard, geometry
+from models.Table import Table
+from protocol import BINARY_SUBPROTOCOL
+from server import GameServer
+
+BOARDS = [(3, 3), (7, 4), (9, 5), (15, 5)]  # (lado, en raya)
+SERVER_BOARD = (15, 5)
+
+
+def random_games(size, count, seed=1):
+    #Órdenes de casillas al azar; cada partida se juega hasta que termina
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        order = list(range(size * size))
+        rng.shuffle(order)
+        games.append(order)
+    return games
+
+
+def play(board_class, size, win, games):
+    #Microsegundos por movimiento y ganadores, para comprobar que los dos motores coinciden
+    moves = 0
+    results = []
+    start = time.perf_counter()
+    for order in games:
+        table = Table(0, board_class=board_class, size=size, win=win)
+        table.add_player('a', None)
+        table.add_player('b', None)
+        players = ('a', 'b')
+        for turn, position in enumerate(order):
+            table.make_move(position, players[turn % 2])
+            moves += 1
+            if table.winner:
+                break
+        results.append(table.winner)
+    return (time.perf_counter() - start) / moves * 1e6, moves / len(games), results
+
+
+class CountingSocket(FakeSocket):
+    #Solo cuenta lo que recibe, sin decodificarlo
+    def __init__(self):
+        super().__init__()
+        self.bytes = 0
+
+    async def send(self, message):
+        self.bytes += len(message)
+
+
+class BinarySocket(CountingSocket):
+    subprotocol = BINARY_SUBPROTOCOL
+
+
+async def serve(socket_class, games, full):
+    #Partidas al azar entre dos jugadores; retorna (µs de CPU por movimiento, bytes a los jugadores por movimiento)
+    size, win = SERVER_BOARD
+    server = GameServer()
+    if full:
+        # Envío anterior: el tablero completo a cada jugador tras cada movimiento
+        server.broadcast_move = server.broadcast_table_state
+    players = [socket_class(), socket_class()]
+    tasks = [asyncio.create_task(server.handle_client(socket, '/')) for socket in players]
+    await asyncio.sleep(0)
+    rng = random.Random(2)
+    moves = 0
+    sent = 0
+    cpu = 0.0
+    for _ in range(games):
+        await server.process_message(players[0], json.dumps({'command': 'CREATE_TABLE', 'size': size, 'win': win}))
+        table = server.game.get_table(server.clients[players[0]].table_id)
+        await server.process_message(players[1], json.dumps({'command': 'JOIN_TABLE', 'table_id': table.id}))
+        await asyncio.sleep(0)
+        order = list(range(size * size))
+        rng.shuffle(order)
+        for turn, position in enumerate(order):
+            before = sum(socket.bytes for socket in players)
+            message = json.dumps({'command': 'MAKE_MOVE', 'table_id': table.id, 'position': position})
+            start = time.process_time()
+            await server.process_message(players[turn % 2], message)
+            await asyncio.sleep(0)  # Las colas de salida entregan el mensaje
+            cpu += time.process_time() - start
+            sent += sum(socket.bytes for socket in players) - before
+            moves += 1
+            if table.winner:
+                break
+        await asyncio.sleep(0)
+    for socket in players:
+        await socket.close()
+    await asyncio.gather(*tasks)
+    return cpu / moves * 1e6, sent / moves
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{'tablero':<16}{'rayas':>7}{'movs/partida':>14}{'ListBoard µs':>14}{'BitBoard µs':>13}{'x':>7}")
+    for size, win in BOARDS:
+        count = max(games // size, 10)
+        orders = random_games(size, count)
+        list_us, length, list_results = play(ListBoard, size, win, orders)
+        bit_us, _, bit_results = play(BitBoard, size, win, orders)
+        assert list_results == bit_results, 'Los motores no coinciden'
+        print(f"{f'{size}×{size}, {win} en raya':<16}{len(geometry(size, win).lines):>7,}{length:>14.1f}"
+              f"{list_us:>14.2f}{bit_us:>13.2f}{list_us / bit_us:>7.1f}")
+
+    size, win = SERVER_BOARD
+    rounds = max(games // 20, 10)
+    print(f"\nservidor, {size}×{size} con {win} en raya ({rounds} partidas al azar por fila):")
+    print(f"{'envío':<24}{'µs CPU/mov':>12}{'bytes/mov':>11}")
+    for name, socket_class, full in (('delta, json', CountingSocket, False),
+                                     ('tablero completo, json', CountingSocket, True),
+                                     ('delta, binario', BinarySocket, False),
+                                     ('tablero completo, binario', BinarySocket, True)):
+        sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+        try:
+            cpu, sent = asyncio.run(serve(socket_class, rounds, full))
+        finally:
+            sys.stdout = stdout
+        print(f"{name:<24}{cpu:>12.1f}{sent:>11,.0f}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+GET_TABLES con muchas salas: lista completa frente a páginas servidas desde
+el índice ordenado por estado. Mide el tiempo de construir la respuesta
+(tras un cambio, cuando la caché de la lista completa no sirve), su tamaño
+en JSON y binario, y el coste añadido de mantener el índice.
+
+Uso: python benchmarks/bench_lobby_pages.py [salas] [tamaño de página]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.Table import Table
+from protocol import BINARY, JSON, Frame
+from server import GameServer
+
+
+def populate(server, count):
+    tables = []
+    for table_id in range(1, count + 1):
+        table = Table(table_id)
+        table.add_player(f'a{table_id}', None)
+        if table_id % 3:
+            table.add_player(f'b{table_id}', None)
+        tables.append(table)
+    server.game.restore_tables(tables)
+    return tables
+
+
+def measure(build, rounds, touch):
+    #Construye y codifica la respuesta tras cambiar una sala, para que no valga la caché
+    start = time.perf_counter()
+    for _ in range(rounds):
+        touch()
+        frame = build()
+        sizes = len(frame.encode(JSON)), len(frame.encode(BINARY))
+    return (time.perf_counter() - start) / rounds, sizes
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    server = GameServer()
+    tables = populate(server, count)
+    rng = random.Random(1)
+    game = server.game
+
+    def touch():
+        #Un cambio visible en el lobby invalida la lista cacheada
+        game.notify('joined', rng.choice(tables))
+
+    def full():
+        tables_info, _ = server.lobby.snapshot()
+        return Frame({'type': 'tables', 'tables': tables_info, 'cursor': None})
+
+    def page(status, cursor):
+        def build():
+            tables_info, next_cursor = server.lobby.page(status, cursor, limit)
+            return Frame({'type': 'tables', 'tables': tables_info, 'cursor': next_cursor})
+        return build
+
+    print(f"salas: {count:,}  página: {limit}")
+    print(f"{'respuesta':<34} {'ms':>9} {'JSON KiB':>9} {'bin KiB':>8}")
+    rows = [('lista completa', full, 5)]
+    for status in (None, 'waiting', 'playing'):
+        for cursor in (0, count // 2, count - limit * 3):
+            rows.append((f'página {status or "todas"} desde {cursor:,}', page(status, cursor), 2000))
+    for name, build, rounds in rows:
+        elapsed, (json_size, binary_size) = measure(build, rounds, touch)
+        print(f"{name:<34} {elapsed * 1000:>9.3f} {json_size / 1024:>9.1f} {binary_size / 1024:>8.1f}")
+
+    # Recorrer todas las páginas con el cursor devuelto por la anterior
+    start = time.perf_counter()
+    cursor, pages, seen = 0, 0, 0
+    while cursor is not None:
+        tables_info, cursor = server.lobby.page(None, cursor, limit)
+        pages += 1
+        seen += len(tables_info)
+    print(f"recorrido completo: {pages:,} páginas, {seen:,} salas en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Coste de mantener el índice: cada salida o entrada de un jugador mueve la sala de estado
+    playing = [table for table in tables if len(table.players) == 2]
+    rounds = 20_000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        table = rng.choice(playing)
+        player_id = table.players[1]
+        table.remove_player(player_id)
+        table.add_player(player_id, None)
+    elapsed = (time.perf_counter() - start) / rounds / 2
+    print(f"cambio de estado (eventos, reindexado y lobby): {elapsed * 1e6:.1f} us")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Memoria por conexión inactiva y por sala activa, medida con tracemalloc.
+
+Conexión inactiva: el cliente se conecta, recibe su sesión y no hace nada más
+(registro Session, cola de salida, plazos...). Sala activa: dos jugadores
+emparejados con QUICK_MATCH que ya han hecho cuatro movimientos (sala,
+tablero, buzón, anillos de sesión con los mensajes de partida...), sin contar
+lo que ya costaban sus conexiones.
+
+Se mide con 10.000 y 100.000 de cada y termina con código 1 si alguna pasa
+de MAX_BYTES_PER_CONNECTION o MAX_BYTES_PER_TABLE, para detectar regresiones.
+Las conexiones son simuladas en el propio proceso y se crean antes de
+empezar a medir, así que solo cuenta lo que reserva el servidor.
+
+Uso: python benchmarks/bench_memory_footprint.py [cantidad...]
+"""
+
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bench_quick_match import FakeSocket
+from server import GameServer
+
+MAX_BYTES_PER_CONNECTION = 2300
+MAX_BYTES_PER_TABLE = 5800
+MOVES = (0, 1, 3, 4)  # X, O, X, O: la partida sigue abierta
+
+
+class IdleSocket(FakeSocket):
+    #Descarta lo que recibe: solo interesa lo que guarda el servidor
+    async def send(self, message):
+        pass
+
+
+async def drain():
+    #Deja que las tareas de escritura vacíen las colas de salida
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def connect(server, sockets):
+    tasks = [asyncio.create_task(server.handle_client(socket, '/')) for socket in sockets]
+    await drain()
+    return tasks
+
+
+async def disconnect(sockets, tasks):
+    for socket in sockets:
+        await socket.close()
+    await asyncio.gather(*tasks)
+
+
+def traced():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def per_connection(count):
+    #Bytes por conexión inactiva
+    server = GameServer()
+    sockets = [IdleSocket() for _ in range(count)]
+    tracemalloc.start()
+    before = traced()
+    tasks = await connect(server, sockets)
+    used = traced() - before
+    tracemalloc.stop()
+    await disconnect(sockets, tasks)
+    return used / count
+
+
+async def per_table(count):
+    #Bytes por sala activa, además de los de sus dos conexiones
+    server = GameServer()
+    sockets = [IdleSocket() for _ in range(2 * count)]
+    tracemalloc.start()
+    tasks = await connect(server, sockets)
+    before = traced()
+    for socket in sockets:
+        await server.process_message(socket, '{"command": "QUICK_MATCH"}')
+    await drain()
+    for turn, position in enumerate(MOVES):
+        for first, second in zip(sockets[::2], sockets[1::2]):
+            table_id = server.clients[first].table_id
+            player = first if server.game.get_table(table_id).players[turn % 2] == server.clients[first].player_id \
+                else second
+            await server.process_message(player, json.dumps({'command': 'MAKE_MOVE', 'table_id': table_id,
+                                                             'position': position}))
+        await drain()
+    used = traced() - before
+    tracemalloc.stop()
+    assert all(len(table.moves) == len(MOVES) for table in server.game.tables.values()), 'Partidas incompletas'
+    await disconnect(sockets, tasks)
+    return used / count
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'cantidad':>10}{'B/conexión':>12}{'B/sala':>10}{'s':>8}")
+    failed = False
+    for count in counts:
+        start = time.perf_counter()
+        sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+        try:
+            connection = asyncio.run(per_connection(count))
+            table = asyncio.run(per_table(count))
+        finally:
+            sys.stdout = stdout
+        print(f"{count:>10,}{connection:>12,.0f}{table:>10,.0f}{time.perf_counter() - start:>8.1f}")
+        failed |= connection > MAX_BYTES_PER_CONNECTION or table > MAX_BYTES_PER_TABLE
+    if failed:
+        print(f"Se superó el límite: {MAX_BYTES_PER_CONNECTION:,} B por conexión, {MAX_BYTES_PER_TABLE:,} B por sala")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+Control de admisión frente a un cliente abusivo: latencia de MAKE_MOVE de las
+parejas que juegan mientras unas cuantas conexiones inundan el servidor de
+GET_TABLES (la lista completa, con miles de salas) y CREATE_TABLE.
+
+Tres escenarios: sin inundación, inundación con el servidor sin control de
+admisión (el valor por defecto) e inundación con los límites por conexión
+(RATE_LIMITS) y el descarte por retraso del bucle (SHED_LAG). Para cada uno: p50/p99 de
+MAKE_MOVE frente al SLO, movimientos por segundo, retraso medido del bucle y
+qué recibieron los abusivos (respuestas servidas y rechazos busy).
+
+Las conexiones son simuladas en el propio proceso; cada abusivo mantiene
+FLOOD_BATCH comandos pendientes de leer, como un socket que nunca se vacía.
+
+Uso: python benchmarks/bench_overload.py [parejas] [abusivos] [segundos]
+"""
+
+import asyncio
+import gc
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from admission import RATE_LIMITS, SHED_LAG
+from bench_quick_match import FakeSocket
+from server import GameServer
+
+SLO_MS = 50  # p99 máxima de MAKE_MOVE
+LOBBY_TABLES = 5000  # Salas en espera que ya hay en el lobby
+FLOOD_BATCH = 50  # Comandos pendientes que mantiene cada abusivo
+THINK = (0.02, 0.06)  # Segundos que piensa cada jugador antes de mover
+FLOOD_COMMANDS = [json.dumps({'command': 'GET_TABLES'})] * 3 + [json.dumps({'command': 'CREATE_TABLE'})]
+START = ('game_start', 'busy', 'error')
+MOVE = ('table_move', 'busy', 'error')
+
+
+class PlayerSocket(FakeSocket):
+    #Conexión de un jugador: espera un tipo de mensaje a la vez
+    def __init__(self):
+        super().__init__()
+        self.waiting = None  # (tipos, futuro)
+
+    def expect(self, types):
+        #Futuro con el próximo mensaje de uno de esos tipos; se pide antes de enviar el comando
+        self.waiting = (types, asyncio.get_running_loop().create_future())
+        return self.waiting[1]
+
+    def push(self, data):
+        self.incoming.put_nowait(json.dumps(data))
+
+    async def send(self, message):
+        data = json.loads(message)
+        if self.waiting and data['type'] in self.waiting[0] and not self.waiting[1].done():
+            self.waiting[1].set_result(data)
+
+
+class FloodSocket(FakeSocket):
+    #Conexión abusiva: solo cuenta lo que recibe
+    def __init__(self):
+        super().__init__()
+        self.busy = 0
+        self.served = 0
+
+    async def send(self, message):
+        if message.startswith('{"type": "busy"'):
+            self.busy += 1
+        else:
+            self.served += 1
+
+
+async def request(socket, data, types):
+    #Envía el comando y espera la respuesta, reintentando tras un busy como haría un cliente correcto
+    while True:
+        future = socket.expect(types)
+        socket.push(data)
+        response = await future
+        if response['type'] != 'busy':
+            return response
+        await asyncio.sleep(response['retry_after'])
+
+
+async def play(server, pair, deadline, latencies, rng):
+    #Partidas seguidas con QUICK_MATCH y movimientos al azar hasta el plazo
+    while time.perf_counter() < deadline:
+        starts = await asyncio.gather(*(request(socket, {'command': 'QUICK_MATCH'}, START) for socket in pair))
+        if any(start['type'] != 'game_start' for start in starts):
+            return
+        table = server.game.get_table(starts[0]['table']['id'])
+        players = pair if table.players[0] == server.clients[pair[0]].player_id else pair[::-1]
+        board = starts[0]['table']['board']
+        turn = 0
+        while True:
+            await asyncio.sleep(rng.uniform(*THINK))
+            position = rng.choice([i for i, cell in enumerate(board) if cell == ' '])
+            start = time.perf_counter()
+            response = await request(players[turn], {'command': 'MAKE_MOVE', 'table_id': table.id,
+                                                     'position': position}, MOVE)
+            latencies.append(time.perf_counter() - start)
+            if response['type'] != 'table_move':
+                return
+            board[position] = response['symbol']
+            if response['winner']:
+                break
+            turn = 1 - turn
+        await asyncio.sleep(0)  # La sala se libera en la siguiente vuelta del bucle
+
+
+async def flood(sockets, deadline):
+    #Mantiene FLOOD_BATCH comandos pendientes en cada conexión abusiva
+    sent = 0
+    while time.perf_counter() < deadline:
+        for socket in sockets:
+            while socket.incoming.qsize() < FLOOD_BATCH:
+                socket.incoming.put_nowait(FLOOD_COMMANDS[sent % len(FLOOD_COMMANDS)])
+                sent += 1
+        await asyncio.sleep(0)
+    return sent
+
+
+async def run(pairs, floods, seconds, admission):
+    server = GameServer(rate_limits=RATE_LIMITS, shed_lag=SHED_LAG) if admission else GameServer()
+    server.admission.start()
+    for _ in range(LOBBY_TABLES):
+        server.game.create_table(waiting_limit=None)
+    players = [PlayerSocket() for _ in range(2 * pairs)]
+    flooders = [FloodSocket() for _ in range(floods)]
+    tasks = [asyncio.create_task(server.handle_client(socket, '/')) for socket in players + flooders]
+    await asyncio.sleep(0)
+    gc.freeze()  # Las salas del lobby no son basura: que las pasadas completas del GC no las recorran
+    rng = random.Random(1)
+    latencies = []
+    lags = []
+
+    async def sample():
+        #Retraso del bucle medido aparte, también cuando el servidor no lo mide
+        loop = asyncio.get_running_loop()
+        while True:
+            before = loop.time()
+            await asyncio.sleep(0.02)
+            lags.append(loop.time() - before - 0.02)
+
+    sampler = asyncio.create_task(sample())
+    start = time.perf_counter()
+    deadline = start + seconds
+    results = await asyncio.gather(flood(flooders, deadline),
+                                   *(play(server, players[i:i + 2], deadline, latencies, rng)
+                                     for i in range(0, len(players), 2)))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    server.admission.close()
+    for socket in players + flooders:
+        await socket.close()
+    await asyncio.gather(*tasks)
+    gc.unfreeze()
+    latencies.sort()
+    pick = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+    return {
+        'p50': pick(0.50),
+        'p99': pick(0.99),
+        'moves': len(latencies) / elapsed,
+        'lag': sorted(lags)[int(len(lags) * 0.99)] * 1000 if lags else 0,
+        'sent': results[0] / elapsed,
+        'served': sum(socket.served for socket in flooders) / elapsed,
+        'busy': sum(socket.busy for socket in flooders) / elapsed
+    }
+
+
+def main():
+    pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    floods = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    print(f"{pairs} parejas jugando, {floods} abusivos, {LOBBY_TABLES:,} salas en el lobby, {seconds:.0f} s por fila; "
+          f"SLO: p99 de MAKE_MOVE <= {SLO_MS} ms")
+    print(f"{'escenario':<26}{'p50 ms':>8}{'p99 ms':>9}{'SLO':>5}{'movs/s':>8}{'retraso p99 ms':>16}"
+          f"{'abuso/s':>9}{'servidos/s':>12}{'busy/s':>9}")
+    for name, flooding, admission in (('sin inundación', 0, True),
+                                      ('inundación, sin control', floods, False),
+                                      ('inundación, con control', floods, True)):
+        sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+        try:
+            result = asyncio.run(run(pairs, flooding, seconds, admission))
+        finally:
+            sys.stdout = stdout
+        print(f"{name:<26}{result['p50']:>8.1f}{result['p99']:>9.1f}{'sí' if result['p99'] <= SLO_MS else 'no':>5}"
+              f"{result['moves']:>8,.0f}{result['lag']:>16.1f}{result['sent']:>9,.0f}{result['served']:>12,.0f}"
+              f"{result['busy']:>9,.0f}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
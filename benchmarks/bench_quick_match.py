@@ -0,0 +1,172 @@
+"""
+QUICK_MATCH ante una avalancha de llegadas: emparejamientos por segundo y
+tiempo hasta recibir game_start, frente al flujo anterior del lobby: la mitad
+de los jugadores crea una sala y la otra mitad pide la página de salas en
+espera (GET_TABLES con status) y se une a una de las que ve, elegida al azar
+como lo harían usuarios distintos mirando la misma lista. Los que chocan con el tope de 50 salas en espera o
+pierden la carrera por una sala reintentan, como haría el cliente, hasta que
+todos están en partida. Las conexiones son simuladas en el propio proceso
+para medir solo el servidor.
+
+Uso: python benchmarks/bench_quick_match.py [jugadores] [cubos]
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from server import GameServer
+
+RETRY_DELAY = (0.01, 1.0)  # Espera del flujo del lobby antes de reintentar: exponencial al azar, de 10 ms a 1 s
+
+
+class FakeSocket:
+    #Conexión simulada: recibe comandos de una cola y registra cuándo llega cada tipo de mensaje
+    subprotocol = None
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.received = {}  # {tipo: instante de la primera llegada}
+        self.tables = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.incoming.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    async def send(self, message):
+        data = json.loads(message)
+        self.received.setdefault(data['type'], time.perf_counter())
+        if data['type'] == 'tables':
+            self.tables = data['tables']
+
+    async def close(self, code=1000, reason=''):
+        self.incoming.put_nowait(None)
+
+
+async def settle(server, sockets, done):
+    #Espera a que todas las conexiones reciban su respuesta
+    while not all(done(socket) for socket in sockets):
+        await asyncio.sleep(0.01)
+
+
+async def quick_match(players, buckets):
+    server = GameServer()
+    sockets = [FakeSocket() for _ in range(players)]
+    tasks = [asyncio.create_task(server.handle_client(socket, '/')) for socket in sockets]
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    for i, socket in enumerate(sockets):
+        socket.incoming.put_nowait(json.dumps({'command': 'QUICK_MATCH', 'bucket': i % buckets}))
+    await settle(server, sockets, lambda s: 'game_start' in s.received or 'match_queued' in s.received)
+    elapsed = time.perf_counter() - start
+    waits = sorted(s.received['game_start'] - start for s in sockets if 'game_start' in s.received)
+    for socket in sockets:
+        await socket.close()
+    await asyncio.gather(*tasks)
+    return elapsed, waits, len(server.matchmaker)
+
+
+class LobbySocket(FakeSocket):
+    #Conexión del flujo del lobby: además espera la respuesta a cada comando
+    def __init__(self):
+        super().__init__()
+        self.waiting = None  # (tipos, futuro)
+
+    async def request(self, data, types):
+        #Envía el comando y retorna el próximo mensaje de uno de esos tipos
+        self.waiting = (types, asyncio.get_running_loop().create_future())
+        self.incoming.put_nowait(json.dumps(data))
+        return await self.waiting[1]
+
+    async def send(self, message):
+        await super().send(message)
+        data = json.loads(message)
+        if self.waiting and data['type'] in self.waiting[0] and not self.waiting[1].done():
+            self.waiting[1].set_result(data)
+
+
+def backoff(attempt):
+    #Segundos antes del reintento attempt, como el cliente al reconectar: al azar hasta un tope que se duplica
+    return random.uniform(0, min(RETRY_DELAY[1], RETRY_DELAY[0] * 2 ** attempt))
+
+
+async def create(socket, retries):
+    #Crea una sala; con el tope de salas en espera alcanzado, reintenta más tarde
+    attempt = 0
+    while (await socket.request({'command': 'CREATE_TABLE'}, ('table_joined', 'error')))['type'] == 'error':
+        retries[0] += 1
+        await asyncio.sleep(backoff(attempt))
+        attempt += 1
+
+
+async def join_first_free(socket, retries):
+    #Pide las salas en espera y se une a una libre; si no hay o otro se la quitó, vuelve a pedirlas
+    attempt = 0
+    while True:
+        tables = (await socket.request({'command': 'GET_TABLES', 'status': 'waiting'}, ('tables',)))['tables']
+        free = [table['id'] for table in tables if table['available']]
+        if free:
+            response = await socket.request({'command': 'JOIN_TABLE', 'table_id': random.choice(free)},
+                                            ('table_joined', 'error'))
+            if response['type'] == 'table_joined':
+                return
+        retries[1] += 1
+        await asyncio.sleep(backoff(attempt))
+        attempt += 1
+
+
+async def first_free_table(players):
+    #Flujo del lobby: la mitad crea salas y la otra mitad se une a la primera libre, reintentando
+    server = GameServer()
+    sockets = [LobbySocket() for _ in range(players)]
+    tasks = [asyncio.create_task(server.handle_client(socket, '/')) for socket in sockets]
+    await asyncio.sleep(0)
+    retries = [0, 0]  # [CREATE_TABLE rechazados, GET_TABLES + JOIN_TABLE fallidos]
+    start = time.perf_counter()
+    await asyncio.gather(*(create(socket, retries) for socket in sockets[::2]),
+                         *(join_first_free(socket, retries) for socket in sockets[1::2]))
+    await settle(server, sockets, lambda s: 'game_start' in s.received)
+    elapsed = time.perf_counter() - start
+    waits = sorted(s.received['game_start'] - start for s in sockets)
+    for socket in sockets:
+        await socket.close()
+    await asyncio.gather(*tasks)
+    return elapsed, waits, retries
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))] if values else float('nan')
+
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    buckets = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+    elapsed, waits, left = asyncio.run(quick_match(players, buckets))
+    legacy_elapsed, legacy_waits, retries = asyncio.run(first_free_table(players))
+    sys.stdout = stdout
+    print(f"jugadores: {players:,}  cubos: {buckets}")
+    print(f"QUICK_MATCH: {len(waits):,} jugadores en partida ({len(waits) // 2:,} emparejamientos) en "
+          f"{elapsed * 1000:.0f} ms  ({len(waits) // 2 / elapsed:,.0f} emparejamientos/s, {left} en cola)")
+    print(f"  hasta game_start: p50 {percentile(waits, 0.5) * 1000:.0f} ms  "
+          f"p99 {percentile(waits, 0.99) * 1000:.0f} ms")
+    print(f"CREATE_TABLE / GET_TABLES + JOIN_TABLE: {len(legacy_waits):,} jugadores en partida "
+          f"({len(legacy_waits) // 2:,} emparejamientos) en {legacy_elapsed * 1000:.0f} ms  "
+          f"({len(legacy_waits) // 2 / legacy_elapsed:,.0f} emparejamientos/s)")
+    print(f"  hasta game_start: p50 {percentile(legacy_waits, 0.5) * 1000:.0f} ms  "
+          f"p99 {percentile(legacy_waits, 0.99) * 1000:.0f} ms  (reintentos: {retries[0]:,} por el tope de salas "
+          f"en espera, {retries[1]:,} sin sala libre o por carreras)")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
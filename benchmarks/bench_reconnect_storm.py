@@ -0,0 +1,159 @@
+"""
+Avalancha de reconexiones: todos los clientes, a mitad de partida, pierden la
+conexión a la vez y vuelven a conectarse. Sin sesión (gracia 0) pierden su
+asiento y tienen que volver a pedir la lista de salas y buscar rival; con
+sesión la reanudan y el servidor solo repite lo que se perdieron. Con espera
+aleatoria los clientes vuelven repartidos en el primer intervalo del
+reintento exponencial del cliente (0-0.5 s) en lugar de todos a la vez.
+
+Se mide el tiempo hasta que todos vuelven a jugar, la CPU del servidor, los
+mensajes enviados y la mayor pausa del bucle. Las conexiones son simuladas en
+el propio proceso para medir solo el servidor.
+
+Uso: python benchmarks/bench_reconnect_storm.py [clientes]
+"""
+
+import asyncio
+import gc
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bench_quick_match import FakeSocket
+from protocol import apply_move
+from server import GameServer
+
+JITTER = 0.5  # Primer intervalo de espera del cliente (RECONNECT_BASE en client.py)
+
+
+class SessionSocket(FakeSocket):
+    #Conexión simulada que recuerda su sesión como lo hace el cliente
+    def __init__(self, session=None, last_seq=0):
+        super().__init__()
+        self.session = session
+        self.last_seq = last_seq
+        self.resumed = None
+        self.table = None
+
+    async def send(self, message):
+        for kind in ('lobby_delta', 'lobby_snapshot', 'tables'):
+            if message.startswith(f'{{"type": "{kind}"'):
+                # Sin decodificar: el coste de leer el lobby es del cliente, no del servidor
+                self.received.setdefault(kind, time.perf_counter())
+                return
+        data = json.loads(message)
+        seq = data.get('session_seq')
+        if seq is not None:
+            if seq <= self.last_seq:
+                return
+            self.last_seq = seq
+        if data['type'] == 'session':
+            self.session = data['session']
+            self.resumed = data['resumed']
+        if 'table' in data:
+            self.table = data['table']
+        elif data['type'] == 'table_move':
+            self.table = apply_move(self.table, data)
+        self.received.setdefault(data['type'], time.perf_counter())
+
+    def path(self):
+        return '/?' + urlencode({'session': self.session, 'seq': self.last_seq}) if self.session else '/'
+
+
+async def lag_probe(samples, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        samples.append(time.perf_counter() - start - 0.001)
+
+
+async def settle(sockets, done):
+    while not all(done(socket) for socket in sockets):
+        await asyncio.sleep(0.01)
+
+
+def command(socket, data):
+    socket.incoming.put_nowait(json.dumps(data))
+
+
+async def reconnect(server, old, resume, delay):
+    #Un cliente vuelve a conectarse tras delay segundos; sin sesión rehace lo que hace el cliente Tk al entrar
+    if delay:
+        await asyncio.sleep(delay)
+    socket = SessionSocket(old.session if resume else None, old.last_seq if resume else 0)
+    socket.table = old.table if resume else None  # El cliente conserva lo que ya tenía pintado
+    task = asyncio.create_task(server.handle_client(socket, socket.path()))
+    await asyncio.sleep(0)
+    if not resume:
+        command(socket, {'command': 'SUBSCRIBE_LOBBY', 'snapshot': False})
+        command(socket, {'command': 'GET_TABLES', 'limit': 50, 'cursor': 0})
+        command(socket, {'command': 'QUICK_MATCH'})
+    return socket, task
+
+
+async def storm(clients, resume, jitter):
+    server = GameServer(session_grace=30.0 if resume else 0)
+    sockets = [SessionSocket() for _ in range(clients)]
+    tasks = [asyncio.create_task(server.handle_client(socket, '/')) for socket in sockets]
+    await asyncio.sleep(0)
+    for socket in sockets:
+        command(socket, {'command': 'QUICK_MATCH'})
+    await settle(sockets, lambda s: 'game_start' in s.received)
+    # Cada pareja juega un movimiento antes de la caída
+    for socket in sockets:
+        if server.game.get_table(socket.table['id']).players[0] == server.clients[socket].player_id:
+            command(socket, {'command': 'MAKE_MOVE', 'table_id': socket.table['id'], 'position': 4})
+    await settle(sockets, lambda s: s.table['board'][4] == 'X')
+
+    # Caída: todas las conexiones se cierran a la vez
+    for socket in sockets:
+        await socket.close()
+    await asyncio.gather(*tasks)
+    # Lo creado antes de la caída no es basura: sin esto las pausas medidas son del GC de generación 2
+    gc.collect()
+    gc.freeze()
+
+    rng = random.Random(1)
+    samples = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(lag_probe(samples, stop))
+    sends = server.sends
+    cpu = time.process_time()
+    start = time.perf_counter()
+    pairs = await asyncio.gather(*(reconnect(server, socket, resume, rng.uniform(0, JITTER) if jitter else 0)
+                                   for socket in sockets))
+    fresh = [socket for socket, _ in pairs]
+    await settle(fresh, lambda s: s.resumed or 'game_start' in s.received)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    sent = server.sends - sends
+    stop.set()
+    await probe
+    kept = sum(1 for socket in fresh if socket.resumed and socket.table['board'][4] == 'X')
+    for socket in fresh:
+        await socket.close()
+    server.session_grace = 0
+    await asyncio.gather(*(task for _, task in pairs))
+    gc.unfreeze()
+    return elapsed, cpu, sent, max(samples, default=0), kept
+
+
+async def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"{clients:,} clientes a mitad de partida pierden la conexión a la vez")
+    print(f"{'reconexión':<28}{'hasta jugar s':>14}{'CPU s':>8}{'mensajes':>10}{'pausa máx ms':>14}{'partidas intactas':>19}")
+    for name, resume, jitter in (('sin sesión, a la vez', False, False),
+                                 ('sin sesión, espera aleatoria', False, True),
+                                 ('con sesión, a la vez', True, False),
+                                 ('con sesión, espera aleatoria', True, True)):
+        elapsed, cpu, sent, lag, kept = await storm(clients, resume, jitter)
+        print(f"{name:<28}{elapsed:>14.2f}{cpu:>8.2f}{sent:>10,}{lag * 1000:>14.1f}{kept:>19,}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
\ No newline at end of file
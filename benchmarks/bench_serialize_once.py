@@ -0,0 +1,66 @@
+"""
+Cuenta serializaciones frente a envíos bajo carga: con las fotos versionadas de
+Table y Game, cada cambio de estado se serializa una vez y se envía a todos.
+
+Uso: python benchmarks/bench_serialize_once.py [parejas] [observadores] [segundos]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import websockets
+
+from bench_slow_clients import pair
+import bench_slow_clients
+from models.Game import Game
+from models.Table import Table
+from server import GameServer
+
+
+async def watcher(deadline):
+    #Cliente suscrito al lobby que además pide la lista completa de vez en cuando
+    websocket = await websockets.connect(bench_slow_clients.URL)
+    await websocket.send(json.dumps({'command': 'SUBSCRIBE_LOBBY'}))
+    while time.perf_counter() < deadline:
+        await websocket.send(json.dumps({'command': 'GET_TABLES'}))
+        try:
+            while True:
+                await asyncio.wait_for(websocket.recv(), 0.05)
+        except asyncio.TimeoutError:
+            pass
+    await websocket.close()
+
+
+async def run(pairs, watchers, seconds):
+    server = GameServer(port=bench_slow_clients.PORT)
+    task = asyncio.create_task(server.start())
+    await asyncio.sleep(0.2)
+    encodes = Table.encodes + Game.encodes
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(
+        *(pair(deadline, []) for _ in range(pairs)),
+        *(watcher(deadline) for _ in range(watchers))
+    )
+    task.cancel()
+    return Table.encodes + Game.encodes - encodes, server.sends
+
+
+def main():
+    pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    watchers = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+    encodes, sends = asyncio.run(run(pairs, watchers, seconds))
+    sys.stdout = stdout
+    print(f"serializaciones/s: {encodes / seconds:>10,.0f}")
+    print(f"envíos/s:          {sends / seconds:>10,.0f}")
+    print(f"envíos por serialización: {sends / max(encodes, 1):.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Prueba de carga con clientes lentos: mide la latencia de MAKE_MOVE (envío del
+movimiento hasta recibir el table_move) de los jugadores normales, sin clientes
+lentos y con un 5% de clientes que leen muy despacio y saturan su conexión.
+
+Uso: python benchmarks/bench_slow_clients.py [parejas] [segundos]
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import websockets
+
+PORT = 8877
+URL = f'ws://127.0.0.1:{PORT}'
+MOVES = ((0, 0), (1, 3), (0, 1), (1, 4), (0, 2))  # (jugador, casilla): gana X
+
+
+def serve():
+    from server import GameServer
+    sys.stdout = open(os.devnull, 'w')
+    asyncio.run(GameServer(port=PORT).start())
+
+
+async def recv_type(websocket, kind, position=None):
+    #Espera un mensaje del tipo indicado (y, si se da, el movimiento en esa casilla)
+    while True:
+        data = json.loads(await websocket.recv())
+        if data.get('type') == kind and (position is None or data['position'] == position):
+            return data
+
+
+async def pair(deadline, latencies):
+    #Dos jugadores que juegan partidas completas sin pausa
+    players = [await websockets.connect(URL), await websockets.connect(URL)]
+    while time.perf_counter() < deadline:
+        await players[0].send(json.dumps({'command': 'CREATE_TABLE'}))
+        table_id = (await recv_type(players[0], 'table_joined'))['table']['id']
+        await players[1].send(json.dumps({'command': 'JOIN_TABLE', 'table_id': table_id}))
+        await recv_type(players[1], 'game_start')
+        for player, position in MOVES:
+            start = time.perf_counter()
+            await players[player].send(json.dumps({
+                'command': 'MAKE_MOVE', 'table_id': table_id, 'position': position
+            }))
+            await recv_type(players[player], 'table_move', position)
+            latencies.append(time.perf_counter() - start)
+        for websocket in players:
+            await recv_type(websocket, 'game_end')
+    for websocket in players:
+        await websocket.close()
+
+
+async def slow_client(deadline):
+    #Cliente suscrito al lobby que pide salas sin parar y apenas lee
+    websocket = await websockets.connect(URL, max_queue=1, read_limit=2 ** 10)
+    await websocket.send(json.dumps({'command': 'SUBSCRIBE_LOBBY'}))
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            await websocket.send(json.dumps({'command': 'GET_TABLES'}))
+        await asyncio.sleep(0.2)
+        try:
+            await asyncio.wait_for(websocket.recv(), 0.01)
+        except (asyncio.TimeoutError, websockets.exceptions.ConnectionClosed):
+            pass
+    await websocket.close()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(pairs, seconds, slow_ratio):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    slow = int(pairs * 2 * slow_ratio)
+    await asyncio.gather(
+        *(pair(deadline, latencies) for _ in range(pairs)),
+        *(slow_client(deadline) for _ in range(slow))
+    )
+    return slow, latencies
+
+
+def main():
+    pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{'lentos':>7} {'movimientos':>12} {'p50 ms':>8} {'p99 ms':>8}")
+    for slow_ratio in (0, 0.05):
+        server = multiprocessing.Process(target=serve, daemon=True)
+        server.start()
+        time.sleep(0.5)
+        slow, latencies = asyncio.run(run(pairs, seconds, slow_ratio))
+        server.terminate()
+        server.join()
+        print(f"{slow:>7} {len(latencies):>12} {percentile(latencies, 0.5) * 1000:>8.2f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Fotos de salas y recuperación tras un reinicio: duración de la foto completa
+e incremental, pausa máxima del bucle mientras se toma y tiempo de
+restauración al arrancar.
+
+Uso: python benchmarks/bench_snapshot_recovery.py [salas]
+"""
+
+import asyncio
+import os
+import random
+import secrets
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.Table import Table
+from server import GameServer
+
+
+def populate(server, count, rng):
+    #Salas en juego con dos jugadores, tokens de asiento y 0-4 movimientos
+    tables = []
+    for table_id in range(1, count + 1):
+        table = Table(table_id)
+        for player_id in (f'a{table_id}', f'b{table_id}'):
+            table.add_player(player_id, None)
+            token = secrets.token_hex(16)
+            table.tokens[player_id] = token
+            server.seats[token] = (table_id, player_id)
+        cells = rng.sample(range(9), rng.randint(0, 4))
+        for cell in cells:
+            table.make_move(cell, table.players[table.turn == 'O'])
+        tables.append(table)
+    server.game.restore_tables(tables)
+
+
+async def measure(snapshots, tables, rng, changed):
+    lags = []
+
+    async def ticker():
+        #Mide cuánto tarda el bucle en volver a atender una tarea que cede continuamente
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(0)
+            lags.append(loop.time() - start)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    results = []
+    start = time.perf_counter()
+    await snapshots.snapshot()
+    results.append(('completa', time.perf_counter() - start, max(lags)))
+    for table in rng.sample(tables, changed):
+        free = [i for i in range(9) if table.board.is_empty(i)]
+        table.make_move(free[0], table.players[table.turn == 'O'])
+    await asyncio.sleep(0)
+    lags.clear()
+    start = time.perf_counter()
+    await snapshots.snapshot()
+    results.append((f'incremental ({changed:,} cambios)', time.perf_counter() - start, max(lags)))
+    task.cancel()
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(1)
+    path = os.path.join(tempfile.mkdtemp(prefix='fotos-'), 'salas.bin')
+    try:
+        server = GameServer(snapshot_path=path)
+        start = time.perf_counter()
+        populate(server, count, rng)
+        print(f"salas: {count:,}  (creadas en {time.perf_counter() - start:.2f} s)")
+
+        tables = list(server.game.tables.values())
+        for name, elapsed, lag in asyncio.run(measure(server.snapshots, tables, rng, count // 100)):
+            print(f"foto {name}: {elapsed * 1000:.0f} ms  pausa máxima del bucle {lag * 1000:.1f} ms")
+        print(f"tamaño de la foto: {os.path.getsize(path) / 2 ** 20:.1f} MiB")
+
+        restored = GameServer(snapshot_path=path)
+        start = time.perf_counter()
+        restored_count = restored.restore_snapshot(path)
+        elapsed = time.perf_counter() - start
+        live = [table for table in tables if table.winner is None]
+        mismatches = len(live) - restored_count + \
+            sum(restored.game.get_table(table.id).game_board != table.game_board or
+                restored.game.get_table(table.id).turn != table.turn for table in live)
+        print(f"recuperación: {restored_count:,} salas en {elapsed:.2f} s  "
+              f"({restored_count / elapsed:,.0f} salas/s, discrepancias {mismatches}, "
+              f"asientos reservados {len(restored.seats):,})")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+        os.rmdir(os.path.dirname(path))
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Espectadores (WATCH_TABLE): latencia de los movimientos de los jugadores según
+crece el público de la sala, con el envío a espectadores por tandas y fuera
+del camino de los jugadores, frente a enviarlo dentro del mismo broadcast.
+Una parte de los espectadores es lenta y solo debe recibir el último tablero.
+Termina con código 1 si, con el envío por tandas, la p50 de los jugadores con
+el público más grande pasa de MAX_P50_RATIO veces la p50 sin espectadores.
+
+Las conexiones son simuladas en el propio proceso para medir solo el servidor.
+
+Uso: python benchmarks/bench_spectators.py [partidas por tamaño]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bench_quick_match import FakeSocket
+from outbox import SPECTATE
+from protocol import apply_move
+from server import GameServer
+
+SIZES = [0, 10, 100, 1000, 10000]
+DRAW = [0, 1, 2, 4, 3, 5, 7, 6, 8]  # Partida completa de 9 movimientos que acaba en empate
+SLOW_EVERY = 10  # Uno de cada SLOW_EVERY espectadores tarda en leer
+MAX_P50_RATIO = 5  # Veces que puede crecer la p50 de los jugadores entre 0 y SIZES[-1] espectadores
+
+
+class PlayerSocket(FakeSocket):
+    def __init__(self):
+        super().__init__()
+        self.table = None
+        self.boards = []  # Tableros recibidos: estados completos o el anterior con cada movimiento aplicado
+        self.changed = asyncio.Event()
+
+    async def send(self, message):
+        data = json.loads(message)
+        if 'table' in data:
+            self.table = data['table']
+        elif data['type'] == 'table_move':
+            self.table = apply_move(self.table, data)
+        else:
+            return
+        self.boards.append(self.table['board'])
+        self.changed.set()
+
+
+class SpectatorSocket(FakeSocket):
+    #Solo cuenta lo que recibe; los lentos tardan en cada lectura
+    def __init__(self, slow):
+        super().__init__()
+        self.slow = slow
+        self.frames = 0
+
+    async def send(self, message):
+        self.frames += 1
+        if self.slow:
+            await asyncio.sleep(0.05)
+
+
+async def run(spectators, games, inline):
+    server = GameServer(outbox_size=64)
+    if inline:
+        # Envío ingenuo: los espectadores reciben el estado dentro del broadcast de los jugadores
+        def broadcast_table_frame(table, kind):
+            frame = table.move_frame() if kind == 'table_move' else table.frame(kind)
+            for player_id in table.players:
+                server.send(table.player_sockets[player_id], frame)
+            frame = table.frame('table_state')
+            for websocket in table.spectators:
+                server.send(websocket, frame, SPECTATE)
+        server.broadcast_table_frame = broadcast_table_frame
+
+    players = [PlayerSocket(), PlayerSocket()]
+    audience = [SpectatorSocket(i % SLOW_EVERY == 0) for i in range(spectators)]
+    tasks = [asyncio.create_task(server.handle_client(socket, '/')) for socket in players + audience]
+    await asyncio.sleep(0)
+    latencies = []
+    for _ in range(games):
+        for socket in players:
+            await server.process_message(socket, json.dumps({'command': 'QUICK_MATCH'}))
+        table = server.game.get_table(server.clients[players[0]].table_id)
+        watch = json.dumps({'command': 'WATCH_TABLE', 'table_id': table.id})
+        for socket in audience:
+            await server.process_message(socket, watch)
+        await asyncio.sleep(0.01)
+        for turn, position in enumerate(DRAW):
+            mover, opponent = players[turn % 2], players[1 - turn % 2]
+            opponent.changed.clear()
+            start = time.perf_counter()
+            await server.process_message(mover, json.dumps({
+                'command': 'MAKE_MOVE', 'table_id': table.id, 'position': position
+            }))
+            # Hasta que el rival recibe el tablero con la jugada
+            while not (opponent.boards and opponent.boards[-1][position] != ' '):
+                opponent.changed.clear()
+                await opponent.changed.wait()
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.002)  # Tiempo de reflexión del siguiente jugador
+    while server.fanouts:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.2)
+    delivered = sum(socket.frames for socket in audience if not socket.slow)
+    delivered_slow = sum(socket.frames for socket in audience if socket.slow)
+    for socket in players + audience:
+        await socket.close()
+    await asyncio.gather(*tasks)
+    slow = len([socket for socket in audience if socket.slow])
+    return sorted(latencies), delivered / max(spectators - slow, 1), delivered_slow / max(slow, 1)
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    states = len(DRAW) + 1  # Estado al empezar a mirar y uno por movimiento
+    print(f"partidas por tamaño: {games}  ({states} estados por partida; 1 de cada {SLOW_EVERY} espectadores es lento)")
+    print(f"{'envío':<10} {'espectadores':>12} {'p50 ms':>8} {'p99 ms':>8} {'máx ms':>8} "
+          f"{'estados/esp.':>13} {'estados/lento':>14}")
+    p50s = {}
+    for inline in (False, True):
+        for size in SIZES:
+            sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+            try:
+                latencies, frames, slow_frames = asyncio.run(run(size, games, inline))
+            finally:
+                sys.stdout = stdout
+            p50 = p50s[inline, size] = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+            print(f"{'en línea' if inline else 'por tandas':<10} {size:>12,} {p50:>8.2f} {p99:>8.2f} "
+                  f"{latencies[-1] * 1000:>8.2f} {frames / games:>13.1f} {slow_frames / games:>14.1f}")
+    ratio = p50s[False, SIZES[-1]] / p50s[False, SIZES[0]]
+    print(f"p50 por tandas con {SIZES[-1]:,} espectadores: {ratio:.1f} veces la de {SIZES[0]:,}")
+    if ratio > MAX_P50_RATIO:
+        print(f"Supera el límite de {MAX_P50_RATIO} veces")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
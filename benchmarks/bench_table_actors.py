@@ -0,0 +1,110 @@
+"""
+Prueba de estrés de los buzones por sala: muchas partidas a la vez en las que
+los dos jugadores lanzan movimientos sin esperar su turno, mientras otras
+tareas piden el estado en JSON de las salas y del juego.
+
+Cada movimiento válido incluye una espera simulada (por ejemplo, guardar la
+jugada), que cede el bucle dentro de la orden. Se compara el buzón propio de
+cada sala con un único buzón compartido por todas, equivalente a serializar
+todas las órdenes con un lock global. Comprueba además que no hay
+interbloqueos (plazo máximo) y que cada partida terminada es coherente.
+
+Uso: python benchmarks/bench_table_actors.py [partidas] [espera por jugada en ms]
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from actor import Mailbox
+from bench_quick_match import FakeSocket
+from models.Board import BitBoard
+from server import GameServer
+
+TIMEOUT = 120  # Segundos; superarlo se considera un interbloqueo
+
+
+async def run(games, delay, shared):
+    server = GameServer()
+    make_move = server.handle_make_move
+
+    async def slow_make_move(websocket, table_id, position):
+        table = server.game.get_table(table_id)
+        if table and table.board.is_empty(position) and table.winner is None:
+            await asyncio.sleep(delay)  # Trabajo de la orden que cede el bucle
+        await make_move(websocket, table_id, position)
+
+    server.handle_make_move = slow_make_move
+    sockets = [FakeSocket() for _ in range(games * 2)]
+    clients = [asyncio.create_task(server.handle_client(socket, '/')) for socket in sockets]
+    await asyncio.sleep(0)
+    for socket in sockets:
+        await server.process_message(socket, json.dumps({'command': 'QUICK_MATCH'}))
+    tables = [server.game.get_table(server.clients[socket].table_id) for socket in sockets[::2]]
+    if shared:
+        mailbox = Mailbox()
+        for table in tables:
+            table.mailbox = mailbox
+
+    rng = random.Random(1)
+    moves = 0
+
+    async def player(socket, table):
+        #Envía jugadas al azar sin mirar el turno hasta que la partida termina
+        nonlocal moves
+        while table.winner is None:
+            free = [i for i, cell in enumerate(table.game_board) if cell == ' ']
+            command = {'command': 'MAKE_MOVE', 'table_id': table.id, 'position': rng.choice(free)}
+            await server.process_message(socket, json.dumps(command))
+            moves += 1
+
+    async def reader():
+        #Lecturas concurrentes del estado, que antes tomaban los mismos locks
+        while any(table.winner is None for table in tables[:50]):
+            server.game.to_json()
+            for table in rng.sample(tables, min(50, len(tables))):
+                table.to_json()
+            await asyncio.sleep(0.001)
+
+    start = time.perf_counter()
+    await asyncio.wait_for(asyncio.gather(
+        *(player(socket, table) for socket, table in zip(sockets, (t for t in tables for _ in (0, 1)))),
+        reader()
+    ), TIMEOUT)
+    elapsed = time.perf_counter() - start
+
+    # Rehacer cada partida en un tablero nuevo: las jugadas deben alternarse y dar el mismo resultado
+    inconsistent = 0
+    for table in tables:
+        board = BitBoard()
+        winner = None
+        for turn, (cell, symbol) in enumerate(table.moves):
+            winner = board.place(cell, symbol) if symbol == 'XO'[turn % 2] and winner is None else 'error'
+        inconsistent += winner != table.winner
+    for socket in sockets:
+        await socket.close()
+    await asyncio.gather(*clients)
+    return elapsed, moves, sum(len(table.moves) for table in tables), inconsistent
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    delay = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.001
+    print(f"partidas: {games:,}  espera por jugada: {delay * 1000:.1f} ms")
+    print(f"{'buzón':<22} {'s':>7} {'órdenes/s':>10} {'jugadas/s':>10} {'incoherentes':>13}")
+    for name, shared in (('uno por sala', False), ('global (un lock)', True)):
+        sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+        try:
+            elapsed, commands, valid, inconsistent = asyncio.run(run(games, delay, shared))
+        finally:
+            sys.stdout = stdout
+        print(f"{name:<22} {elapsed:>7.2f} {commands / elapsed:>10,.0f} {valid / elapsed:>10,.0f} {inconsistent:>13}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
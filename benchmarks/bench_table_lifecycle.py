@@ -0,0 +1,63 @@
+"""
+Benchmark del ciclo de vida de las salas: número de hilos y latencia del bucle
+de asyncio a medida que crece el número de salas activas.
+
+Uso: python benchmarks/bench_table_lifecycle.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.Game import Game
+
+SIZES = [10, 100, 1000, 10000]
+
+
+async def loop_lag(samples=50, interval=0.005):
+    #Mide el retraso medio y máximo del bucle respecto a un sleep programado
+    lags = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+    return sum(lags) / len(lags), max(lags)
+
+
+async def run(size):
+    game = Game()
+    loop = asyncio.get_running_loop()
+    game.subscribe(lambda event, table: event == 'finished' and loop.call_soon(game.remove_table, table.id))
+    # Sin el tope de 50 salas en espera: se llenan las salas a medida que se crean
+    tables = []
+    for i in range(size):
+        table = game.create_table()
+        table.add_player(f'a{i}', None)
+        table.add_player(f'b{i}', None)
+        tables.append(table)
+    threads = threading.active_count()
+    avg_lag, max_lag = await loop_lag()
+
+    # Terminar todas las partidas (X gana en la primera fila) y medir el desmontaje
+    start = time.perf_counter()
+    for i, table in enumerate(tables):
+        for position, player in ((0, 'a'), (3, 'b'), (1, 'a'), (4, 'b'), (2, 'a')):
+            table.make_move(position, f'{player}{i}')
+    await asyncio.sleep(0)
+    teardown = time.perf_counter() - start
+    return threads, avg_lag, max_lag, teardown, len(game.tables)
+
+
+def main():
+    print(f"{'salas':>8} {'hilos':>6} {'lag medio ms':>13} {'lag max ms':>11} {'cierre ms':>10} {'restantes':>10}")
+    for size in SIZES:
+        threads, avg_lag, max_lag, teardown, left = asyncio.run(run(size))
+        print(f"{size:>8} {threads:>6} {avg_lag * 1000:>13.3f} {max_lag * 1000:>11.3f} {teardown * 1000:>10.1f} {left:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Plazos de turno y de abandono: coste de armar, rearmar (cada movimiento) y
+vencer un plazo por sala con la rueda de temporizadores, frente a
+loop.call_later (un montículo, O(log n)) y a una tarea por sala.
+
+Después, el servidor completo con salas abandonadas: la mitad esperan rival
+y se cierran, la otra mitad están jugando y el jugador con el turno no
+mueve, así que pierde. Se mide cuánto tarda en liberarlo todo y la mayor
+pausa del bucle mientras tanto, y termina con código 1 si pasa de MAX_PAUSE.
+
+Uso: python benchmarks/bench_timers.py [salas]
+"""
+
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bench_quick_match import FakeSocket
+from server import GameServer
+from timers import TimingWheel
+
+SIZES = [1000, 10000, 100000]
+DELAY = 30.0  # Plazo armado en las pruebas de coste; no llega a vencer por tiempo
+MAX_PAUSE = 0.05  # Segundos que puede bloquearse el bucle mientras vencen las salas abandonadas
+
+
+def noop(*args):
+    pass
+
+
+async def sleeper(delay):
+    await asyncio.sleep(delay)
+
+
+class Wheel:
+    name = 'rueda'
+
+    def __init__(self):
+        self.wheel = TimingWheel()
+
+    def arm(self, n):
+        return [self.wheel.schedule(DELAY, noop, i) for i in range(n)]
+
+    def rearm(self, timers):
+        schedule = self.wheel.schedule
+        for i, timer in enumerate(timers):
+            timer.cancel()
+            timers[i] = schedule(DELAY, noop, i)
+
+    def expire(self, timers):
+        self.wheel.fire(self.wheel.advance(self.wheel.current + round(DELAY / self.wheel.tick) + 1))
+
+
+class CallLater:
+    name = 'call_later'
+
+    def arm(self, n):
+        loop = asyncio.get_running_loop()
+        return [loop.call_later(DELAY, noop, i) for i in range(n)]
+
+    def rearm(self, timers):
+        call_later = asyncio.get_running_loop().call_later
+        for i, timer in enumerate(timers):
+            timer.cancel()
+            timers[i] = call_later(DELAY, noop, i)
+
+    def expire(self, timers):
+        # Lo que hace el bucle al vencer: sacar del montículo cada plazo (y los cancelados que queden)
+        import heapq
+        heap = asyncio.get_running_loop()._scheduled
+        while heap:
+            handle = heapq.heappop(heap)
+            if not handle.cancelled():
+                handle._run()
+
+
+class TaskPerTable:
+    name = 'tarea por sala'
+
+    def arm(self, n):
+        loop = asyncio.get_running_loop()
+        return [loop.create_task(sleeper(DELAY)) for _ in range(n)]
+
+    def rearm(self, timers):
+        loop = asyncio.get_running_loop()
+        for i, task in enumerate(timers):
+            task.cancel()
+            timers[i] = loop.create_task(sleeper(DELAY))
+
+    def expire(self, timers):
+        for task in timers:
+            task.cancel()
+
+
+async def cost(kind, n):
+    #Microsegundos por plazo al armar, rearmar y vencer, y memoria por plazo armado
+    gc.collect()
+    start = time.perf_counter()
+    timers = kind.arm(n)
+    await asyncio.sleep(0)
+    arm = time.perf_counter() - start
+    start = time.perf_counter()
+    kind.rearm(timers)
+    await asyncio.sleep(0)
+    rearm = time.perf_counter() - start
+    start = time.perf_counter()
+    kind.expire(timers)
+    await asyncio.sleep(0)
+    expire = time.perf_counter() - start
+    # La memoria se mide aparte: tracemalloc ralentiza cada reserva
+    tracemalloc.start()
+    timers = type(kind)().arm(n)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    type(kind)().expire(timers)
+    await asyncio.sleep(0)
+    return arm / n * 1e6, rearm / n * 1e6, expire / n * 1e6, memory / n
+
+
+async def lag_probe(samples, stop):
+    #Registra el retraso del bucle cada milisegundo
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        samples.append(time.perf_counter() - start - 0.001)
+
+
+async def abandoned(tables):
+    #Salas a medias y partidas paradas: todas deben liberarse solas al vencer sus plazos
+    server = GameServer(turn_timeout=0.5, abandon_timeout=0.5)
+    server.timers.start()
+    sockets = [FakeSocket() for _ in range(tables + tables // 2 * 2)]
+    tasks = [asyncio.create_task(server.handle_client(socket, '/')) for socket in sockets]
+    await asyncio.sleep(0)
+    players = iter(sockets)
+    for i in range(tables):
+        table = server.game.create_table(waiting_limit=None)
+        for _ in range(1 if i % 2 == 0 else 2):
+            websocket = next(players)
+            client = server.clients[websocket]
+            table.add_player(client.player_id, websocket)
+            client.table_id = table.id
+    # Los plazos se arman todos juntos al final, para que venzan en el mismo tick
+    for table in list(server.game.tables.values()):
+        server.arm_deadline(table)
+    armed = len(server.timers)
+    # Las salas ya creadas no son basura: sin esto la pausa medida es la del GC de generación 2, no la de la rueda
+    gc.collect()
+    gc.freeze()
+    samples = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(lag_probe(samples, stop))
+    start = time.perf_counter() + 0.5
+    while server.game.tables:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    # Antes de cerrar las conexiones, que arman el plazo de gracia de sus sesiones: aquí solo quedan los de sala
+    left = len(server.timers)
+    stop.set()
+    await probe
+    forfeits = sum(1 for socket in sockets if 'game_end' in socket.received) // 2
+    closed = sum(1 for socket in sockets if 'error' in socket.received)
+    for socket in sockets:
+        await socket.close()
+    await asyncio.gather(*tasks)
+    gc.unfreeze()
+    server.timers.close()
+    return armed, elapsed, max(samples, default=0), forfeits, closed, left
+
+
+async def main():
+    tables = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{'plazos':<16}{'salas':>9}{'armar µs':>10}{'rearmar µs':>12}{'vencer µs':>11}{'bytes/plazo':>13}")
+    for kind in (Wheel, CallLater, TaskPerTable):
+        for n in SIZES:
+            arm, rearm, expire, memory = await cost(kind(), n)
+            print(f"{kind.name:<16}{n:>9,}{arm:>10.2f}{rearm:>12.2f}{expire:>11.2f}{memory:>13,.0f}")
+
+    armed, elapsed, lag, forfeits, closed, left = await abandoned(tables)
+    print(f"\n{tables:,} salas abandonadas ({armed:,} plazos en la rueda, 0.5 s):")
+    print(f"  liberadas {elapsed:.2f} s después de vencer, pausa máxima del bucle {lag * 1000:.1f} ms")
+    print(f"  {forfeits:,} partidas perdidas por tiempo, {closed:,} salas en espera cerradas, {left} plazos de sala restantes")
+    if lag > MAX_PAUSE:
+        print(f"La pausa máxima del bucle superó {MAX_PAUSE * 1000:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""
+Torneo sin servidor (src/tournament.py): partidas por segundo en total y por
+proceso con 1, 2, 4... procesos hasta el número de núcleos, para ver cómo
+escala el pool. Juegan random, perfect y heuristic entre sí en 3×3.
+
+Uso: python benchmarks/bench_tournament.py [partidas por pareja]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tournament import STRATEGIES, Tournament
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    cores = os.cpu_count()
+    counts = sorted({1, cores} | {2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores})
+    total = games * len(STRATEGIES) ** 2
+    print(f"{total:,} partidas por fila ({len(STRATEGIES)} estrategias, {cores} núcleos)")
+    print(f"{'procesos':>9}{'s':>8}{'partidas/s':>12}{'por proceso':>13}{'x':>6}")
+    base = None
+    for workers in counts:
+        tournament = Tournament(list(STRATEGIES), workers=workers, chunk=max(games // 10, 1))
+        start = time.perf_counter()
+        tournament.run(games)
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed
+        per_worker = sum(played / seconds for played, seconds in tournament.worker_stats.values()) / \
+            len(tournament.worker_stats)
+        base = base or rate
+        print(f"{workers:>9}{elapsed:>8.2f}{rate:>12,.0f}{per_worker:>13,.0f}{rate / base:>6.2f}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Compara el protocolo JSON con el binario: bytes por partida (en ambos sentidos)
+y tiempo de CPU del servidor por mensaje procesado.
+
+Uso: python benchmarks/bench_wire_protocol.py [partidas]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import websockets
+
+from protocol import BINARY, BINARY_SUBPROTOCOL, JSON, decode_message, encode_command
+from server import GameServer
+
+PORT = 8878
+MOVES = ((0, 0), (1, 3), (0, 1), (1, 4), (0, 2))  # (jugador, casilla): gana X
+
+
+class Counter:
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.bytes = 0
+
+    async def send(self, data, encoding):
+        message = encode_command(data, encoding)
+        self.bytes += len(message)
+        await self.websocket.send(message)
+
+    async def recv_type(self, kind, position=None):
+        while True:
+            message = await self.websocket.recv()
+            self.bytes += len(message)
+            data = decode_message(message)
+            if data['type'] == kind and (position is None or data['position'] == position):
+                return data
+
+
+async def play(encoding, games):
+    subprotocols = [BINARY_SUBPROTOCOL] if encoding == BINARY else None
+    players = [Counter(await websockets.connect(f'ws://127.0.0.1:{PORT}', subprotocols=subprotocols))
+               for _ in range(2)]
+    for _ in range(games):
+        await players[0].send({'command': 'CREATE_TABLE'}, encoding)
+        table_id = (await players[0].recv_type('table_joined'))['table']['id']
+        await players[1].send({'command': 'JOIN_TABLE', 'table_id': table_id}, encoding)
+        await players[1].recv_type('game_start')
+        for player, position in MOVES:
+            await players[player].send({'command': 'MAKE_MOVE', 'table_id': table_id, 'position': position},
+                                       encoding)
+            await players[player].recv_type('table_move', position)
+        for player in players:
+            await player.recv_type('game_end')
+    for player in players:
+        await player.websocket.close()
+    return sum(player.bytes for player in players)
+
+
+async def run(games):
+    server = GameServer(port=PORT)
+    stats = {'time': 0.0, 'messages': 0}
+    process_message = server.process_message
+
+    async def timed(websocket, message):
+        start = time.perf_counter()
+        await process_message(websocket, message)
+        stats['time'] += time.perf_counter() - start
+        stats['messages'] += 1
+
+    server.process_message = timed
+    task = asyncio.create_task(server.start())
+    await asyncio.sleep(0.2)
+    results = {}
+    for encoding in (JSON, BINARY):
+        stats['time'], stats['messages'] = 0.0, 0
+        total = await play(encoding, games)
+        results[encoding] = (total / games, stats['time'] / stats['messages'])
+    task.cancel()
+    return results
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+    results = asyncio.run(run(games))
+    sys.stdout = stdout
+    print(f"{'protocolo':>10} {'bytes/partida':>14} {'us CPU/mensaje':>15}")
+    for encoding, (game_bytes, cpu) in results.items():
+        print(f"{encoding:>10} {game_bytes:>14.0f} {cpu * 1e6:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
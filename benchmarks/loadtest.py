@@ -0,0 +1,214 @@
+"""
+Prueba de carga del servidor con bots sin interfaz.
+
+Arranca el servidor en un proceso aparte, reparte las parejas de bots entre
+varios procesos cliente y reporta en JSON: tiempo de conexión, latencia por
+comando (p50/p95/p99), partidas por segundo y RSS e hilos del servidor.
+
+Con --flood N se añaden N clientes abusivos que envían GET_TABLES y
+CREATE_TABLE sin parar; el informe dice si la p99 de MAKE_MOVE sigue por
+debajo de --slo-ms y cuántos comandos se rechazaron con busy. Con
+--admission el servidor arranca con control de admisión, para comparar.
+
+Uso: python benchmarks/loadtest.py --pairs 1000 --seconds 20 --output resultado.json
+     python benchmarks/loadtest.py --pairs 100 --flood 20 --admission --output inundacion.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+from bot import run_flood, run_pair
+from protocol import BINARY, JSON
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    pick = lambda p: values[min(len(values) - 1, int(len(values) * p))] * 1000
+    return {'count': len(values), 'p50_ms': pick(0.50), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99)}
+
+
+def client_process(url, encoding, pairs, floods, seconds, move_delay):
+    #Ejecuta un grupo de parejas de bots (y de clientes abusivos) y retorna sus mediciones en bruto
+    async def run():
+        deadline = time.perf_counter() + seconds
+        return await asyncio.gather(*(run_pair(url, encoding, deadline, move_delay) for _ in range(pairs)),
+                                    *(run_flood(url, encoding, deadline) for _ in range(floods)),
+                                    return_exceptions=True)
+
+    connect, latencies, games, errors, busy = [], {}, 0, {}, {}
+    flood = {'connections': floods, 'sent': 0, 'received': {}}
+    results = asyncio.run(run())
+    for result in results[:pairs]:
+        if isinstance(result, BaseException):
+            errors['connection'] = errors.get('connection', 0) + 1
+            continue
+        bots, played = result
+        games += played
+        for bot in bots:
+            connect.append(bot.connect_time)
+            for command, values in bot.latencies.items():
+                latencies.setdefault(command, []).extend(values)
+            for command, count in bot.errors.items():
+                errors[command] = errors.get(command, 0) + count
+            for command, count in bot.busy.items():
+                busy[command] = busy.get(command, 0) + count
+    for result in results[pairs:]:
+        if isinstance(result, BaseException):
+            continue
+        sent, received = result
+        flood['sent'] += sent
+        for kind, count in received.items():
+            flood['received'][kind] = flood['received'].get(kind, 0) + count
+    return connect, latencies, games, errors, busy, flood
+
+
+def process_stats(pid):
+    #RSS (KiB) e hilos del proceso y sus hijos (procesos del clúster) según /proc
+    stats = {'VmRSS': 0, 'Threads': 0}
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            pids += [int(child) for child in children.read().split()]
+    except OSError:
+        pass
+    for process in pids:
+        try:
+            with open(f'/proc/{process}/status') as status:
+                for line in status:
+                    key, _, value = line.partition(':')
+                    if key in stats:
+                        stats[key] += int(value.split()[0])
+        except OSError:
+            pass
+    return stats
+
+
+def port_in_use(host, port):
+    try:
+        socket.create_connection((host, port), 0.2).close()
+        return True
+    except OSError:
+        return False
+
+
+def wait_for_port(host, port, process, timeout=10):
+    #Espera a que el servidor acepte conexiones; falla si process terminó antes
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'El servidor terminó al arrancar (código {process.returncode})')
+        if port_in_use(host, port):
+            return
+        time.sleep(0.05)
+    raise RuntimeError('El servidor no arrancó a tiempo')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga del servidor de Tres en Raya')
+    parser.add_argument('--pairs', type=int, default=100, help='Parejas de bots (2 conexiones cada una)')
+    parser.add_argument('--procs', type=int, default=max(1, os.cpu_count() - 1), help='Procesos cliente')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--move-delay', type=float, default=0.0, help='Pausa entre movimientos')
+    parser.add_argument('--binary', action='store_true', help='Usar el protocolo binario')
+    parser.add_argument('--port', type=int, default=8879)
+    parser.add_argument('--workers', type=int, default=1, help='Procesos del servidor (src/cluster.py si es > 1)')
+    parser.add_argument('--flood', type=int, default=0, help='Clientes abusivos que inundan el servidor de consultas')
+    parser.add_argument('--slo-ms', type=float, default=50, help='p99 máxima de MAKE_MOVE, en milisegundos')
+    parser.add_argument('--admission', action='store_true', help='Servidor con control de admisión')
+    parser.add_argument('--output', help='Fichero JSON de salida (por defecto, stdout)')
+    args = parser.parse_args()
+
+    if port_in_use('127.0.0.1', args.port):
+        # Si no, los bots jugarían contra lo que haya quedado escuchando, por ejemplo un servidor anterior
+        sys.exit(f'El puerto {args.port} ya está en uso')
+    if args.workers > 1:
+        command = [sys.executable, os.path.join(SRC, 'cluster.py'), '--workers', str(args.workers)]
+    else:
+        command = [sys.executable, os.path.join(SRC, 'server.py')]
+    if args.admission:
+        command.append('--admission')
+    server = subprocess.Popen(command + ['--port', str(args.port)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port('127.0.0.1', args.port, server)
+        samples = []
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(0.5):
+                samples.append(process_stats(server.pid))
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        url = f'ws://127.0.0.1:{args.port}'
+        encoding = BINARY if args.binary else JSON
+        procs = min(args.procs, args.pairs)
+        groups = [args.pairs // procs + (i < args.pairs % procs) for i in range(procs)]
+        floods = [args.flood // procs + (i < args.flood % procs) for i in range(procs)]
+        start = time.perf_counter()
+        with multiprocessing.Pool(procs) as pool:
+            results = pool.starmap(client_process, [(url, encoding, pairs, flood, args.seconds, args.move_delay)
+                                                    for pairs, flood in zip(groups, floods)])
+        elapsed = time.perf_counter() - start
+        done.set()
+    finally:
+        server.terminate()
+        server.wait()
+
+    connect, latencies, games, errors, busy = [], {}, 0, {}, {}
+    flood = {'connections': 0, 'sent': 0, 'received': {}}
+    for group_connect, group_latencies, group_games, group_errors, group_busy, group_flood in results:
+        connect.extend(group_connect)
+        games += group_games
+        for command, count in group_errors.items():
+            errors[command] = errors.get(command, 0) + count
+        for command, count in group_busy.items():
+            busy[command] = busy.get(command, 0) + count
+        for command, values in group_latencies.items():
+            latencies.setdefault(command, []).extend(values)
+        flood['connections'] += group_flood['connections']
+        flood['sent'] += group_flood['sent']
+        for kind, count in group_flood['received'].items():
+            flood['received'][kind] = flood['received'].get(kind, 0) + count
+    commands = {command: percentiles(values) for command, values in sorted(latencies.items())}
+    moves = commands.get('MAKE_MOVE', {})
+    report = {
+        'config': vars(args),
+        'connections': len(connect),
+        'errors': errors,
+        'busy': busy,
+        'connect': percentiles(connect),
+        'commands': commands,
+        'slo': {'command': 'MAKE_MOVE', 'p99_ms_max': args.slo_ms,
+                'met': bool(moves) and moves['p99_ms'] <= args.slo_ms},
+        'flood': flood,
+        'games': games,
+        'games_per_second': games / elapsed,
+        'server': {
+            'max_rss_kib': max((s.get('VmRSS', 0) for s in samples), default=None),
+            'max_threads': max((s.get('Threads', 0) for s in samples), default=None)
+        }
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Buzón de órdenes por sala, al estilo de un actor.
+
+Las órdenes de una sala (unirse, mover, salir...) se ejecutan de una en una y
+en orden de llegada; las de salas distintas no se esperan entre sí. Todo
+ocurre en el bucle de asyncio, sin locks de threading: mientras una orden
+espera (por ejemplo, a la jugada del bot), las demás salas siguen avanzando.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+from metrics import MAILBOX_WAIT
+
+class Mailbox:
+    __slots__ = ('queue', 'task')
+
+    def __init__(self):
+        self.queue = None  # [(handler, args, futuro, instante de llegada)]; se crea al primer choque
+        self.task = None  # Tarea que está ejecutando órdenes de este buzón, o None si está libre
+
+    async def submit(self, handler, *args):
+        #Ejecuta await handler(*args) en turno y retorna su resultado
+        current = asyncio.current_task()
+        if self.task is current:
+            # Orden anidada desde el propio buzón: esperar a la cola sería un interbloqueo
+            return await handler(*args)
+        if self.task is None:
+            # Buzón libre: la orden se ejecuta en la tarea que la envía, sin crear otra
+            self.task = current
+            MAILBOX_WAIT.observe(0.0)
+            try:
+                return await handler(*args)
+            finally:
+                self.task = None
+                if self.queue:
+                    self.task = asyncio.get_running_loop().create_task(self.run())
+        future = asyncio.get_running_loop().create_future()
+        if self.queue is None:
+            self.queue = deque()
+        self.queue.append((handler, args, future, time.perf_counter()))
+        return await future
+
+    async def run(self):
+        #Vacía las órdenes que llegaron mientras el buzón estaba ocupado
+        try:
+            while self.queue:
+                handler, args, future, queued = self.queue.popleft()
+                if future.cancelled():
+                    continue
+                MAILBOX_WAIT.observe(time.perf_counter() - queued)
+                try:
+                    result = await handler(*args)
+                except Exception as e:
+                    if not future.cancelled():
+                        future.set_exception(e)
+                except BaseException:
+                    future.cancel()  # Por ejemplo CancelledError: la tarea termina aquí
+                    raise
+                else:
+                    if not future.cancelled():
+                        future.set_result(result)
+        finally:
+            self.task = None
+            # Si la tarea terminó antes de vaciar la cola, quien espera esas órdenes no puede quedarse colgado
+            while self.queue:
+                self.queue.popleft()[2].cancel()
\ No newline at end of file
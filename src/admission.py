@@ -0,0 +1,93 @@
+"""
+Control de admisión: límites por conexión, tope de conexiones y descarte de
+trabajo cuando el servidor va atrasado.
+
+Cada comando pertenece a una clase (ver COMMAND_CLASSES) con su propio cubo
+de fichas por conexión; RATE_LIMITS fija las órdenes por segundo y la ráfaga
+de cada clase. El cubo se guarda como el instante en que volvería a estar
+lleno, un float por clase en la sesión, así que comprobarlo es O(1) y una
+conexión que no envía nada no tiene cubo.
+
+El retraso del bucle de asyncio se mide con un sleep periódico: lo que tarda
+de más en despertar es lo que espera cualquier mensaje recibido. Con el bucle
+atrasado se rechazan primero las consultas del lobby, luego las órdenes que
+crean salas y por último las conexiones nuevas. Las órdenes de partida
+(MAKE_MOVE, JOIN_TABLE...) nunca se descartan por carga, solo por su límite.
+"""
+
+import asyncio
+import time
+
+CLASSES = ('game', 'match', 'lobby')
+GAME, MATCH, LOBBY = range(len(CLASSES))
+COMMAND_CLASSES = {
+    'MAKE_MOVE': GAME,
+    'JOIN_TABLE': GAME,
+    'RESUME_SEAT': GAME,
+    'CANCEL_MATCH': GAME,
+    'UNWATCH_TABLE': GAME,
+    'UNSUBSCRIBE_LOBBY': GAME,
+    'CREATE_TABLE': MATCH,
+    'QUICK_MATCH': MATCH,
+    'PLAY_VS_BOT': MATCH,
+    'GET_TABLES': LOBBY,
+    'SUBSCRIBE_LOBBY': LOBBY,
+    'WATCH_TABLE': LOBBY
+}  # Los comandos desconocidos cuentan como LOBBY
+
+RATE_LIMITS = {'game': (20, 40), 'match': (5, 10), 'lobby': (5, 5)}  # {clase: (órdenes por segundo, ráfaga)}
+# {clase: segundos de retraso del bucle a partir de los que se rechaza}; 'connect' es para las conexiones nuevas
+SHED_LAG = {'lobby': 0.02, 'match': 0.05, 'connect': 0.25}
+LAG_INTERVAL = 0.02  # Segundos entre mediciones del retraso
+LAG_DECAY = 0.5  # Parte del retraso anterior que se conserva en cada medición: sube al momento y baja poco a poco
+
+class Admission:
+    def __init__(self, limits=RATE_LIMITS, shed_lag=SHED_LAG, interval=LAG_INTERVAL):
+        self.limits = [limits[name] for name in CLASSES] if limits else None  # Sin límites por conexión si None
+        self.shed_lag = [shed_lag.get(name) for name in CLASSES] if shed_lag else None  # Sin descartes si None
+        self.connect_lag = shed_lag.get('connect') if shed_lag else None
+        self.interval = interval
+        self.lag = 0.0  # Retraso reciente del bucle, en segundos
+        self.task = None
+
+    def check(self, client, command):
+        #Retorna None si se admite el comando, o (motivo, segundos hasta poder reintentar) si se rechaza
+        index = COMMAND_CLASSES.get(command, LOBBY)
+        if self.shed_lag:
+            threshold = self.shed_lag[index]
+            if threshold is not None and self.lag >= threshold:
+                return 'overload', max(self.lag, self.interval)
+        if self.limits:
+            rate, burst = self.limits[index]
+            now = time.monotonic()
+            if client.limits is None:
+                client.limits = [0.0] * len(CLASSES)
+            # Cubo de fichas: full_at - now es lo que falta para rellenarlo, a rate fichas por segundo
+            full_at = max(client.limits[index], now) + 1 / rate
+            wait = full_at - now - burst / rate
+            if wait > 0:
+                return 'rate', wait
+            client.limits[index] = full_at
+        return None
+
+    def accepting(self):
+        #Si se aceptan conexiones nuevas con el retraso actual
+        return self.connect_lag is None or self.lag < self.connect_lag
+
+    async def run(self):
+        #Mide el retraso del bucle: lo que tarda de más en volver un sleep de interval segundos
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - start - self.interval
+            self.lag = max(lag, self.lag * LAG_DECAY)
+
+    def start(self):
+        if self.shed_lag:
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def close(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+Evaluación vectorizada de muchos tableros a la vez con NumPy, para analizar
+partidas grabadas y comprobar en bloque los resultados de Table.
+
+Los tableros se aceptan como matrices N×9 int8 (0 vacía, 1 X, 2 O) o ya
+empaquetados como dos vectores de máscaras de 9 bits (x, o).
+"""
+
+import numpy as np
+
+from models.Board import FULL_MASK, WINNING
+
+ONGOING, X_WINS, O_WINS, DRAW = 0, 1, 2, 3
+RESULTS = (None, 'X', 'O', 'Draw')  # Código de resultado -> Table.winner
+PHASES = ('opening', 'middlegame', 'endgame', 'finished')
+
+WIN_TABLE = np.array(WINNING, dtype=bool)
+POPCOUNT = np.array([bin(m).count('1') for m in range(1 << 9)], dtype=np.int8)
+BITS = (1 << np.arange(9)).astype(np.uint16)
+CELL_SYMBOLS = {' ': 0, 'X': 1, 'O': 2}
+
+
+def pack(boards):
+    #Matriz N×9 (0/1/2) -> máscaras (x, o) como uint16
+    boards = np.asarray(boards, dtype=np.int8)
+    x = (boards == 1).astype(np.uint16) @ BITS
+    o = (boards == 2).astype(np.uint16) @ BITS
+    return x, o
+
+
+def unpack(x, o):
+    #Máscaras (x, o) -> matriz N×9 int8
+    cells = (np.asarray(x, dtype=np.uint16)[:, None] & BITS) != 0
+    return np.where(cells, 1, np.where((np.asarray(o, dtype=np.uint16)[:, None] & BITS) != 0, 2, 0)).astype(np.int8)
+
+
+def from_cells(cell_lists):
+    #Listas de casillas ' '/'X'/'O' (como Table.game_board) -> matriz N×9 int8
+    return np.array([[CELL_SYMBOLS[cell] for cell in cells] for cells in cell_lists], dtype=np.int8)
+
+
+def as_masks(boards=None, x=None, o=None):
+    if boards is not None:
+        return pack(boards)
+    return np.asarray(x, dtype=np.uint16), np.asarray(o, dtype=np.uint16)
+
+
+def evaluate(boards=None, x=None, o=None):
+    #Resultado por tablero: ONGOING, X_WINS, O_WINS o DRAW (int8)
+    x, o = as_masks(boards, x, o)
+    result = np.full(x.shape, ONGOING, dtype=np.int8)
+    result[(x | o) == FULL_MASK] = DRAW
+    result[WIN_TABLE[o]] = O_WINS
+    result[WIN_TABLE[x]] = X_WINS
+    return result
+
+
+def legal_moves(boards=None, x=None, o=None):
+    #Matriz N×9 de casillas jugables (ninguna si la partida terminó)
+    x, o = as_masks(boards, x, o)
+    empty = ((x | o)[:, None] & BITS) == 0
+    return empty & (evaluate(x=x, o=o) == ONGOING)[:, None]
+
+
+def phases(boards=None, x=None, o=None):
+    #Índice en PHASES por tablero: apertura (0-2 fichas), medio juego (3-5), final (6+) o terminada
+    x, o = as_masks(boards, x, o)
+    pieces = POPCOUNT[x | o]
+    phase = np.where(pieces <= 2, 0, np.where(pieces <= 5, 1, 2)).astype(np.int8)
+    phase[evaluate(x=x, o=o) != ONGOING] = 3
+    return phase
+
+
+def check_results(boards, winners):
+    #Índices de los tableros cuyo ganador reportado (como Table.winner) no coincide con la evaluación
+    expected = evaluate(boards)
+    reported = np.array([RESULTS.index(winner) for winner in winners], dtype=np.int8)
+    return np.flatnonzero(expected != reported)
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""
+Cliente sin interfaz gráfica que juega partidas completas contra el servidor
+usando los mismos comandos que el cliente Tk. Lo usan las pruebas de carga.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from urllib.parse import urlencode
+
+import websockets
+
+from protocol import BINARY, BINARY_SUBPROTOCOL, JSON, apply_move, decode_message, encode_command
+
+class BotClient:
+    def __init__(self, url='ws://127.0.0.1:8765', encoding=JSON):
+        self.url = url
+        self.encoding = encoding
+        self.websocket = None
+        self.connect_time = None  # Segundos que tardó el handshake
+        self.latencies = {}  # {comando: [segundos]}
+        self.errors = {}  # {comando: respuestas de error}
+        self.busy = {}  # {comando: rechazos busy, reintentados tras la espera que indica el servidor}
+        self.table = None  # Último estado de sala recibido
+        self.session = None  # Token de sesión recibido al conectar
+        self.last_seq = 0  # Último mensaje de la sesión recibido
+        self.resumed = None  # Si la última conexión reanudó la sesión
+
+    async def connect(self, resume=False):
+        #Con resume, reanuda la sesión anterior: el servidor repite los mensajes posteriores a last_seq
+        start = time.perf_counter()
+        url = self.url
+        if resume and self.session:
+            url = f"{url.rstrip('/')}/?{urlencode({'session': self.session, 'seq': self.last_seq})}"
+        self.websocket = await websockets.connect(
+            url,
+            subprotocols=[BINARY_SUBPROTOCOL] if self.encoding == BINARY else None,
+            open_timeout=60
+        )
+        self.connect_time = time.perf_counter() - start
+
+    async def recv(self, accept):
+        #Lee mensajes hasta que uno cumple accept(data); guarda el último estado de sala
+        while True:
+            data = decode_message(await self.websocket.recv())
+            seq = data.get('session_seq')
+            if seq is not None:
+                if seq <= self.last_seq:
+                    continue
+                self.last_seq = seq
+            if data['type'] == 'session':
+                self.session = data['session']
+                self.resumed = data['resumed']
+                if not self.resumed:
+                    self.last_seq = 0
+            if 'table' in data and 'board' in data['table']:
+                self.table = data['table']
+            elif data['type'] == 'table_move' and self.table and self.table['id'] == data['table_id']:
+                self.table = data['table'] = apply_move(self.table, data)  # Estado completo, para accept
+            if data['type'] in ('error', 'busy') or accept(data):
+                return data
+
+    async def command(self, data, accept):
+        #Envía un comando y mide el tiempo hasta su respuesta, contando los reintentos si el servidor está ocupado
+        start = time.perf_counter()
+        while True:
+            await self.websocket.send(encode_command(data, self.encoding))
+            response = await self.recv(accept)
+            if response['type'] != 'busy':
+                break
+            self.busy[data['command']] = self.busy.get(data['command'], 0) + 1
+            await asyncio.sleep(response['retry_after'])
+        self.latencies.setdefault(data['command'], []).append(time.perf_counter() - start)
+        if response['type'] == 'error':
+            self.errors[data['command']] = self.errors.get(data['command'], 0) + 1
+        return response
+
+    async def create_table(self, size=None, win=None):
+        #Sin size, tablero clásico de 3×3
+        data = {'command': 'CREATE_TABLE'}
+        if size is not None:
+            data['size'] = size
+            if win is not None:
+                data['win'] = win
+        response = await self.command(data, lambda d: d['type'] == 'table_joined')
+        return response['table']['id'] if response['type'] != 'error' else None
+
+    async def join_table(self, table_id):
+        response = await self.command({'command': 'JOIN_TABLE', 'table_id': table_id},
+                                      lambda d: d['type'] == 'table_joined')
+        return response['type'] != 'error'
+
+    async def make_move(self, table_id, position):
+        return await self.command({'command': 'MAKE_MOVE', 'table_id': table_id, 'position': position},
+                                  lambda d: d['type'] == 'table_move' and d['position'] == position)
+
+    async def play_vs_bot(self, difficulty='hard'):
+        response = await self.command({'command': 'PLAY_VS_BOT', 'difficulty': difficulty},
+                                      lambda d: d['type'] == 'game_start')
+        return response['table']['id'] if response['type'] != 'error' else None
+
+    async def quick_match(self, bucket=0):
+        response = await self.command({'command': 'QUICK_MATCH', 'bucket': bucket},
+                                      lambda d: d['type'] == 'game_start')
+        return response['table']['id'] if response['type'] != 'error' else None
+
+    async def get_tables(self, status=None, cursor=None, limit=None):
+        #Sin argumentos pide la lista completa; con limit, una página a partir de cursor
+        data = {'command': 'GET_TABLES'}
+        if limit is not None:
+            data.update(status=status, cursor=cursor, limit=limit)
+        return await self.command(data, lambda d: d['type'] == 'tables')
+
+    async def close(self):
+        if self.websocket:
+            await self.websocket.close()
+
+
+async def play_game(first, second, move_delay=0.0, rng=random, size=None, win=None):
+    #Juega una partida entre dos bots con movimientos al azar; retorna el ganador o None si falló
+    table_id = await first.create_table(size, win)
+    if table_id is None or not await second.join_table(table_id):
+        return None
+    await first.get_tables(limit=50)
+    board = second.table['board']
+    players = (first, second)
+    turn = 0
+    while True:
+        if move_delay:
+            await asyncio.sleep(move_delay)
+        position = rng.choice([i for i, cell in enumerate(board) if cell == ' '])
+        response = await players[turn].make_move(table_id, position)
+        if response['type'] == 'error':
+            return None
+        board = response['table']['board']
+        if response['table']['winner']:
+            # El rival recibe el resultado por su lado
+            await players[1 - turn].recv(lambda d: d['type'] == 'game_end')
+            return response['table']['winner']
+        # El rival debe ver el movimiento antes de jugar
+        await players[1 - turn].recv(lambda d: d['type'] == 'table_move' and d['table']['board'] == board)
+        turn = 1 - turn
+
+
+async def run_pair(url, encoding, deadline, move_delay, games=None):
+    #Conecta dos bots y juega partidas hasta el plazo (o hasta games); retorna los bots y las partidas jugadas
+    bots = [BotClient(url, encoding), BotClient(url, encoding)]
+    for bot in bots:
+        await bot.connect()
+    played = 0
+    rng = random.Random()
+    while time.perf_counter() < deadline and (games is None or played < games):
+        if await play_game(bots[0], bots[1], move_delay, rng) is None:
+            # Por ejemplo, el servidor ya tiene 50 salas en espera: reintentar más tarde
+            await asyncio.sleep(rng.uniform(0.05, 0.2))
+            continue
+        played += 1
+    for bot in bots:
+        await bot.close()
+    return bots, played
+
+
+async def run_flood(url, encoding, deadline, commands=('GET_TABLES', 'CREATE_TABLE')):
+    #Cliente abusivo: envía commands en bucle sin esperar respuesta hasta el plazo; retorna (enviados, {tipo: recibidos})
+    bot = BotClient(url, encoding)
+    await bot.connect()
+    received = {}
+
+    async def read():
+        async for message in bot.websocket:
+            kind = decode_message(message)['type']
+            received[kind] = received.get(kind, 0) + 1
+
+    reader = asyncio.create_task(read())
+    messages = [encode_command({'command': command}, encoding) for command in commands]
+    sent = 0
+    try:
+        while time.perf_counter() < deadline and not reader.done():
+            await bot.websocket.send(messages[sent % len(messages)])
+            sent += 1
+            await asyncio.sleep(0)  # Sin ceder, las parejas de bots del mismo proceso no avanzarían
+    except websockets.exceptions.ConnectionClosed:
+        pass  # Por ejemplo, el servidor lo desconectó por no leer lo que recibe
+    await bot.close()
+    await asyncio.gather(reader, return_exceptions=True)
+    return sent, received
+
+
+async def main(args):
+    deadline = time.perf_counter() + args.seconds
+    results = await asyncio.gather(*(
+        run_pair(args.url, BINARY if args.binary else JSON, deadline, args.move_delay, args.games)
+        for _ in range(args.pairs)
+    ))
+    print(f"Partidas jugadas: {sum(played for _, played in results)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bots que juegan contra el servidor')
+    parser.add_argument('--url', default='ws://127.0.0.1:8765')
+    parser.add_argument('--pairs', type=int, default=1)
+    parser.add_argument('--games', type=int, default=None)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--move-delay', type=float, default=0.0)
+    parser.add_argument('--binary', action='store_true')
+    asyncio.run(main(parser.parse_args()))
\ No newline at end of file
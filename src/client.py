@@ -1,17 +1,35 @@
 """
 Cliente del juego Tres en Raya con interfaz gráfica.
+
+La red corre en un hilo con su propio bucle de asyncio y deja los mensajes en
+una cola; en cuanto llega uno despierta al bucle de Tk con un evento virtual
+(<<ServerMessage>>), sin sondear la cola periódicamente. Al pintar solo se
+tocan las casillas, etiquetas y filas del lobby que cambiaron. Tras cada
+movimiento llega solo el delta (table_move), que se aplica al último estado
+recibido en el hilo de red.
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox
 import asyncio
 import websockets
-import json
 import threading
 import queue
+import sys
+import time
+import random
+from collections import deque
+from urllib.parse import urlencode
+from protocol import BINARY_SUBPROTOCOL, BINARY, JSON, apply_move, encode_command, decode_message
+
+PAGE_SIZE = 50  # Salas que se piden cada vez que la lista llega al final
+LATENCY_SAMPLES = 1000  # Latencias entrada-pantalla que se conservan
+RECONNECT_BASE = 0.5  # Espera máxima (s) antes del primer reintento; se duplica en cada fallo
+RECONNECT_MAX = 30.0
+BOARD_CHOICES = {'3×3, 3 en raya': (3, 3), '5×5, 4 en raya': (5, 4), '15×15, 5 en raya': (15, 5)}
 
 class GameClient:
-    def __init__(self):
+    def __init__(self, binary=False, url='ws://127.0.0.1:8765', show_latency=False):
         self.root = tk.Tk()
         self.root.title("Tres en Raya")
         self.root.geometry("800x600")
@@ -23,7 +41,30 @@ class GameClient:
         
         self.websocket = None
         self.current_table = None
+        self.watching = None  # Sala que se sigue como espectador: su tablero no admite jugadas
+        self.table_state = None  # Último estado de la sala (hilo de red), al que se aplican los deltas
+        self.board_size = None  # Lado del tablero dibujado
         self.message_queue = queue.Queue()
+        self.wake_pending = False  # Ya hay un <<ServerMessage>> en camino; no hace falta otro
+        self.tk_running = False  # El bucle de Tk ya atiende eventos (antes no se le puede despertar)
+        self.url = url
+        self.binary = binary  # Negociar el protocolo binario en lugar de JSON
+        self.encoding = JSON
+        self.lobby_tables = {}  # {table_id: info} mantenido con los eventos del lobby
+        self.lobby_seq = None  # Último número de secuencia aplicado
+        self.lobby_cursor = 0  # Cursor de la siguiente página; None cuando ya se cargaron todas
+        self.lobby_loading = False  # Hay una página pedida y aún no recibida
+        self.seat_token = None  # Token para recuperar el asiento (RESUME_SEAT) si el servidor se reinicia
+        self.session = None  # Token de sesión, para reanudarla al reconectar
+        self.last_seq = 0  # Número del último mensaje de la sesión recibido
+        self.lobby_stale = False  # La lista de salas dejó de actualizarse durante una reconexión
+        self.screen = None  # Pantalla visible ('lobby' o 'game')
+        self.board_view = []  # (texto, estado) pintado en cada casilla
+        self.labels_view = {}  # {etiqueta: texto pintado}
+        self.lobby_rows = {}  # {iid: valores pintados en la fila}
+        self.pending_input = None  # (casilla, instante del clic) del último movimiento aún sin pintar
+        self.render_latencies = deque(maxlen=LATENCY_SAMPLES)  # Segundos desde el clic hasta verlo en pantalla
+        self.show_latency = show_latency  # Imprimir el resumen de latencias al terminar cada partida
         
         # Iniciar el bucle de eventos de asyncio en un hilo separado
         self.loop = asyncio.new_event_loop()
@@ -39,8 +80,10 @@ class GameClient:
         # Mostrar el home inicialmente
         self.show_lobby()
         
+        self.root.bind('<<ServerMessage>>', lambda event: self.process_messages())
         self.connect_to_server()
-        self.root.after(100, self.process_messages)
+        # Primera pasada en cuanto arranque el bucle de Tk: recoge lo que llegó antes
+        self.root.after_idle(self.start_processing)
         
     def setup_lobby(self):
         """Configura la interfaz del home"""
@@ -65,18 +108,20 @@ class GameClient:
         tables_frame.pack(pady=10, padx=20, fill='x', expand=True)
 
         
-        self.tables_tree = ttk.Treeview(tables_frame, columns=("id", "status", "players"), show="headings", height=6, style='Modern.Treeview')
+        self.tables_tree = ttk.Treeview(tables_frame, columns=("id", "status", "players", "board"), show="headings", height=6, style='Modern.Treeview')
         self.tables_tree.heading("id", text="ID")
         self.tables_tree.heading("status", text="Estado")
         self.tables_tree.heading("players", text="Jugadores")
+        self.tables_tree.heading("board", text="Tablero")
         self.tables_tree.column("id", width=60, anchor="center")
         self.tables_tree.column("status", width=120, anchor="center")
         self.tables_tree.column("players", width=120, anchor="center")
+        self.tables_tree.column("board", width=140, anchor="center")
         self.tables_tree.pack(side='left', fill='both', expand=True)
 
         
         scrollbar = ttk.Scrollbar(tables_frame, orient="vertical", command=self.tables_tree.yview)
-        self.tables_tree.configure(yscrollcommand=scrollbar.set)
+        self.tables_tree.configure(yscrollcommand=lambda first, last: self.on_tables_scroll(scrollbar, first, last))
         scrollbar.pack(side='right', fill='y')
 
         
@@ -110,6 +155,39 @@ class GameClient:
         )
         self.refresh_btn.grid(row=0, column=2, padx=10, ipadx=10, ipady=5)
 
+        self.bot_btn = tk.Button(
+            control_frame, text="Jugar vs Bot",
+            font=('Helvetica', 12, 'bold'),
+            bg='#2A8682', fg='white', activebackground='#e8f0f7', activeforeground='#2A8682',
+            relief='solid', bd=0, highlightthickness=0, cursor='hand2',
+            command=self.play_vs_bot
+        )
+        self.bot_btn.grid(row=0, column=3, padx=10, ipadx=10, ipady=5)
+
+        self.quick_match_btn = tk.Button(
+            control_frame, text="Partida Rápida",
+            font=('Helvetica', 12, 'bold'),
+            bg='#2A8682', fg='white', activebackground='#e8f0f7', activeforeground='#2A8682',
+            relief='solid', bd=0, highlightthickness=0, cursor='hand2',
+            command=self.quick_match
+        )
+        self.quick_match_btn.grid(row=0, column=4, padx=10, ipadx=10, ipady=5)
+
+        self.watch_btn = tk.Button(
+            control_frame, text="Observar Sala",
+            font=('Helvetica', 12, 'bold'),
+            bg='#2A8682', fg='white', activebackground='#e8f0f7', activeforeground='#2A8682',
+            relief='solid', bd=0, highlightthickness=0, cursor='hand2',
+            command=self.watch_selected_table
+        )
+        self.watch_btn.grid(row=1, column=0, columnspan=2, pady=(10, 0), ipadx=10, ipady=5)
+
+        # Tablero de las salas que se crean
+        self.board_choice = tk.StringVar(value=next(iter(BOARD_CHOICES)))
+        board_menu = ttk.Combobox(control_frame, textvariable=self.board_choice, values=list(BOARD_CHOICES),
+                                  state='readonly', width=16, font=('Helvetica', 12))
+        board_menu.grid(row=1, column=2, columnspan=3, pady=(10, 0))
+
         
         self.status_label = ttk.Label(
             self.lobby_frame,
@@ -143,30 +221,10 @@ class GameClient:
         self.table_info_label.pack(pady=(40, 10))
 
         # Tablero
-        board_frame = tk.Frame(self.game_frame, bg='white')
-        board_frame.pack(pady=10)
-
+        self.board_frame = tk.Frame(self.game_frame, bg='white')
+        self.board_frame.pack(pady=10)
         self.board_buttons = []
-        for i in range(3):
-            for j in range(3):
-                btn = tk.Button(
-                    board_frame,
-                    text="",
-                    width=5,
-                    height=2,
-                    font=('Helvetica', 32, 'bold'),
-                    bg='#e8f0f7',
-                    fg='#222',
-                    activebackground='#b5d0e6',
-                    relief='flat',
-                    bd=0,
-                    highlightthickness=0,
-                    cursor='hand2',
-                    command=lambda x=i*3+j: self.make_move(x)
-                )
-                btn.grid(row=i, column=j, padx=10, pady=10, ipadx=10, ipady=10)
-                btn.configure(overrelief='ridge')
-                self.board_buttons.append(btn)
+        self.setup_board(3)
 
         # Estado del juego
         self.game_status_label = ttk.Label(
@@ -200,156 +258,392 @@ class GameClient:
         self.game_frame.pack_propagate(False)
         self.game_frame.pack(fill='both', expand=True)
     
+    def setup_board(self, size):
+        #Dibuja un tablero de size×size; las casillas se achican para que quepa en la ventana
+        for btn in self.board_buttons:
+            btn.destroy()
+        self.board_buttons = []
+        self.board_view = [None] * (size * size)
+        self.board_size = size
+        small = size > 3
+        for i in range(size):
+            for j in range(size):
+                btn = tk.Button(
+                    self.board_frame,
+                    text="",
+                    width=2 if small else 5,
+                    height=1 if small else 2,
+                    font=('Helvetica', 10 if small else 32, 'bold'),
+                    bg='#e8f0f7',
+                    fg='#222',
+                    activebackground='#b5d0e6',
+                    relief='flat',
+                    bd=0,
+                    highlightthickness=0,
+                    cursor='hand2',
+                    command=lambda x=i*size+j: self.make_move(x)
+                )
+                pad = 1 if small else 10
+                btn.grid(row=i, column=j, padx=pad, pady=pad, ipadx=pad, ipady=pad)
+                btn.configure(overrelief='ridge')
+                self.board_buttons.append(btn)
+
     def connect_to_server(self):
-        #Conecta al servidor WebSocket
-        async def connect():
+        #Conecta al servidor WebSocket y mantiene la conexión
+        asyncio.run_coroutine_threadsafe(self.connection_loop(), self.loop)
+
+    async def connection_loop(self):
+        #Si la conexión se cae, reconecta con espera exponencial y aleatoria (para que tras una caída del
+        #servidor los clientes no vuelvan todos a la vez) y reanuda la sesión
+        attempt = 0
+        while True:
             try:
-                self.websocket = await websockets.connect('ws://127.0.0.1:8765')
-                self.message_queue.put(('status', 'Conectado al servidor'))
-                await self.refresh_tables_async()
-                
-                # Iniciar el bucle de recepción de mensajes
-                while True:
-                    try:
-                        message = await self.websocket.recv()
-                        data = json.loads(message)
-                        print(f"Mensaje recibido: {data}")  
-                        
-                        if data.get('type') == 'error':
-                            self.message_queue.put(('error', data['message']))
-                        elif data.get('type') == 'table_joined':
-                            self.message_queue.put(('game_state', data['table']))
-                        elif data.get('type') == 'tables':
-                            self.message_queue.put(('tables', data['tables']))
-                        elif data.get('type') == 'table_state':
-                            self.message_queue.put(('game_state', data['table']))
-                        elif data.get('type') == 'game_start':
-                            self.message_queue.put(('game_state', data['table']))
-                        elif data.get('type') == 'game_end':
-                            self.message_queue.put(('game_state', data['table']))
-                    except websockets.exceptions.ConnectionClosed:
-                        self.message_queue.put(('error', 'Conexión con el servidor cerrada'))
-                        break
-                    except json.JSONDecodeError:
-                        self.message_queue.put(('error', 'Error al decodificar mensaje del servidor'))
-                        
+                self.websocket = await websockets.connect(
+                    self.session_url(),
+                    subprotocols=[BINARY_SUBPROTOCOL] if self.binary else None
+                )
+                attempt = 0
+                # Si el servidor no acepta el subprotocolo se sigue usando JSON
+                self.encoding = BINARY if self.websocket.subprotocol == BINARY_SUBPROTOCOL else JSON
+                self.post('status', 'Conectado al servidor')
+                await self.receive_messages()
+                self.post('status', 'Conexión con el servidor cerrada, reconectando...')
             except Exception as e:
-                self.message_queue.put(('error', f'Error de conexión: {str(e)}'))
-        
-        asyncio.run_coroutine_threadsafe(connect(), self.loop)
+                self.post('status', f'Error de conexión: {str(e)}, reintentando...')
+            self.websocket = None
+            await asyncio.sleep(random.uniform(0, min(RECONNECT_MAX, RECONNECT_BASE * 2 ** attempt)))
+            attempt += 1
+
+    def session_url(self):
+        #URL del servidor; con sesión abierta incluye su token y el último mensaje recibido para reanudarla
+        if not self.session:
+            return self.url
+        return f"{self.url.rstrip('/')}/?{urlencode({'session': self.session, 'seq': self.last_seq})}"
+
+    async def receive_messages(self):
+        #Bucle de recepción de mensajes; retorna cuando se cierra la conexión
+        while True:
+            try:
+                message = await self.websocket.recv()
+                data = decode_message(message)
+
+                seq = data.get('session_seq')
+                if seq is not None:
+                    if seq <= self.last_seq:
+                        continue  # Repetido al reanudar la sesión: ya se recibió
+                    self.last_seq = seq
+                
+                if data.get('type') == 'error':
+                    self.post('error', data['message'])
+                elif data.get('type') == 'busy':
+                    self.post('status', data['message'])  # No es un error de la partida: basta con avisar
+                elif data.get('type') == 'session':
+                    await self.on_session(data)
+                elif data.get('type') == 'table_joined':
+                    self.post_table_state(data['table'])
+                elif data.get('type') == 'match_queued':
+                    self.post('status', 'Buscando rival...')
+                elif data.get('type') == 'seat_token':
+                    self.seat_token = data['token']
+                elif data.get('type') == 'tables':
+                    self.lobby_tables.update((table['id'], table) for table in data['tables'])
+                    self.lobby_cursor = data.get('cursor')
+                    self.lobby_loading = False
+                    self.post('tables', data['tables'])
+                elif data.get('type') == 'lobby_snapshot':
+                    self.lobby_seq = data['seq']
+                elif data.get('type') == 'lobby_delta':
+                    await self.apply_lobby_delta(data)
+                elif data.get('type') == 'table_move':
+                    if self.table_state and self.table_state['id'] == data['table_id']:
+                        self.post_table_state(apply_move(self.table_state, data))
+                elif data.get('type') == 'table_state':
+                    self.post_table_state(data['table'])
+                elif data.get('type') == 'game_start':
+                    self.post_table_state(data['table'])
+                elif data.get('type') == 'game_end':
+                    self.post_table_state(data['table'])
+            except websockets.exceptions.ConnectionClosed:
+                return
+            except ValueError:
+                self.post('error', 'Error al decodificar mensaje del servidor')
+
+    def post_table_state(self, state):
+        #Guarda el estado (sobre él se aplica el siguiente delta) y lo pasa a la interfaz
+        self.table_state = state
+        self.post('game_state', state)
+
+    async def on_session(self, data):
+        #Sesión abierta al conectar: reanudada (el servidor repite lo que faltaba) o nueva
+        self.session = data['session']
+        if not data['resumed']:
+            self.last_seq = 0
+            if self.seat_token:
+                # El servidor se reinició: el asiento se recupera con el token de la foto
+                await self.websocket.send(encode_command({
+                    'command': 'RESUME_SEAT',
+                    'token': self.seat_token
+                }, self.encoding))
+        if not data['resumed'] or self.screen == 'lobby':
+            await self.refresh_tables_async()
+        else:
+            # En plena partida no hace falta la lista: se pide al volver al Home
+            self.lobby_stale = True
     
     def run_async_loop(self):
         #Ejecuta el bucle de eventos de asyncio
         asyncio.set_event_loop(self.loop)
         self.loop.run_forever()
     
+    def post(self, msg_type, msg_data):
+        #Encola un mensaje para la interfaz (desde el hilo de red) y despierta a Tk si no hay ya un aviso pendiente
+        self.message_queue.put((msg_type, msg_data))
+        if not self.wake_pending and self.tk_running:
+            self.wake_pending = True
+            try:
+                self.root.event_generate('<<ServerMessage>>', when='tail')
+            except (tk.TclError, RuntimeError):
+                pass  # La ventana se está cerrando
+
+    def start_processing(self):
+        #Solo un Tcl con hilos admite event_generate desde el hilo de red; si no, se vuelve a sondear la cola
+        if self.root.tk.eval('info exists tcl_platform(threaded)') == '1':
+            self.tk_running = True
+            self.process_messages()
+        else:
+            self.poll_messages()
+
+    def poll_messages(self):
+        self.process_messages()
+        self.root.after(100, self.poll_messages)
+
     def process_messages(self):
-        #Procesa los mensajes de la cola
+        #Vacía la cola de una vez: de varios estados seguidos de la partida solo se pinta el último
+        self.wake_pending = False  # Antes de vaciar: lo que llegue a partir de aquí vuelve a despertar
+        game_state = None
         try:
             while True:
                 msg_type, msg_data = self.message_queue.get_nowait()
+                if msg_type == 'game_state':
+                    game_state = msg_data
+                    continue
+                if game_state is not None:
+                    self.update_game_state(game_state)  # Respetar el orden con los demás mensajes
+                    game_state = None
                 if msg_type == 'status':
-                    self.status_label.config(text=msg_data)
+                    self.set_text(self.status_label, msg_data)
                 elif msg_type == 'error':
                     self.show_custom_popup("Error", msg_data)
                 elif msg_type == 'tables':
                     self.update_tables_list(msg_data)
-                elif msg_type == 'game_state':
-                    self.update_game_state(msg_data)
+                elif msg_type == 'tables_removed':
+                    self.remove_tables(msg_data)
+                elif msg_type == 'tables_reset':
+                    self.tables_tree.delete(*self.tables_tree.get_children())
+                    self.lobby_rows.clear()
                 elif msg_type == 'info':
                     self.show_custom_popup("Aviso", msg_data)
         except queue.Empty:
             pass
-        finally:
-            self.root.after(100, self.process_messages)
+        if game_state is not None:
+            self.update_game_state(game_state)
     
+    async def apply_lobby_delta(self, data):
+        #Aplica los cambios incrementales del lobby; si falta alguno pide la foto completa
+        if self.lobby_seq is None or data['seq'] <= self.lobby_seq:
+            return
+        if data['seq'] != self.lobby_seq + 1:
+            await self.refresh_tables_async()
+            return
+        changed = []
+        removed = []
+        for event in data['events']:
+            if event['type'] == 'table_removed':
+                if self.lobby_tables.pop(event['id'], None):
+                    removed.append(event['id'])
+            elif self.lobby_cursor is None or event['table']['id'] <= self.lobby_cursor:
+                # Las salas más allá de la última página cargada llegarán al pedir la siguiente
+                self.lobby_tables[event['table']['id']] = event['table']
+                changed.append(event['table'])
+        self.lobby_seq = data['seq']
+        if changed:
+            self.post('tables', changed)
+        if removed:
+            self.post('tables_removed', removed)
+
     async def refresh_tables_async(self):
-        #Actualiza la lista de salas desde el servidor
+        #Se suscribe a los cambios del lobby y carga la primera página de salas
         if self.websocket:
-            await self.websocket.send(json.dumps({'command': 'GET_TABLES'}))
+            self.lobby_seq = None
+            self.lobby_tables = {}
+            self.lobby_cursor = 0
+            self.lobby_loading = True
+            self.post('tables_reset', None)
+            await self.websocket.send(encode_command({'command': 'SUBSCRIBE_LOBBY', 'snapshot': False}, self.encoding))
+            await self.request_tables_page()
+
+    async def request_tables_page(self):
+        await self.websocket.send(encode_command({
+            'command': 'GET_TABLES',
+            'limit': PAGE_SIZE,
+            'cursor': self.lobby_cursor
+        }, self.encoding))
+
+    def on_tables_scroll(self, scrollbar, first, last):
+        #Al acercarse al final de la lista (o si aún no llena la vista) pide la siguiente página
+        scrollbar.set(first, last)
+        if float(last) > 0.9 and self.websocket and not self.lobby_loading and self.lobby_cursor is not None:
+            self.lobby_loading = True
+            asyncio.run_coroutine_threadsafe(self.request_tables_page(), self.loop)
     
     def refresh_tables(self):
         #Actualiza la lista de salas
         asyncio.run_coroutine_threadsafe(self.refresh_tables_async(), self.loop)
     
     def create_table(self):
-        #Crea una nueva sala
+        #Crea una nueva sala con el tablero elegido
+        if self.websocket:
+            self.watching = None
+            size, win = BOARD_CHOICES[self.board_choice.get()]
+            asyncio.run_coroutine_threadsafe(
+                self.websocket.send(encode_command({'command': 'CREATE_TABLE', 'size': size, 'win': win},
+                                                   self.encoding)),
+                self.loop
+            )
+    
+    def play_vs_bot(self):
+        #Crea una sala contra el bot del servidor
         if self.websocket:
+            self.watching = None
             asyncio.run_coroutine_threadsafe(
-                self.websocket.send(json.dumps({'command': 'CREATE_TABLE'})),
+                self.websocket.send(encode_command({'command': 'PLAY_VS_BOT', 'difficulty': 'hard'}, self.encoding)),
+                self.loop
+            )
+    
+    def quick_match(self):
+        #Pide rival al servidor; la partida empieza sola cuando llega otro jugador
+        if self.websocket:
+            self.watching = None
+            asyncio.run_coroutine_threadsafe(
+                self.websocket.send(encode_command({'command': 'QUICK_MATCH'}, self.encoding)),
                 self.loop
             )
     
     def join_table(self, table_id):
         #Une al jugador a una sala seleccionada
         if self.websocket:
+            self.watching = None
             asyncio.run_coroutine_threadsafe(
-                self.websocket.send(json.dumps({
+                self.websocket.send(encode_command({
                     'command': 'JOIN_TABLE',
                     'table_id': table_id
-                })),
+                }, self.encoding)),
                 self.loop
             )
     
     def make_move(self, position):
         #Realiza un movimiento en el tablero
-        if self.websocket and self.current_table:
+        if self.websocket and self.current_table and self.current_table != self.watching:
+            self.pending_input = (position, time.perf_counter())
             asyncio.run_coroutine_threadsafe(
-                self.websocket.send(json.dumps({
+                self.websocket.send(encode_command({
                     'command': 'MAKE_MOVE',
                     'table_id': self.current_table,
                     'position': position
-                })),
+                }, self.encoding)),
                 self.loop
             )
     
     def update_tables_list(self, tables):
-        #Actualiza la lista de salas en la interfaz
-        for item in self.tables_tree.get_children():
-            self.tables_tree.delete(item)
-        
+        #Actualiza solo las filas de las salas recibidas que cambiaron, sin reconstruir la lista
         for table in tables:
-            self.tables_tree.insert('', 'end', values=(
-                table['id'],
-                table['status'],
-                f"{table['players']}/2"
-            ))
+            values = (table['id'], table['status'], f"{table['players']}/2",
+                      f"{table['size']}×{table['size']}, {table['win']} en raya")
+            item = str(table['id'])
+            previous = self.lobby_rows.get(item)
+            if previous == values:
+                continue
+            if previous is not None:
+                self.tables_tree.item(item, values=values)
+            else:
+                self.tables_tree.insert('', 'end', iid=item, values=values)
+            self.lobby_rows[item] = values
+
+    def remove_tables(self, table_ids):
+        #Quita de la lista las salas eliminadas
+        for table_id in table_ids:
+            if self.lobby_rows.pop(str(table_id), None) is not None:
+                self.tables_tree.delete(str(table_id))
+
+    def set_text(self, label, text):
+        #Cambia el texto de una etiqueta solo si es distinto del que ya muestra
+        if self.labels_view.get(label) != text:
+            label.config(text=text)
+            self.labels_view[label] = text
     
     def update_game_state(self, state):
-        #Actualiza el estado del juego en la interfaz
+        #Actualiza el estado del juego en la interfaz: solo las casillas y textos que cambiaron
         try:
+            if state['size'] != self.board_size:
+                self.setup_board(state['size'])
+            elif state['id'] != self.current_table:
+                self.board_view = [None] * len(self.board_view)  # Otra sala: no fiarse de lo pintado
             self.current_table = state['id']
-            self.table_info_label.config(text=f"Sala {state['id']} - Turno: {state['turn']}")
+            self.set_text(self.table_info_label, f"Sala {state['id']} - Turno: {state['turn']}")
             
-            # Actualizar el tablero
+            # Actualizar el tablero (el de un espectador queda siempre deshabilitado)
+            playable = not state.get('winner') and state['id'] != self.watching
             for i, cell in enumerate(state['board']):
-                self.board_buttons[i].config(
-                    text=cell,
-                    state='normal' if cell == ' ' and not state.get('winner') else 'disabled'
-                )
+                view = (cell, 'normal' if cell == ' ' and playable else 'disabled')
+                if self.board_view[i] != view:
+                    self.board_buttons[i].config(text=view[0], state=view[1])
+                    self.board_view[i] = view
             
             # Actualizar el estado
             if state.get('winner'):
                 if state['winner'] == 'Draw':
-                    self.game_status_label.config(text="¡Empate! | Finalizado")
+                    self.set_text(self.game_status_label, "¡Empate! | Finalizado")
                 else:
-                    self.game_status_label.config(text=f"¡Ganador: {state['winner']}! | Finalizado")
+                    self.set_text(self.game_status_label, f"¡Ganador: {state['winner']}! | Finalizado")
             else:
-                self.game_status_label.config(text=f"Turno de: {state['turn']}")
+                self.set_text(self.game_status_label, f"Turno de: {state['turn']}")
             
             self.show_game()
+            self.measure_input(state)
         except Exception as e:
             print(f"Error al actualizar estado del juego: {str(e)}")  
+
+    def measure_input(self, state):
+        #Si el último clic ya se ve en el tablero, anota cuánto tardó (tras el repintado de Tk)
+        if self.pending_input and state['board'][self.pending_input[0]] != ' ':
+            clicked = self.pending_input[1]
+            self.pending_input = None
+            self.root.after_idle(lambda: self.render_latencies.append(time.perf_counter() - clicked))
+        if state.get('winner') and self.show_latency and self.render_latencies:
+            p50, p99, count = self.latency_summary()
+            print(f"Latencia entrada-pantalla: p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms ({count} movimientos)")
+
+    def latency_summary(self):
+        #(p50, p99, muestras) de la latencia desde el clic hasta ver el movimiento pintado
+        samples = sorted(self.render_latencies)
+        return samples[len(samples) // 2], samples[min(len(samples) - 1, len(samples) * 99 // 100)], len(samples)
     
     def show_lobby(self):
         #Muestra la pantalla del Home
-        self.game_frame.pack_forget()
-        self.lobby_frame.pack(fill='both', expand=True)
+        if self.lobby_stale:
+            self.lobby_stale = False
+            self.refresh_tables()
+        if self.screen != 'lobby':
+            self.game_frame.pack_forget()
+            self.lobby_frame.pack(fill='both', expand=True)
+            self.screen = 'lobby'
     
     def show_game(self):
         #Muestra la pantalla del juego
-        self.lobby_frame.pack_forget()
-        self.game_frame.pack(fill='both', expand=True)
+        if self.screen != 'game':
+            self.lobby_frame.pack_forget()
+            self.game_frame.pack(fill='both', expand=True)
+            self.screen = 'game'
     
     def join_selected_table(self):
         #Une al jugador a la sala seleccionada desde el home
@@ -361,6 +655,22 @@ class GameClient:
             self.show_custom_popup("Aviso", "Por favor, selecciona una sala")
     
     
+    def watch_selected_table(self):
+        #Sigue como espectador la sala seleccionada: se reciben sus estados sin ocupar asiento
+        selection = self.tables_tree.selection()
+        if selection and self.websocket:
+            table_id = self.tables_tree.item(selection[0])['values'][0]
+            self.watching = table_id
+            asyncio.run_coroutine_threadsafe(
+                self.websocket.send(encode_command({
+                    'command': 'WATCH_TABLE',
+                    'table_id': table_id
+                }, self.encoding)),
+                self.loop
+            )
+        else:
+            self.show_custom_popup("Aviso", "Por favor, selecciona una sala")
+
     def show_custom_popup(self, title, message):
         #Muestra notificaciones 
         popup = tk.Toplevel(self.root)
@@ -406,5 +716,5 @@ class GameClient:
         self.root.mainloop()
 
 if __name__ == '__main__':
-    client = GameClient()
+    client = GameClient(binary='--binary' in sys.argv, show_latency='--latency' in sys.argv)
     client.run() 
\ No newline at end of file
@@ -0,0 +1,252 @@
+"""
+Lanzador de varios procesos del servidor en el mismo puerto (SO_REUSEPORT).
+
+Cada proceso es dueño de un rango disjunto de IDs de sala. Los procesos se
+comunican por sockets Unix locales para:
+- publicar sus cambios del lobby, de modo que todos tienen la vista completa;
+- reenviar JOIN_TABLE / MAKE_MOVE / RESUME_SEAT al proceso dueño de la sala
+  cuando el cliente está conectado a otro proceso. El dueño trata al cliente remoto como
+  uno más y le responde a través del proceso en el que está conectado.
+
+Uso: python src/cluster.py --workers 4 --port 8765
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import pickle
+import secrets
+import signal
+import struct
+import tempfile
+
+from admission import RATE_LIMITS, SHED_LAG
+from server import GameServer
+from session import Session
+
+ID_BITS = 24  # Cada proceso tiene 2**24 IDs de sala: [k << 24, (k + 1) << 24)
+HEADER = struct.Struct('<I')
+
+
+class RemoteConnection:
+    #Representa, en el proceso dueño de la sala, a un cliente conectado a otro proceso
+    __slots__ = ('worker', 'conn_id')
+
+    def __init__(self, worker, conn_id):
+        self.worker = worker
+        self.conn_id = conn_id
+
+
+class RemoteOutbox:
+    #Cola de salida de un cliente remoto: los mensajes viajan al proceso donde está conectado
+    def __init__(self, server, connection):
+        self.server = server
+        self.connection = connection
+        self.closed = False
+
+    def send(self, message, kind):
+        if self.closed:
+            return False
+        self.server.ipc_send(self.connection.worker, ('send', self.connection.conn_id, message, kind))
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+class ClusterWorker(GameServer):
+    def __init__(self, worker_id, workers, host='127.0.0.1', port=8765, ipc_dir=None, **options):
+        super().__init__(host, port, **options)  # options: plazos, sesiones y control de admisión
+        self.worker_id = worker_id
+        self.workers = workers
+        self.reuse_port = True
+        self.game.table_id = max(1, worker_id << ID_BITS)
+        self.ipc_dir = ipc_dir or tempfile.gettempdir()
+        self.peers = {}  # {worker_id: StreamWriter}
+        self.conn_ids = {}  # {websocket: conn_id} clientes locales
+        self.connections = {}  # {conn_id: websocket}
+        self.next_conn_id = 1
+        self.remote_clients = {}  # {(worker_id, conn_id): RemoteConnection} clientes de otros procesos
+        self.forwarded = {}  # {websocket: {worker_id}} procesos a los que se reenviaron comandos
+        self.lobby.publish = self.publish_lobby
+
+    def ipc_path(self, worker_id):
+        return os.path.join(self.ipc_dir, f'tres-en-raya-{self.port}-{worker_id}.sock')
+
+    def owner(self, table_id):
+        #Proceso dueño de una sala según su rango de IDs
+        return table_id >> ID_BITS if isinstance(table_id, int) else self.worker_id
+
+    def seat_owner(self, token):
+        #Proceso dueño de un asiento: el primer byte de su token (ver new_seat_token)
+        try:
+            return int(token[:2], 16) if isinstance(token, str) and len(token) == 32 else self.worker_id
+        except ValueError:
+            return self.worker_id
+
+    def new_seat_token(self):
+        #Empieza por el ID del proceso (caben 256, como rangos de salas), para reenviar RESUME_SEAT a su dueño
+        return f'{self.worker_id:02x}{secrets.token_hex(15)}'
+
+    def connection_count(self):
+        #Los clientes reenviados por otros procesos ya cuentan como conexión en el suyo
+        return super().connection_count() - len(self.remote_clients)
+
+    def ipc_send(self, worker_id, message):
+        payload = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        self.peers[worker_id].write(HEADER.pack(len(payload)) + payload)
+
+    def publish_lobby(self, events):
+        #Envía los cambios del lobby local al resto de procesos
+        for worker_id in self.peers:
+            self.ipc_send(worker_id, ('lobby', events))
+
+    def forward(self, websocket, data):
+        #JOIN_TABLE, MAKE_MOVE, WATCH_TABLE y RESUME_SEAT sobre salas de otro proceso se reenvían a su dueño
+        if data.get('command') in ('WATCH_TABLE', 'UNWATCH_TABLE'):
+            # Antes de seguir otra sala se deja de seguir la que pudiera tener en otro proceso
+            client = self.clients[websocket]
+            for worker_id in self.forwarded.get(websocket, ()):
+                self.ipc_send(worker_id, ('command', self.worker_id, self.conn_ids[websocket], client.player_id,
+                                          client.encoding, {'command': 'UNWATCH_TABLE'}))
+        if data.get('command') == 'RESUME_SEAT':
+            owner = self.seat_owner(data.get('token'))
+        elif data.get('command') in ('JOIN_TABLE', 'MAKE_MOVE', 'WATCH_TABLE'):
+            owner = self.owner(data.get('table_id'))
+        else:
+            return False
+        if owner == self.worker_id or owner not in self.peers:
+            return False
+        conn_id = self.conn_ids.get(websocket)
+        if conn_id is None:
+            conn_id = self.conn_ids[websocket] = self.next_conn_id
+            self.connections[conn_id] = websocket
+            self.next_conn_id += 1
+        self.forwarded.setdefault(websocket, set()).add(owner)
+        client = self.clients[websocket]
+        self.ipc_send(owner, ('command', self.worker_id, conn_id, client.player_id, client.encoding, data))
+        return True
+
+    def rebind_session(self, previous, websocket):
+        #Al reanudar la sesión, los procesos dueños de sus salas siguen viendo el mismo conn_id
+        super().rebind_session(previous, websocket)
+        conn_id = self.conn_ids.pop(previous, None)
+        if conn_id is not None:
+            self.conn_ids[websocket] = conn_id
+            self.connections[conn_id] = websocket
+        if previous in self.forwarded:
+            self.forwarded[websocket] = self.forwarded.pop(previous)
+
+    async def end_session(self, websocket):
+        await super().end_session(websocket)
+        conn_id = self.conn_ids.pop(websocket, None)
+        if conn_id is not None:
+            del self.connections[conn_id]
+            for worker_id in self.forwarded.pop(websocket, ()):
+                self.ipc_send(worker_id, ('disconnect', self.worker_id, conn_id))
+
+    async def handle_ipc(self, reader, writer):
+        #Atiende los mensajes de otro proceso
+        try:
+            while True:
+                size, = HEADER.unpack(await reader.readexactly(HEADER.size))
+                message = pickle.loads(await reader.readexactly(size))
+                await self.dispatch_ipc(message)
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch_ipc(self, message):
+        op = message[0]
+        if op == 'lobby':
+            self.lobby.on_remote_events(message[1])
+        elif op == 'send':
+            _, conn_id, payload, kind = message
+            websocket = self.connections.get(conn_id)
+            if websocket in self.clients:
+                self.deliver(self.clients[websocket], payload, kind)
+        elif op == 'command':
+            _, worker_id, conn_id, player_id, encoding, data = message
+            connection = self.remote_clients.get((worker_id, conn_id))
+            if connection is None:
+                connection = self.remote_clients[(worker_id, conn_id)] = RemoteConnection(worker_id, conn_id)
+                self.clients[connection] = Session(f'{worker_id}:{player_id}', encoding,
+                                                   RemoteOutbox(self, connection))
+            table_id = data.get('table_id')
+            if data['command'] == 'JOIN_TABLE':
+                await self.on_table(table_id, self.handle_join_table, connection, table_id)
+            elif data['command'] == 'WATCH_TABLE':
+                await self.handle_watch_table(connection, table_id)
+            elif data['command'] == 'UNWATCH_TABLE':
+                self.stop_watching(connection)
+            elif data['command'] == 'RESUME_SEAT':
+                await self.handle_resume_seat(connection, data.get('token'))
+            else:
+                await self.on_table(table_id, self.handle_make_move, connection, table_id, data.get('position'))
+        elif op == 'disconnect':
+            connection = self.remote_clients.get((message[1], message[2]))
+            if connection is not None:
+                await self.handle_disconnect(connection)
+                del self.remote_clients[(message[1], message[2])]  # Mientras siga en clients se descuenta de las conexiones
+
+    async def connect_peers(self):
+        #Conecta con el socket de cada uno de los demás procesos, reintentando mientras arrancan
+        for worker_id in range(self.workers):
+            if worker_id == self.worker_id:
+                continue
+            while True:
+                try:
+                    _, writer = await asyncio.open_unix_connection(self.ipc_path(worker_id))
+                    break
+                except (FileNotFoundError, ConnectionRefusedError):
+                    await asyncio.sleep(0.05)
+            self.peers[worker_id] = writer
+
+    async def start(self):
+        path = self.ipc_path(self.worker_id)
+        if os.path.exists(path):
+            os.unlink(path)
+        ipc_server = await asyncio.start_unix_server(self.handle_ipc, path)
+        async with ipc_server:
+            await self.connect_peers()
+            await super().start()
+
+
+def run_worker(worker_id, workers, host, port, options):
+    asyncio.run(ClusterWorker(worker_id, workers, host, port, **options).start())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor de Tres en Raya con varios procesos')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--turn-timeout', type=float, default=60)
+    parser.add_argument('--abandon-timeout', type=float, default=300)
+    parser.add_argument('--idle-timeout', type=float)
+    parser.add_argument('--session-grace', type=float, default=30)
+    parser.add_argument('--max-connections', type=int, help='Conexiones abiertas a la vez por proceso')
+    parser.add_argument('--admission', action='store_true')
+    args = parser.parse_args()
+    options = {'turn_timeout': args.turn_timeout, 'abandon_timeout': args.abandon_timeout,
+               'idle_timeout': args.idle_timeout, 'session_grace': args.session_grace,
+               'max_connections': args.max_connections,
+               'rate_limits': RATE_LIMITS if args.admission else None,
+               'shed_lag': SHED_LAG if args.admission else None}
+    processes = [multiprocessing.Process(target=run_worker, args=(k, args.workers, args.host, args.port, options))
+                 for k in range(args.workers)]
+    for process in processes:
+        process.start()
+
+    def stop(signum, frame):
+        #Sin esto, al terminar el lanzador los procesos del servidor seguirían vivos y con el puerto ocupado
+        for process in processes:
+            process.terminate()
+
+    # Después de arrancarlos, para que los procesos hijos no hereden el manejador
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for process in processes:
+        process.join()
\ No newline at end of file
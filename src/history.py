@@ -0,0 +1,144 @@
+"""
+Historial de partidas en un log binario de solo anexado.
+
+Cada movimiento y cada resultado es un registro de tamaño fijo:
+    table_id (u32), seq (u16), cell (u8), symbol (u8), timestamp en µs (u64)
+Los resultados usan cell = RESULT_CELL y symbol = código del ganador. Al
+sentarse el primer jugador de cada partida va un registro de inicio con
+cell = START_CELL, seq = lado del tablero y symbol = fichas en raya; las
+partidas sin él (logs anteriores) son de 3×3.
+
+GameLog acumula los registros en memoria desde el bucle de asyncio y los
+escribe por lotes en un hilo aparte, así el procesamiento de un movimiento
+nunca espera al disco. El log se divide en segmentos que rotan por tamaño.
+HistoryReader recorre los segmentos con mmap, sin cargarlos en memoria.
+"""
+
+import asyncio
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RECORD = struct.Struct('<IHBBQ')
+RESULT_CELL = 255
+START_CELL = 254  # Las casillas de un tablero de 15×15 llegan a 224
+DEFAULT_GEOMETRY = (3, 3)  # (lado, fichas en raya) de las partidas sin registro de inicio
+SYMBOLS = (None, 'X', 'O', 'Draw')
+SYMBOL_CODES = {symbol: code for code, symbol in enumerate(SYMBOLS)}
+SEGMENT = 'history-{:06d}.bin'
+
+
+def segment_paths(directory):
+    #Segmentos del log en orden
+    names = sorted(name for name in os.listdir(directory) if name.startswith('history-') and name.endswith('.bin'))
+    return [os.path.join(directory, name) for name in names]
+
+
+class GameLog:
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024, flush_interval=0.2, flush_bytes=64 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes - max_bytes % RECORD.size  # Tamaño máximo de cada segmento
+        self.flush_interval = flush_interval  # Segundos entre escrituras
+        self.flush_bytes = flush_bytes  # Se escribe antes si el lote supera este tamaño
+        self.buffer = bytearray()
+        self.executor = ThreadPoolExecutor(max_workers=1)  # Un solo escritor: conserva el orden
+        self.file = None
+        self.segment = 0
+        self.flush_task = None
+        os.makedirs(directory, exist_ok=True)
+        existing = segment_paths(directory)
+        if existing:
+            self.segment = int(os.path.basename(existing[-1])[8:14])
+
+    def append_start(self, table_id, size, win):
+        self.buffer += RECORD.pack(table_id, size, START_CELL, win, time.time_ns() // 1000)
+
+    def append_move(self, table_id, seq, cell, symbol):
+        self.buffer += RECORD.pack(table_id, seq, cell, SYMBOL_CODES[symbol], time.time_ns() // 1000)
+        if len(self.buffer) >= self.flush_bytes:
+            self.flush()
+
+    def append_result(self, table_id, seq, winner):
+        self.buffer += RECORD.pack(table_id, seq, RESULT_CELL, SYMBOL_CODES[winner], time.time_ns() // 1000)
+
+    def flush(self):
+        #Entrega el lote actual al hilo escritor
+        if self.buffer:
+            chunk, self.buffer = bytes(self.buffer), bytearray()
+            return self.executor.submit(self.write, chunk)
+        return None
+
+    def write(self, chunk):
+        #Escribe en el segmento actual, rotando cuando se llena (solo en el hilo escritor)
+        while chunk:
+            if self.file is None or self.file.tell() >= self.max_bytes:
+                if self.file:
+                    self.file.close()
+                self.segment += 1
+                self.file = open(os.path.join(self.directory, SEGMENT.format(self.segment)), 'ab')
+            room = self.max_bytes - self.file.tell()
+            self.file.write(chunk[:room])
+            chunk = chunk[room:]
+        self.file.flush()
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    def start(self):
+        self.flush_task = asyncio.get_running_loop().create_task(self.run())
+
+    def close(self):
+        #Escribe lo pendiente y cierra el segmento
+        if self.flush_task:
+            self.flush_task.cancel()
+        self.flush()
+        self.executor.shutdown(wait=True)
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class HistoryReader:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def records(self):
+        #Itera (table_id, seq, cell, symbol, timestamp_us) de todos los segmentos; en los registros de inicio,
+        #seq y symbol son el lado del tablero y las fichas en raya
+        for path in segment_paths(self.directory):
+            size = os.path.getsize(path)
+            size -= size % RECORD.size  # Ignorar un registro a medio escribir
+            if not size:
+                continue
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                data = memoryview(view)[:size]
+                try:
+                    for table_id, seq, cell, symbol, timestamp in RECORD.iter_unpack(data):
+                        yield table_id, seq, cell, symbol if cell == START_CELL else SYMBOLS[symbol], timestamp
+                finally:
+                    data.release()  # El mmap no puede cerrarse con vistas abiertas
+
+    def games(self):
+        #Reconstruye las partidas terminadas: (table_id, (lado, fichas en raya), [(casilla, símbolo)], ganador)
+        open_games = {}
+        for table_id, seq, cell, symbol, _ in self.records():
+            if cell == START_CELL:
+                open_games[table_id] = ((seq, symbol), [])
+            elif cell == RESULT_CELL:
+                geometry, moves = open_games.pop(table_id, (DEFAULT_GEOMETRY, []))
+                yield table_id, geometry, moves, symbol
+            else:
+                open_games.setdefault(table_id, (DEFAULT_GEOMETRY, []))[1].append((cell, symbol))
+
+    def replay(self, board_class):
+        #Vuelve a jugar cada partida con un motor de tablero y retorna (table_id, ganador registrado, ganador recalculado)
+        for table_id, (size, win), moves, winner in self.games():
+            board = board_class(size, win)
+            result = None
+            for cell, symbol in moves:
+                result = board.place(cell, symbol)
+            yield table_id, winner, result
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Lobby con suscripción: envía a los clientes suscritos eventos incrementales
+(table_added / table_updated / table_removed) agrupados por tick y numerados.
+"""
+
+import asyncio
+import json
+from bisect import bisect_right
+from heapq import merge
+
+from protocol import Frame
+
+# Eventos de ciclo de vida de la sala -> tipo de evento del lobby
+LOBBY_EVENTS = {
+    'created': 'table_added',
+    'joined': 'table_updated',
+    'left': 'table_updated',
+    'started': 'table_updated',
+    'finished': 'table_removed',
+    'removed': 'table_removed',
+}
+
+class Lobby:
+    def __init__(self, game, broadcast, tick=0.05):
+        self.game = game
+        self.broadcast = broadcast  # broadcast(websockets, Frame), no bloqueante
+        self.tick = tick  # Segundos durante los que se agrupan los cambios
+        self.subscribers = set()
+        self.seq = 0
+        self.pending = {}  # {table_id: (tipo, sala o info, es_local)} cambios aún no enviados
+        self.flush_handle = None
+        self.remote_tables = {}  # {table_id: info} salas de otros procesos del clúster
+        self.remote_order = []  # IDs de remote_tables ordenados, para paginar; None si hay que rehacerla
+        self.publish = None  # publish(eventos): reenvía los cambios locales a otros procesos
+
+    def snapshot(self):
+        #Lista de salas (locales y remotas) y su JSON
+        _, tables_info, tables_json = self.game.snapshot()
+        if not self.remote_tables:
+            return tables_info, tables_json
+        tables_info = tables_info + list(self.remote_tables.values())
+        return tables_info, json.dumps(tables_info)
+
+    def page(self, status=None, cursor=0, limit=50):
+        #Página de salas locales y remotas con ID mayor que cursor; retorna (salas, siguiente cursor o None)
+        tables_info, more = self.game.page(status, cursor, limit)
+        if self.remote_tables:
+            remote = []
+            ids = self.remote_order
+            if ids is None:
+                ids = self.remote_order = sorted(self.remote_tables)  # Se rehace al paginar, no con cada evento
+            for table_id in ids[bisect_right(ids, cursor):]:
+                info = self.remote_tables[table_id]
+                if status is None or status == ('waiting' if info['players'] < 2 else 'playing'):
+                    remote.append(info)
+                    if len(remote) > limit:
+                        break
+            merged = list(merge(tables_info, remote, key=lambda info: info['id']))
+            more = more or len(merged) > limit
+            tables_info = merged[:limit]
+        return tables_info, tables_info[-1]['id'] if more else None
+
+    def subscribe(self, websocket, snapshot=True):
+        #Suscribe al cliente y retorna la foto completa del lobby (vacía si el cliente pagina con GET_TABLES)
+        self.subscribers.add(websocket)
+        if not snapshot:
+            return Frame({'type': 'lobby_snapshot', 'seq': self.seq, 'tables': []})
+        tables_info, tables_json = self.snapshot()
+        return Frame({'type': 'lobby_snapshot', 'seq': self.seq, 'tables': tables_info},
+                     f'{{"type": "lobby_snapshot", "seq": {self.seq}, "tables": {tables_json}}}')
+
+    def unsubscribe(self, websocket):
+        self.subscribers.discard(websocket)
+
+    def on_table_event(self, event, table):
+        #Acumula el cambio de la sala fusionándolo con los pendientes
+        kind = LOBBY_EVENTS.get(event)
+        if kind:
+            self.add_pending(table.id, kind, table, True)
+
+    def on_remote_events(self, events):
+        #Aplica los cambios publicados por otro proceso del clúster
+        for event in events:
+            if event['type'] == 'table_removed':
+                if self.remote_tables.pop(event['id'], None):
+                    self.remote_order = None
+                self.add_pending(event['id'], 'table_removed', None, False)
+            else:
+                if event['table']['id'] not in self.remote_tables:
+                    self.remote_order = None
+                self.remote_tables[event['table']['id']] = event['table']
+                self.add_pending(event['table']['id'], event['type'], event['table'], False)
+
+    def add_pending(self, table_id, kind, source, local):
+        previous = self.pending.get(table_id)
+        if previous and previous[0] == 'table_added':
+            if kind == 'table_removed':
+                # Creada y eliminada en el mismo tick: nadie necesita verla
+                del self.pending[table_id]
+                return
+            kind = 'table_added'
+        self.pending[table_id] = (kind, source, local)
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        if self.flush_handle is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # Sin bucle en marcha: se enviará en el siguiente cambio
+            self.flush_handle = loop.call_later(self.tick, self.flush)
+
+    def flush(self):
+        #Envía todos los cambios pendientes en un único mensaje
+        self.flush_handle = None
+        if not self.pending:
+            return
+        if not self.subscribers and not self.publish:
+            self.pending = {}  # Nadie escucha: no hace falta construir los eventos
+            return
+        events = []
+        local_events = []
+        for table_id, (kind, source, local) in self.pending.items():
+            if kind == 'table_removed':
+                event = {'type': kind, 'id': table_id}
+            else:
+                event = {'type': kind, 'table': self.game.table_info(source) if local else source}
+            events.append(event)
+            if local:
+                local_events.append(event)
+        self.pending = {}
+        if self.publish and local_events:
+            self.publish(local_events)
+        self.seq += 1
+        if self.subscribers:
+            self.broadcast(self.subscribers, Frame({
+                'type': 'lobby_delta',
+                'seq': self.seq,
+                'events': events
+            }))
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+Cola de emparejamiento para QUICK_MATCH.
+
+Cada cubo (por ejemplo, una franja de puntuación) es una cola FIFO de
+conexiones en espera. Al llegar un jugador se empareja con el primero que
+esperaba en su cubo, o se queda a la cola: ambas operaciones son O(1).
+Cancelar también lo es: la conexión se olvida en `queued` y su entrada en la
+cola se descarta cuando llega al frente.
+"""
+
+import time
+from collections import deque
+
+class Matchmaker:
+    def __init__(self):
+        self.buckets = {}  # {cubo: deque([(websocket, instante de llegada)])}
+        self.queued = {}  # {websocket: cubo} conexiones que siguen esperando
+
+    def __len__(self):
+        return len(self.queued)
+
+    def enqueue(self, websocket, bucket=0):
+        #Retorna (rival, segundos que esperó) si hay alguien en el cubo; si no, deja a la conexión esperando
+        if websocket in self.queued:
+            return None
+        queue = self.buckets.get(bucket)
+        while queue:
+            other, since = queue.popleft()
+            if self.queued.get(other) == bucket:
+                del self.queued[other]
+                if not queue:
+                    del self.buckets[bucket]
+                return other, time.perf_counter() - since
+        self.buckets.setdefault(bucket, deque()).append((websocket, time.perf_counter()))
+        self.queued[websocket] = bucket
+        return None
+
+    def cancel(self, websocket):
+        #Saca a la conexión de la cola; retorna False si no estaba esperando
+        return self.queued.pop(websocket, None) is not None
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Métricas del servidor en formato de texto de Prometheus.
+
+Los contadores e histogramas son objetos de módulo baratos de actualizar
+(una suma o un bisect), pensados para quedarse activos en producción. El
+servidor las publica en /metrics, en el mismo puerto que el WebSocket.
+"""
+
+from bisect import bisect_left
+
+PREFIX = 'tres_en_raya_'
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        #Exposición en formato de texto de Prometheus
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+
+def format_labels(names, values, extra=''):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.children = {}  # {valores de etiquetas: hijo}
+        registry.register(self)
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self.child()
+        return child
+
+
+class CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Counter(Metric):
+    kind = 'counter'
+    child = CounterChild
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def samples(self):
+        for values, child in self.children.items():
+            yield f'{self.name}{format_labels(self.labelnames, values)} {child.value}'
+
+
+class HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # El último es +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=(), registry=REGISTRY):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def child(self):
+        return HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def samples(self):
+        for values, child in self.children.items():
+            total = 0
+            for bound, count in zip(self.buckets + ('+Inf',), child.counts):
+                total += count
+                le = 'le="%s"' % bound
+                yield f'{self.name}_bucket{format_labels(self.labelnames, values, le)} {total}'
+            yield f'{self.name}_sum{format_labels(self.labelnames, values)} {child.sum}'
+            yield f'{self.name}_count{format_labels(self.labelnames, values)} {total}'
+
+
+class Gauge(Metric):
+    #Valor calculado al exponer las métricas: func() retorna un número o {valores de etiquetas: número}
+    kind = 'gauge'
+
+    def __init__(self, name, help, func=None, labelnames=(), registry=REGISTRY):
+        super().__init__(name, help, labelnames, registry)
+        self.func = func
+
+    def samples(self):
+        if self.func is None:
+            return
+        value = self.func()
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        for values, number in items:
+            yield f'{self.name}{format_labels(self.labelnames, values)} {number}'
+
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+FANOUT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 1000, 5000)
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+
+CONNECTED_CLIENTS = Gauge('connected_clients', 'Clientes conectados')
+TABLES = Gauge('tables', 'Salas por estado', labelnames=('status',))
+COMMANDS = Counter('commands_total', 'Comandos recibidos por tipo', ('command',))
+COMMAND_LATENCY = Histogram('command_duration_seconds', 'Duración de process_message por comando',
+                            ('command',), LATENCY_BUCKETS)
+FANOUT = Histogram('broadcast_fanout', 'Destinatarios por broadcast', ('kind',), FANOUT_BUCKETS)
+MESSAGES_SENT = Counter('messages_sent_total', 'Mensajes enviados a clientes')
+BYTES_SENT = Counter('bytes_sent_total', 'Bytes enviados a clientes')
+MATCH_QUEUE = Gauge('match_queue', 'Conexiones esperando rival en QUICK_MATCH')
+MATCH_WAIT = Histogram('match_wait_seconds', 'Espera en la cola de QUICK_MATCH hasta emparejar', (), WAIT_BUCKETS)
+MAILBOX_WAIT = Histogram('mailbox_wait_seconds', 'Espera de una orden en el buzón de su sala', (), LATENCY_BUCKETS)
+TIMERS = Gauge('timers', 'Plazos armados en la rueda de temporizadores')
+TIMEOUTS = Counter('timeouts_total', 'Plazos vencidos por tipo', ('kind',))
+DETACHED_SESSIONS = Gauge('detached_sessions', 'Sesiones sin conexión que conservan su asiento durante la gracia')
+SESSION_RESUMES = Counter('session_resumes_total', 'Reconexiones con token de sesión por resultado', ('result',))
+REPLAYED_MESSAGES = Counter('replayed_messages_total', 'Mensajes repetidos desde el anillo de la sesión al reanudarla')
+REJECTED_COMMANDS = Counter('rejected_commands_total', 'Comandos rechazados con busy por comando y motivo',
+                            ('command', 'reason'))
+REFUSED_CONNECTIONS = Counter('refused_connections_total', 'Conexiones rechazadas en el handshake por motivo',
+                              ('reason',))
+LOOP_LAG = Gauge('event_loop_lag_seconds', 'Retraso reciente del bucle de asyncio')
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Motores de tablero para una sala: la representación original como lista de
+cadenas y una representación en bitboards (un entero por jugador, bit i =
+casilla i).
+
+Los tableros son de N×N casillas y gana quien pone k fichas en raya (3×3 con
+3 en raya por defecto, 15×15 con 5 en raya para Gomoku). Las medidas de cada
+combinación se calculan una vez (ver geometry) y las comparten todos los
+tableros iguales.
+"""
+
+from functools import lru_cache
+
+FULL_MASK = 0b111111111
+
+# Filas-Columnas-Diagonales como máscaras de bits (bit i = casilla i)
+LINE_MASKS = tuple(
+    sum(1 << cell for cell in combo) for combo in (
+        (0, 1, 2), (3, 4, 5), (6, 7, 8),
+        (0, 3, 6), (1, 4, 7), (2, 5, 8),
+        (0, 4, 8), (2, 4, 6)
+    )
+)
+
+# Líneas que pasan por cada casilla: solo hace falta revisarlas tras un movimiento
+CELL_LINES = tuple(tuple(mask for mask in LINE_MASKS if mask >> cell & 1) for cell in range(9))
+
+# WINNING[m] es True si la máscara m contiene alguna línea completa
+WINNING = tuple(any(m & line == line for line in LINE_MASKS) for m in range(1 << 9))
+
+MIN_SIZE = 3
+MAX_SIZE = 15  # Las casillas caben en un byte en el protocolo binario y en el historial
+DEFAULT_WIN = 5  # Fichas en raya si no se indican: todo el lado hasta 5×5, luego 5 como en Gomoku
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))  # Fila, columna, diagonal y antidiagonal
+
+
+class Geometry:
+    #Medidas de un tablero de size×size con win en raya
+    __slots__ = ('size', 'win', 'cells', 'full', 'rays', 'windows', 'lines')
+
+    def __init__(self, size, win):
+        self.size = size
+        self.win = win
+        self.cells = size * size
+        self.full = (1 << self.cells) - 1
+        # rays[casilla]: por cada dirección en la que cabe una raya, (casillas hacia atrás, hacia delante),
+        # como mucho win - 1 por lado, de la más cercana a la más lejana
+        rays = []
+        for cell in range(self.cells):
+            row, col = divmod(cell, size)
+            directions = []
+            for dr, dc in DIRECTIONS:
+                sides = []
+                for sign in (-1, 1):
+                    side = []
+                    r, c = row + sign * dr, col + sign * dc
+                    while 0 <= r < size and 0 <= c < size and len(side) < win - 1:
+                        side.append(r * size + c)
+                        r, c = r + sign * dr, c + sign * dc
+                    sides.append(tuple(side))
+                if len(sides[0]) + len(sides[1]) + 1 >= win:
+                    directions.append(tuple(sides))
+            rays.append(tuple(directions))
+        self.rays = tuple(rays)
+        # Todas las rayas de win casillas (como casillas y como máscaras), para la evaluación completa
+        windows = []
+        for cell in range(self.cells):
+            row, col = divmod(cell, size)
+            for dr, dc in DIRECTIONS:
+                end_row, end_col = row + dr * (win - 1), col + dc * (win - 1)
+                if 0 <= end_row < size and 0 <= end_col < size:
+                    windows.append(tuple((row + dr * i) * size + col + dc * i for i in range(win)))
+        self.windows = tuple(windows)
+        self.lines = tuple(sum(1 << cell for cell in window) for window in windows)
+
+    def wins(self, mask, index):
+        #True si la ficha en index completa una raya: recorre solo las 4 líneas que pasan por ella, O(k)
+        win = self.win
+        for back, ahead in self.rays[index]:
+            count = 1
+            for cell in ahead:
+                if not mask >> cell & 1:
+                    break
+                count += 1
+            for cell in back:
+                if not mask >> cell & 1:
+                    break
+                count += 1
+            if count >= win:
+                return True
+        return False
+
+    def has_line(self, mask):
+        #Evaluación completa: True si la máscara contiene alguna raya
+        return any(mask & line == line for line in self.lines)
+
+
+@lru_cache(maxsize=None)
+def geometry(size=3, win=3):
+    #Geometry compartida para cada combinación; lanza ValueError si no es válida
+    if not (isinstance(size, int) and isinstance(win, int) and MIN_SIZE <= size <= MAX_SIZE and
+            MIN_SIZE <= win <= size):
+        raise ValueError(f'Tablero no válido: {size}×{size} con {win} en raya')
+    return Geometry(size, win)
+
+
+def default_win(size):
+    #Fichas en raya para un lado dado (si size no es un entero lo rechazará geometry)
+    return min(size, DEFAULT_WIN) if isinstance(size, int) else size
+
+
+CLASSIC = geometry(3, 3)
+
+
+class ListBoard:
+    #Tablero original: lista de cadenas ' ', 'X' u 'O' que se evalúa entero tras cada movimiento
+    def __init__(self, size=3, win=3):
+        self.geometry = geometry(size, win)
+        self.game_board = [' ' for _ in range(self.geometry.cells)]
+
+    def cells(self):
+        #Lista de casillas para el protocolo
+        return list(self.game_board)
+
+    def is_empty(self, index):
+        return self.game_board[index] == ' '
+
+    def place(self, index, symbol):
+        #Marca la casilla y retorna 'X', 'O', 'Draw' o None
+        self.game_board[index] = symbol
+        return self.winner()
+
+    def winner(self):
+        #Verifica si hay un ganador y retorna 'X', 'O', o 'Draw'
+        board = self.game_board
+        for combo in self.geometry.windows:
+            first = board[combo[0]]
+            if first != ' ':
+                for cell in combo[1:]:
+                    if board[cell] != first:
+                        break
+                else:
+                    return first
+
+        if ' ' not in self.game_board:
+            return 'Draw'
+
+        return None
+
+
+class BitBoard:
+    #Tablero como dos enteros de N×N bits, uno por jugador
+    __slots__ = ('x', 'o', 'geometry')
+
+    def __init__(self, size=3, win=3):
+        self.x = 0
+        self.o = 0
+        self.geometry = geometry(size, win)
+
+    def cells(self):
+        #Lista de casillas para el protocolo, igual que ListBoard
+        x, o = self.x, self.o
+        return ['X' if x >> i & 1 else 'O' if o >> i & 1 else ' ' for i in range(self.geometry.cells)]
+
+    def is_empty(self, index):
+        return not (self.x | self.o) >> index & 1
+
+    def place(self, index, symbol):
+        #Marca la casilla y revisa solo las líneas que pasan por ella
+        bit = 1 << index
+        if symbol == 'X':
+            self.x |= bit
+            mask = self.x
+        else:
+            self.o |= bit
+            mask = self.o
+        geometry = self.geometry
+        if geometry is CLASSIC:
+            # 3×3: las líneas de la casilla ya están precalculadas como máscaras
+            for line in CELL_LINES[index]:
+                if mask & line == line:
+                    return symbol
+        elif geometry.wins(mask, index):
+            return symbol
+        if self.x | self.o == geometry.full:
+            return 'Draw'
+        return None
+
+    def winner(self):
+        #Evaluación completa del tablero (con la tabla de 512 entradas en 3×3)
+        geometry = self.geometry
+        if geometry is CLASSIC:
+            x_wins, o_wins = WINNING[self.x], WINNING[self.o]
+        else:
+            x_wins, o_wins = geometry.has_line(self.x), geometry.has_line(self.o)
+        if x_wins:
+            return 'X'
+        if o_wins:
+            return 'O'
+        if self.x | self.o == geometry.full:
+            return 'Draw'
+        return None
\ No newline at end of file
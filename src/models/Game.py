@@ -1,73 +1,166 @@
 """
-Modelo principal del juego que gestiona las salas y el estado global
+Modelo principal del juego que gestiona las salas y el estado global.
+
+Como las salas, se usa solo desde el bucle de asyncio: cada método deja el
+registro consistente antes de retornar, así que no necesita locks.
 """
 
 from models.Table import Table
-import threading
+from bisect import bisect_right
+from heapq import merge
+from itertools import islice
 import json
 
+STATUSES = ('waiting', 'playing', 'finished')
+LISTED = ('waiting', 'playing')  # Estados que aparecen en el lobby
+
 class Game:
+    encodes = 0  # Número total de listas de salas serializadas
+
     def __init__(self):
-        self.tables = []
+        self.tables = {}  # {table_id: Table}, en orden de creación
+        self.indexes = {status: {} for status in STATUSES}  # {estado: {table_id: Table}}
+        self.ordered = {status: None for status in STATUSES}  # {estado: [table_id] ordenados}; None si hay que rehacerla
+        self.table_status = {}  # {table_id: estado}
         self.table_id = 1
-        self.lock = threading.Lock()  # Lock para sincronización
+        self.listeners = []  # Callbacks de ciclo de vida: listener(evento, sala)
+        self.version = 0  # Se incrementa con cada cambio visible en el lobby
+        self.snapshot_cache = None  # (versión, lista de salas, lista en JSON)
+
+    def subscribe(self, listener):
+        #Registra un callback para los eventos de ciclo de vida de las salas
+        self.listeners.append(listener)
+
+    def notify(self, event, table):
+        #Propaga un evento de ciclo de vida ('created', 'joined', 'left', 'started', 'finished', 'emptied', 'removed')
+        self.version += 1
+        if table.id in self.tables:
+            self.reindex(table)
+        for listener in self.listeners:
+            listener(event, table)
+
+    def reindex(self, table):
+        #Mueve la sala al índice que corresponde a su estado actual
+        if table.winner is not None:
+            status = 'finished'
+        elif len(table.players) < 2:
+            status = 'waiting'
+        else:
+            status = 'playing'
+        previous = self.table_status.get(table.id)
+        if previous != status:
+            if previous:
+                del self.indexes[previous][table.id]
+                self.ordered[previous] = None
+            self.indexes[status][table.id] = table
+            self.ordered[status] = None
+            self.table_status[table.id] = status
+
+    def sorted_ids(self, status):
+        #IDs de un estado en orden; la lista se rehace al pedir una página, no en cada cambio de sala
+        ids = self.ordered[status]
+        if ids is None:
+            ids = self.ordered[status] = sorted(self.indexes[status])  # Suelen estar casi en orden de creación
+        return ids
+
+    def unindex(self, table_id):
+        #Elimina la sala del registro y de su índice
+        table = self.tables.pop(table_id, None)
+        if table:
+            status = self.table_status.pop(table_id)
+            del self.indexes[status][table_id]
+            self.ordered[status] = None
+        return table
         
-    def create_table(self):
-        # Crea una nueva sala si hay menos de 50 salas disponibles 
-        with self.lock:
-            try:
-                waiting_tables = [table for table in self.tables if len(table.players) < 2]
-                if len(waiting_tables) < 50:
-                    table = Table(self.table_id)
-                    self.tables.append(table)
-                    self.table_id += 1
-                    table.start_thread()  # Inicia el hilo de la sala
-                    return table
-                return None
-            except Exception as e:
-                print(f"Error al crear sala: {str(e)}")
+    def create_table(self, waiting_limit=50, size=3, win=3):
+        # Crea una sala si hay menos de waiting_limit en espera (None: sin límite)
+        try:
+            if waiting_limit is not None and len(self.indexes['waiting']) >= waiting_limit:
                 return None
+            table = Table(self.table_id, on_event=self.notify, size=size, win=win)
+            self.tables[table.id] = table
+            self.reindex(table)
+            self.table_id += 1
+        except Exception as e:
+            print(f"Error al crear sala: {str(e)}")
+            return None
+        self.notify('created', table)
+        return table
+
+    def restore_tables(self, tables):
+        #Registra de una vez las salas recuperadas de una foto, conservando sus IDs.
+        #No se emiten eventos por sala: al arrancar aún no hay suscriptores del lobby
+        for table in tables:
+            table.on_event = self.notify
+            self.tables[table.id] = table
+            self.reindex(table)
+            self.table_id = max(self.table_id, table.id + 1)
+        self.version += 1
 
     def remove_table(self, table_id):
         # Elimina una sala del juego
-        with self.lock:
-            table = next((t for t in self.tables if t.id == table_id), None)
-            if table:
-                table.stop_thread()  # Detiene el hilo de la sala
-                self.tables = [t for t in self.tables if t.id != table_id]
+        table = self.unindex(table_id)
+        if table:
+            self.notify('removed', table)
 
-    def get_tables_info(self):
-        #Obtiene información de todas las salas disponibles, excluyendo las finalizadas
-        with self.lock:
+    def count_tables(self, status):
+        #Número de salas en un estado ('waiting', 'playing', 'finished')
+        return len(self.indexes[status])
+
+    def table_info(self, table):
+        #Resumen de una sala tal como aparece en el lobby
+        status = 'Esperando' if len(table.players) == 1 else \
+                'Jugando' if len(table.players) == 2 else \
+                'Disponible'
+        return {
+            'id': table.id,
+            'available': table.available,
+            'players': len(table.players),
+            'status': status,
+            'size': table.size,
+            'win': table.win
+        }
+
+    def snapshot(self):
+        #Foto de las salas no finalizadas; solo se reconstruye si cambió la versión
+        cache = self.snapshot_cache
+        if cache is None or cache[0] != self.version:
             tables_info = []
-            for table in self.tables:
+            for table in self.tables.values():
                 if table.winner is not None:
                     continue  # No mostrar salas finalizadas
-                status = 'Esperando' if len(table.players) == 1 else \
-                        'Jugando' if len(table.players) == 2 else \
-                        'Disponible'
-                tables_info.append({
-                    'id': table.id,
-                    'available': table.available,
-                    'players': len(table.players),
-                    'status': status
-                })
-            print(f"Información de salas: {tables_info}")  
-            return tables_info
+                tables_info.append(self.table_info(table))
+            cache = self.snapshot_cache = (self.version, tables_info, json.dumps(tables_info))
+            Game.encodes += 1
+        return cache
+
+    def page(self, status=None, cursor=0, limit=50):
+        #Hasta limit salas (de un estado, o esperando y jugando) con ID mayor que cursor, en orden de ID.
+        #Retorna (salas, hay_más); mientras no cambie ninguna sala, el coste depende del tamaño de la página, no del total
+        lists = [self.sorted_ids(status)] if status else [self.sorted_ids(name) for name in LISTED]
+        heads = []
+        for ids in lists:
+            start = bisect_right(ids, cursor)
+            heads.append(ids[start:start + limit + 1])
+        ids = list(islice(merge(*heads), limit + 1))
+        return [self.table_info(self.tables[table_id]) for table_id in ids[:limit]], len(ids) > limit
+
+    def get_tables_info(self):
+        #Obtiene información de todas las salas disponibles, excluyendo las finalizadas
+        return self.snapshot()[1]
 
     def get_table(self, table_id):
-        #Obtiene una sala específica por su ID
-        with self.lock:
-            return next((table for table in self.tables if table.id == table_id), None)
+        #Obtiene una sala específica por su ID; None también si el ID no es un entero (p. ej. una lista o true del cliente)
+        if not isinstance(table_id, int) or isinstance(table_id, bool):
+            return None
+        return self.tables.get(table_id)
 
     def to_json(self):
         #Convierte el estado del juego a formato JSON
-        with self.lock:
-            return json.dumps({
-                'tables': self.get_tables_info()
-            })
+        return f'{{"tables": {self.snapshot()[2]}}}'
 
     def remove_finished_tables(self):
         #Elimina todas las salas que ya han finalizado
-        with self.lock:
-            self.tables = [table for table in self.tables if table.winner is None]
\ No newline at end of file
+        finished = [self.unindex(table_id) for table_id in list(self.indexes['finished'])]
+        for table in finished:
+            self.notify('removed', table)
\ No newline at end of file
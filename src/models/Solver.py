@@ -0,0 +1,103 @@
+"""
+Solución completa del Tres en Raya para el bot del servidor.
+
+Todas las posiciones alcanzables se resuelven una vez con minimax y se guardan
+en forma canónica (bajo las 8 simetrías del tablero), de modo que la jugada del
+bot es una búsqueda en un diccionario. La tabla puede generarse al arrancar o
+cargarse desde un fichero generado con `python -m models.Solver <fichero>` (desde src/).
+"""
+
+import json
+import random
+import sys
+
+from models.Board import FULL_MASK, WINNING
+
+# Simetrías del tablero como permutaciones de casillas: casilla i -> SYMMETRIES[s][i]
+def _rotate(cells):
+    return [cells[6], cells[3], cells[0], cells[7], cells[4], cells[1], cells[8], cells[5], cells[2]]
+
+def _symmetries():
+    identity = list(range(9))
+    result = []
+    cells = identity
+    for _ in range(4):
+        result.append(cells)
+        result.append([cells[2 - i % 3 + i // 3 * 3] for i in identity])  # Espejo horizontal
+        cells = _rotate(cells)
+    # Forma "origen -> destino" a partir de "destino <- origen"
+    return tuple(tuple(perm.index(i) for i in identity) for perm in result)
+
+SYMMETRIES = _symmetries()
+INVERSES = tuple(tuple(perm.index(i) for i in range(9)) for perm in SYMMETRIES)
+# MASK_MAPS[s][m]: máscara m transformada por la simetría s
+MASK_MAPS = tuple(
+    tuple(sum(1 << perm[i] for i in range(9) if m >> i & 1) for m in range(1 << 9))
+    for perm in SYMMETRIES
+)
+
+DIFFICULTIES = {'easy': 0.6, 'medium': 0.25, 'hard': 0.0}  # Probabilidad de jugar al azar
+
+
+def canonical(x, o):
+    #Retorna (clave canónica, simetría usada)
+    return min(((MASK_MAPS[s][x], MASK_MAPS[s][o]), s) for s in range(8))
+
+
+class Solver:
+    def __init__(self, table=None):
+        self.table = table if table is not None else {}  # {(x, o) canónica: (mejores jugadas, valor)}
+        if table is None:
+            self.solve(0, 0)
+
+    def solve(self, x, o):
+        #Minimax: valor para el jugador que mueve (1 gana, 0 empate, -1 pierde)
+        key, _ = canonical(x, o)
+        entry = self.table.get(key)
+        if entry is not None:
+            return entry[1]
+        x, o = key
+        to_move_x = bin(x).count('1') == bin(o).count('1')
+        occupied = x | o
+        best, best_moves = -2, []
+        for cell in range(9):
+            bit = 1 << cell
+            if occupied & bit:
+                continue
+            mine = (x if to_move_x else o) | bit
+            if WINNING[mine]:
+                value = 1
+            elif occupied | bit == FULL_MASK:
+                value = 0
+            else:
+                value = -(self.solve(mine, o) if to_move_x else self.solve(x, mine))
+            if value > best:
+                best, best_moves = value, [cell]
+            elif value == best:
+                best_moves.append(cell)
+        self.table[key] = (tuple(best_moves), best)
+        return best
+
+    def best_move(self, x, o, difficulty='hard', rng=random):
+        #Jugada para la posición (x, o) del jugador al que le toca, o None si la partida terminó
+        occupied = x | o
+        if occupied == FULL_MASK or WINNING[x] or WINNING[o]:
+            return None
+        if rng.random() < DIFFICULTIES.get(difficulty, 0.0):
+            return rng.choice([cell for cell in range(9) if not occupied >> cell & 1])
+        key, symmetry = canonical(x, o)
+        moves, _ = self.table[key]
+        return INVERSES[symmetry][rng.choice(moves)]
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump([[x, o, list(moves), value] for (x, o), (moves, value) in self.table.items()], f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls({(x, o): (tuple(moves), value) for x, o, moves, value in json.load(f)})
+
+
+if __name__ == '__main__':
+    Solver().save(sys.argv[1] if len(sys.argv) > 1 else 'solver.json')
\ No newline at end of file
@@ -1,130 +1,227 @@
 """
 Modelo que representa una sala de juego individual.
+
+Solo se usa desde el bucle de asyncio; las órdenes de cada sala se ejecutan
+en orden a través de su buzón (ver actor.py), sin locks.
+
+Con cientos de miles de salas abiertas cada una lleva __slots__ en lugar de
+__dict__, las salas sin espectadores comparten un conjunto vacío y los
+movimientos (casilla, símbolo) son tuplas compartidas por todas las salas.
 """
 
-import threading
 import json
-import time  # Para simular la ejecución continua del hilo
+from models.Board import BitBoard, MAX_SIZE
+from actor import Mailbox
+from protocol import Frame
+
+NO_SPECTATORS = frozenset()  # Espectadores de las salas que no tienen ninguno
+MOVES = {symbol: tuple((index, symbol) for index in range(MAX_SIZE * MAX_SIZE)) for symbol in 'XO'}
 
 class Table:
-    def __init__(self, _id):
+    __slots__ = ('id', 'board', 'available', 'players', 'player_sockets', 'spectators', 'winner', 'turn', 'mailbox',
+                 'on_event', 'bot', 'moves', 'tokens', 'version', 'snapshot_cache', 'move_cache', 'deadline')
+
+    encodes = 0  # Número total de estados serializados (todas las salas)
+
+    def __init__(self, _id, on_event=None, board_class=BitBoard, size=3, win=3):
         self.id = _id
-        self.game_board = [' ' for _ in range(9)]
+        self.board = board_class(size, win)  # Motor de tablero (BitBoard o ListBoard) de size×size, win en raya
         self.available = True
         self.players = []
         self.player_sockets = {}
+        self.spectators = NO_SPECTATORS  # WebSockets que siguen la partida con WATCH_TABLE (ver watch)
         self.winner = None
         self.turn = 'X'
-        self.lock = threading.Lock()  # Lock para sincronización
-        self.running = False  # Indica si el hilo de la sala está activo
-        self.thread = None  # Hilo de la sala
-
-    def start_thread(self):
-        #Inicia el hilo de la sala
-        self.running = True
-        self.thread = threading.Thread(target=self.run)
-        self.thread.start()
-
-    def stop_thread(self):
-        #Detiene el hilo de la sala
-        self.running = False
-        if self.thread:
-            self.thread.join()
-
-    def run(self):
-        #Lógica que se ejecuta en el hilo de la sala
-        while self.running:
-            with self.lock:
-                if self.winner:
-                    self.running = False  # Detener el hilo si el juego ha terminado
-            time.sleep(1)  # Simula un ciclo de ejecución
-    
+        self.mailbox = Mailbox()  # Órdenes pendientes de la sala, ejecutadas de una en una
+        self.on_event = on_event  # Callback de ciclo de vida: on_event(evento, sala)
+        self.bot = None  # Dificultad del bot del servidor si juega como O, o None
+        self.moves = []  # [(casilla, símbolo)] en orden
+        self.tokens = {}  # {player_id: token para recuperar el asiento tras un reinicio}
+        self.version = 0  # Se incrementa con cada cambio de estado
+        self.snapshot_cache = None  # (versión, estado, estado en JSON, {tipo: Frame})
+        self.move_cache = None  # (versión, Frame del último movimiento)
+        self.deadline = None  # Timer del plazo de turno o de abandono (ver timers.py)
+
+    @property
+    def game_board(self):
+        #Tablero como lista de size×size cadenas, tal como lo espera el protocolo
+        return self.board.cells()
+
+    @property
+    def size(self):
+        return self.board.geometry.size
+
+    @property
+    def win(self):
+        return self.board.geometry.win
+
+    def watch(self, websocket):
+        #Añade un espectador; el conjunto propio de la sala se crea con el primero
+        if self.spectators is NO_SPECTATORS:
+            self.spectators = set()
+        self.spectators.add(websocket)
+
+    def unwatch(self, websocket):
+        #Quita un espectador; sin ninguno, la sala vuelve al conjunto vacío compartido
+        if self.spectators:
+            self.spectators.discard(websocket)
+            if not self.spectators:
+                self.spectators = NO_SPECTATORS
+
+    def emit(self, event):
+        #Notifica un evento del ciclo de vida ('joined', 'left', 'started', 'finished', 'emptied')
+        if self.on_event:
+            self.on_event(event, self)
+
     def add_player(self, player_id, websocket):
         #Añade un jugador a la sala y almacena su WebSocket
-        with self.lock:
-            if len(self.players) < 2:
-                self.players.append(player_id)
-                self.player_sockets[player_id] = websocket
-                
-                # La sala se vuelve no disponible cuando está llena
-                if len(self.players) == 2:
-                    self.available = False
-                return True
+        if len(self.players) < 2:
+            self.players.append(player_id)
+            self.player_sockets[player_id] = websocket
+            self.version += 1
+            
+            # La sala se vuelve no disponible cuando está llena
+            started = len(self.players) == 2
+            if started:
+                self.available = False
+        else:
             return False
+        self.emit('joined')
+        if started:
+            self.emit('started')
+        return True
 
     def remove_player(self, player_id):
         #Elimina un jugador de la sala
-        with self.lock:
-            if player_id in self.players:
-                self.players.remove(player_id)
-                del self.player_sockets[player_id]
-                self.available = True
-                return True
+        if player_id not in self.players:
             return False
+        self.players.remove(player_id)
+        del self.player_sockets[player_id]
+        self.available = True
+        self.version += 1
+        emptied = len(self.players) == 0
+        self.emit('left')
+        if emptied:
+            self.emit('emptied')
+        return True
+
+    def replace_player(self, old_id, player_id, websocket):
+        #Entrega el asiento de old_id a otro jugador sin alterar el orden (X/O) ni la partida
+        if old_id not in self.players:
+            return False
+        self.players[self.players.index(old_id)] = player_id
+        del self.player_sockets[old_id]
+        self.player_sockets[player_id] = websocket
+        if old_id in self.tokens:
+            self.tokens[player_id] = self.tokens.pop(old_id)
+        self.version += 1
+        self.emit('joined')
+        return True
+
+    def replay(self, moves):
+        #Rehace una secuencia de movimientos [(casilla, símbolo)] al restaurar la sala
+        for index, symbol in moves:
+            winner = self.board.place(index, symbol)
+            self.moves.append(MOVES[symbol][index])
+            if winner:
+                self.winner = winner
+                self.available = False
+            else:
+                self.turn = 'O' if symbol == 'X' else 'X'
+        self.version += 1
 
     def make_move(self, index, player_id):
         #Permite marcar solo si es el turno del jugador correspondiente. Si solo hay un jugador, solo puede marcar X
-        with self.lock:
-            if 0 <= index < 9 and self.game_board[index] == ' ':
-                # Determinar el símbolo del jugador
-                if len(self.players) == 1:
-                    # Solo hay un jugador, solo puede marcar X
-                    if self.turn != 'X' or self.players[0] != player_id:
-                        return False
-                    symbol = 'X'
-                else:
-                    # Dos jugadores: el primero es X, el segundo es O
-                    if self.players[0] == player_id and self.turn == 'X':
-                        symbol = 'X'
-                    elif self.players[1] == player_id and self.turn == 'O':
-                        symbol = 'O'
-                    else:
-                        return False
-                self.game_board[index] = symbol
-                winner = self.check_winner()
-                if winner:
-                    self.winner = winner
-                    self.available = False
-                else:
-                    self.turn = 'O' if self.turn == 'X' else 'X'
-                return True
+        if not (isinstance(index, int) and 0 <= index < self.board.geometry.cells and self.board.is_empty(index)):
             return False
+        # Determinar el símbolo del jugador
+        if len(self.players) == 1:
+            # Solo hay un jugador, solo puede marcar X
+            if self.turn != 'X' or self.players[0] != player_id:
+                return False
+            symbol = 'X'
+        else:
+            # Dos jugadores: el primero es X, el segundo es O
+            if self.players[0] == player_id and self.turn == 'X':
+                symbol = 'X'
+            elif self.players[1] == player_id and self.turn == 'O':
+                symbol = 'O'
+            else:
+                return False
+        winner = self.board.place(index, symbol)
+        self.moves.append(MOVES[symbol][index])
+        self.version += 1
+        if winner:
+            self.winner = winner
+            self.available = False
+            self.emit('finished')
+        else:
+            self.turn = 'O' if self.turn == 'X' else 'X'
+        return True
+
+    def forfeit(self, player_id):
+        #Da la partida por perdida al jugador (p. ej. al agotar su turno); gana el rival
+        if self.winner or len(self.players) < 2 or player_id not in self.players:
+            return False
+        self.winner = 'O' if self.players[0] == player_id else 'X'
+        self.available = False
+        self.version += 1
+        self.emit('finished')
+        return True
 
     def check_winner(self):
         #Verifica si hay un ganador y retorna 'X', 'O', o 'Draw'
-        #Filas-Columnas-Diagonales
-        winning_combinations = [
-            [0, 1, 2], [3, 4, 5], [6, 7, 8],  
-            [0, 3, 6], [1, 4, 7], [2, 5, 8], 
-            [0, 4, 8], [2, 4, 6]              
-        ]
-        
-        for combo in winning_combinations:
-            if (self.game_board[combo[0]] == self.game_board[combo[1]] == 
-                self.game_board[combo[2]] != ' '):
-                return self.game_board[combo[0]]
-
-        if ' ' not in self.game_board:
-            return 'Draw'
-
-        return None
+        return self.board.winner()
 
-    def get_state(self):
-        #Obtiene el estado actual de la sala
-        with self.lock:
-            return {
+    def snapshot(self):
+        #Foto inmutable del estado; solo se reconstruye y serializa si cambió la versión
+        cache = self.snapshot_cache
+        if cache is None or cache[0] != self.version:
+            state = {
                 'id': self.id,
                 'board': self.game_board,
+                'size': self.size,
+                'win': self.win,
                 'turn': self.turn,
                 'winner': self.winner,
                 'players': len(self.players),
                 'available': self.available
             }
+            cache = self.snapshot_cache = (self.version, state, json.dumps(state), {})
+            Table.encodes += 1
+        return cache
+
+    def get_state(self):
+        #Obtiene el estado actual de la sala (no debe modificarse: es compartido)
+        return self.snapshot()[1]
+
+    def frame(self, kind):
+        #Mensaje {'type': kind, 'table': estado}, codificado una sola vez para todos los destinatarios
+        _, state, encoded, frames = self.snapshot()
+        frame = frames.get(kind)
+        if frame is None:
+            frame = frames[kind] = Frame({'type': kind, 'table': state},
+                                         f'{{"type": {json.dumps(kind)}, "table": {encoded}}}')
+        return frame
+
+    def move_frame(self):
+        #Último movimiento como delta {'type': 'table_move'}: no crece con el tablero, a diferencia del estado
+        cache = self.move_cache
+        if cache is None or cache[0] != self.version:
+            position, symbol = self.moves[-1]
+            cache = self.move_cache = (self.version, Frame({
+                'type': 'table_move',
+                'table_id': self.id,
+                'position': position,
+                'symbol': symbol,
+                'turn': self.turn,
+                'winner': self.winner
+            }))
+        return cache[1]
 
     def to_json(self):
         #Convierte el estado de la sala a formato JSON
-        with self.lock:
-            return json.dumps(self.get_state())
+        return self.snapshot()[2]
 
     """def reset(self):
         #Reinicia el estado de la sala para una nueva partida.
@@ -0,0 +1,89 @@
+"""
+Cola de salida acotada por conexión, vaciada por su propia tarea de escritura,
+para que un cliente lento no retrase los envíos al resto.
+
+La cola y la tarea solo existen mientras hay algo pendiente: una conexión
+inactiva no tiene reservada ni una deque ni una corrutina esperando.
+"""
+
+import asyncio
+from collections import deque
+
+import websockets.exceptions
+
+from metrics import BYTES_SENT, MESSAGES_SENT
+
+# Tipos de mensaje: 'game' nunca se descarta; 'lobby' y 'spectate' pueden ser reemplazados por uno
+# más reciente del mismo tipo (un espectador lento solo recibe el último tablero). 'reply' tampoco se
+# descarta, pero no entra en la sesión del cliente: son respuestas (páginas, fotos del lobby) que el
+# cliente vuelve a pedir al reconectar, así que no se repiten
+GAME = 'game'
+LOBBY = 'lobby'
+SPECTATE = 'spectate'
+REPLY = 'reply'
+
+def wire_size(message):
+    #Bytes del mensaje en la red: un texto JSON con tildes o eñes ocupa más bytes que caracteres
+    if isinstance(message, str) and not message.isascii():  # isascii no recorre el texto en CPython
+        return len(message.encode())
+    return len(message)
+
+class Outbox:
+    __slots__ = ('websocket', 'maxsize', 'drop_superseded_lobby', 'on_overflow', 'queue', 'closed', 'dropped',
+                 'writer')
+
+    def __init__(self, websocket, maxsize=256, drop_superseded_lobby=True, on_overflow='disconnect'):
+        self.websocket = websocket
+        self.maxsize = maxsize
+        self.drop_superseded_lobby = drop_superseded_lobby
+        self.on_overflow = on_overflow  # 'disconnect' o 'drop' (solo mensajes del lobby y de espectador)
+        self.queue = None  # [(tipo, mensaje)], o None si no hay nada pendiente
+        self.closed = False
+        self.dropped = 0
+        self.writer = None  # Tarea que vacía la cola, o None si no hay nada pendiente
+
+    def send(self, message, kind=GAME):
+        #Encola un mensaje sin esperar a la red; retorna False si se descartó
+        if self.closed:
+            return False
+        if self.queue and (kind == SPECTATE or kind == LOBBY and self.drop_superseded_lobby):
+            # El cliente ni siquiera ha leído la actualización anterior: se reemplaza
+            pending = len(self.queue)
+            self.queue = deque(item for item in self.queue if item[0] != kind)
+            self.dropped += pending - len(self.queue)
+        if self.queue and len(self.queue) >= self.maxsize:
+            self.dropped += 1
+            # Con 'drop' solo se pierden mensajes reemplazables: un hueco en los de partida no se recupera ni
+            # reanudando la sesión, así que con esos se desconecta al cliente igualmente
+            if self.on_overflow == 'disconnect' or kind not in (LOBBY, SPECTATE):
+                self.close()
+                asyncio.get_running_loop().create_task(self.websocket.close(1008, 'Cola de salida llena'))
+            return False
+        if self.queue is None:
+            self.queue = deque()
+        self.queue.append((kind, message))
+        if self.writer is None:
+            self.writer = asyncio.get_running_loop().create_task(self.run())
+        return True
+
+    async def run(self):
+        #Tarea de escritura: envía los mensajes en orden y termina cuando la cola se vacía
+        try:
+            while self.queue:
+                _, message = self.queue.popleft()
+                await self.websocket.send(message)
+                MESSAGES_SENT.inc()
+                BYTES_SENT.inc(wire_size(message))
+            self.queue = None
+        except websockets.exceptions.ConnectionClosed:
+            self.close()
+        finally:
+            if self.writer is asyncio.current_task():
+                self.writer = None
+
+    def close(self):
+        #Detiene la tarea de escritura y descarta lo pendiente
+        self.closed = True
+        self.queue = None
+        if self.writer is not None and self.writer is not asyncio.current_task():
+            self.writer.cancel()
\ No newline at end of file
@@ -0,0 +1,326 @@
+"""
+Codificación de los mensajes entre cliente y servidor.
+
+JSON es el protocolo por defecto. Si el cliente negocia el subprotocolo
+BINARY_SUBPROTOCOL en el handshake, los mensajes usan un formato binario de
+campos fijos: comandos y salas como enteros pequeños y el tablero como dos
+máscaras de bits (una por jugador, de N×N bits).
+
+Tras cada movimiento los jugadores reciben solo el delta (table_move: casilla,
+símbolo, turno y ganador) en lugar del tablero completo; el estado entero se
+envía al unirse, al empezar y al terminar la partida. apply_move reconstruye
+el estado en el cliente.
+
+Los mensajes de partida que forman parte de la sesión del cliente llevan un
+número de secuencia (ver number_message), con el que el cliente indica al
+reconectar cuál fue el último que recibió.
+
+Un comando rechazado por el control de admisión (ver admission.py) recibe un
+mensaje busy con el comando, el motivo y los segundos que conviene esperar
+antes de reintentarlo; el comando no ha tenido ningún efecto.
+"""
+
+import json
+import struct
+
+BINARY_SUBPROTOCOL = 'tres-en-raya.bin.v2'
+JSON = 'json'
+BINARY = 'binary'
+
+# Comandos cliente -> servidor
+COMMANDS = ('CREATE_TABLE', 'JOIN_TABLE', 'MAKE_MOVE', 'GET_TABLES', 'SUBSCRIBE_LOBBY', 'UNSUBSCRIBE_LOBBY',
+            'PLAY_VS_BOT', 'RESUME_SEAT', 'QUICK_MATCH', 'CANCEL_MATCH', 'WATCH_TABLE', 'UNWATCH_TABLE')
+COMMAND_CODES = {command: code for code, command in enumerate(COMMANDS, 1)}
+BOT_DIFFICULTIES = ('easy', 'medium', 'hard')
+
+# Mensajes servidor -> cliente
+TYPES = ('table_joined', 'table_state', 'game_start', 'game_end', 'error', 'tables', 'lobby_snapshot', 'lobby_delta',
+         'seat_token', 'match_queued', 'session', 'table_move', 'busy')
+TYPE_CODES = {kind: code for code, kind in enumerate(TYPES, 1)}
+TABLE_TYPES = ('table_joined', 'table_state', 'game_start', 'game_end')
+LOBBY_EVENTS = ('table_added', 'table_updated', 'table_removed')
+LOBBY_EVENT_CODES = {kind: code for code, kind in enumerate(LOBBY_EVENTS, 1)}
+WINNERS = (None, 'X', 'O', 'Draw')
+WINNER_CODES = {winner: code for code, winner in enumerate(WINNERS)}
+PAGE_STATUSES = (None, 'waiting', 'playing')  # Filtros de GET_TABLES
+BUSY_REASONS = ('rate', 'overload')  # Límite de la conexión superado, o servidor atrasado
+BUSY_MESSAGES = {'rate': 'Demasiadas órdenes seguidas, espera un momento.',
+                 'overload': 'Servidor ocupado, inténtalo más tarde.'}
+
+COMMAND = struct.Struct('<B')
+CREATE_COMMAND = struct.Struct('<BBB')  # CREATE_TABLE: lado del tablero, fichas en raya
+TABLE_COMMAND = struct.Struct('<BI')  # JOIN_TABLE, WATCH_TABLE
+MOVE_COMMAND = struct.Struct('<BIB')  # MAKE_MOVE
+BOT_COMMAND = struct.Struct('<BB')  # PLAY_VS_BOT: dificultad
+RESUME_COMMAND = struct.Struct('<B16s')  # RESUME_SEAT: token
+MATCH_COMMAND = struct.Struct('<BB')  # QUICK_MATCH: cubo
+PAGE_COMMAND = struct.Struct('<BBHI')  # GET_TABLES paginado: estado, tamaño de página, cursor
+SUBSCRIBE_COMMAND = struct.Struct('<BB')  # SUBSCRIBE_LOBBY: con foto completa o no
+TABLE = struct.Struct('<BIBBBBBB')  # tipo, id, lado, en raya, turno, ganador, jugadores, disponible; siguen las máscaras X y O
+MOVE = struct.Struct('<BIBBBB')  # tipo, id de sala, casilla, símbolo, turno, ganador
+ROW = struct.Struct('<IBBBB')  # id, jugadores, disponible, lado, en raya
+TABLES = struct.Struct('<BII')  # tipo, siguiente cursor (0 si no hay más), número de filas
+LOBBY_SNAPSHOT = struct.Struct('<BII')  # tipo, seq, número de filas
+LOBBY_DELTA = struct.Struct('<BIH')  # tipo, seq, número de eventos
+SEAT_TOKEN = struct.Struct('<BI16s')  # tipo, id de sala, token
+SESSION = struct.Struct('<B16sIB')  # tipo, token de sesión, último número de secuencia, reanudada
+BUSY = struct.Struct('<BBBH')  # tipo, comando (0 si es desconocido), motivo, milisegundos hasta reintentar
+SEQ = struct.Struct('<I')  # Número de secuencia de sesión, tras el tipo si este lleva SEQ_FLAG
+SEQ_FLAG = 0x80
+TABLE_ID = struct.Struct('<I')
+TYPE = struct.Struct('<B')
+
+
+class Frame:
+    #Mensaje saliente que se codifica como mucho una vez por protocolo
+    __slots__ = ('data', 'encoded')
+
+    def __init__(self, data, json_text=None):
+        self.data = data
+        self.encoded = {JSON: json_text} if json_text is not None else {}
+
+    def encode(self, encoding):
+        message = self.encoded.get(encoding)
+        if message is None:
+            message = self.encoded[encoding] = ENCODERS[encoding](self.data)
+        return message
+
+
+def number_message(message, seq):
+    #Añade el número de secuencia de sesión a un mensaje ya codificado, sin volver a serializarlo
+    if isinstance(message, str):
+        return f'{{"session_seq": {seq}, {message[1:]}'
+    return bytes((message[0] | SEQ_FLAG,)) + SEQ.pack(seq) + message[1:]
+
+
+def board_masks(board):
+    #Convierte la lista de casillas en dos máscaras de bits (X, O)
+    x = o = 0
+    for i, cell in enumerate(board):
+        if cell == 'X':
+            x |= 1 << i
+        elif cell == 'O':
+            o |= 1 << i
+    return x, o
+
+
+def mask_board(x, o, size=9):
+    return ['X' if x >> i & 1 else 'O' if o >> i & 1 else ' ' for i in range(size)]
+
+
+def mask_bytes(size):
+    #Bytes de cada máscara de un tablero size×size en el formato binario
+    return (size * size + 7) // 8
+
+
+def apply_move(table, move):
+    #Estado de la sala tras un delta table_move; retorna una copia, sin tocar el estado anterior
+    board = list(table['board'])
+    board[move['position']] = move['symbol']
+    return dict(table, board=board, turn=move['turn'], winner=move['winner'],
+                available=table['available'] and not move['winner'])
+
+
+def lobby_status(players):
+    #Mismo texto de estado que Game.table_info
+    return 'Esperando' if players == 1 else 'Jugando' if players == 2 else 'Disponible'
+
+
+def encode_row(info):
+    return ROW.pack(info['id'], info['players'], info['available'], info['size'], info['win'])
+
+
+def decode_row(message, offset):
+    table_id, players, available, size, win = ROW.unpack_from(message, offset)
+    return {'id': table_id, 'available': bool(available), 'players': players, 'status': lobby_status(players),
+            'size': size, 'win': win}
+
+
+def encode_binary(data):
+    #Codifica un mensaje del servidor en binario
+    kind = data['type']
+    code = TYPE_CODES[kind]
+    if kind in TABLE_TYPES:
+        table = data['table']
+        x, o = board_masks(table['board'])
+        width = mask_bytes(table['size'])
+        return TABLE.pack(code, table['id'], table['size'], table['win'], table['turn'] == 'O',
+                          WINNER_CODES[table['winner']], table['players'], table['available']) + \
+            x.to_bytes(width, 'little') + o.to_bytes(width, 'little')
+    if kind == 'table_move':
+        return MOVE.pack(code, data['table_id'], data['position'], data['symbol'] == 'O', data['turn'] == 'O',
+                         WINNER_CODES[data['winner']])
+    if kind == 'error':
+        return TYPE.pack(code) + data['message'].encode('utf-8')
+    if kind == 'match_queued':
+        return TYPE.pack(code)
+    if kind == 'tables':
+        return TABLES.pack(code, data.get('cursor') or 0, len(data['tables'])) + \
+            b''.join(encode_row(info) for info in data['tables'])
+    if kind == 'lobby_snapshot':
+        return LOBBY_SNAPSHOT.pack(code, data['seq'], len(data['tables'])) + \
+            b''.join(encode_row(info) for info in data['tables'])
+    if kind == 'lobby_delta':
+        parts = [LOBBY_DELTA.pack(code, data['seq'], len(data['events']))]
+        for event in data['events']:
+            parts.append(TYPE.pack(LOBBY_EVENT_CODES[event['type']]))
+            if event['type'] == 'table_removed':
+                parts.append(TABLE_ID.pack(event['id']))
+            else:
+                parts.append(encode_row(event['table']))
+        return b''.join(parts)
+    if kind == 'seat_token':
+        return SEAT_TOKEN.pack(code, data['table_id'], bytes.fromhex(data['token']))
+    if kind == 'session':
+        return SESSION.pack(code, bytes.fromhex(data['session']), data['seq'], data['resumed'])
+    if kind == 'busy':
+        return BUSY.pack(code, COMMAND_CODES.get(data['command'], 0), BUSY_REASONS.index(data['reason']),
+                         min(round(data['retry_after'] * 1000), 0xFFFF))
+    raise ValueError(f'Tipo de mensaje sin formato binario: {kind}')
+
+
+def decode_binary(message):
+    #Decodifica un mensaje binario del servidor al mismo diccionario que el JSON
+    if message[0] & SEQ_FLAG:
+        seq, = SEQ.unpack_from(message, 1)
+        data = decode_binary(bytes((message[0] & ~SEQ_FLAG,)) + message[1 + SEQ.size:])
+        data['session_seq'] = seq
+        return data
+    kind = TYPES[message[0] - 1]
+    if kind in TABLE_TYPES:
+        _, table_id, size, win, turn, winner, players, available = TABLE.unpack_from(message)
+        width = mask_bytes(size)
+        if len(message) != TABLE.size + 2 * width:
+            raise struct.error('Longitud de máscaras incorrecta')
+        x = int.from_bytes(message[TABLE.size:TABLE.size + width], 'little')
+        o = int.from_bytes(message[TABLE.size + width:], 'little')
+        return {'type': kind, 'table': {
+            'id': table_id,
+            'board': mask_board(x, o, size * size),
+            'size': size,
+            'win': win,
+            'turn': 'O' if turn else 'X',
+            'winner': WINNERS[winner],
+            'players': players,
+            'available': bool(available)
+        }}
+    if kind == 'table_move':
+        _, table_id, position, symbol, turn, winner = MOVE.unpack(message)
+        return {'type': kind, 'table_id': table_id, 'position': position, 'symbol': 'O' if symbol else 'X',
+                'turn': 'O' if turn else 'X', 'winner': WINNERS[winner]}
+    if kind == 'error':
+        return {'type': kind, 'message': message[1:].decode('utf-8')}
+    if kind == 'match_queued':
+        return {'type': kind}
+    if kind == 'tables':
+        _, cursor, count = TABLES.unpack_from(message)
+        offset = TABLES.size
+        return {'type': kind, 'cursor': cursor or None,
+                'tables': [decode_row(message, offset + i * ROW.size) for i in range(count)]}
+    if kind == 'lobby_snapshot':
+        _, seq, count = LOBBY_SNAPSHOT.unpack_from(message)
+        offset = LOBBY_SNAPSHOT.size
+        return {'type': kind, 'seq': seq,
+                'tables': [decode_row(message, offset + i * ROW.size) for i in range(count)]}
+    if kind == 'seat_token':
+        _, table_id, token = SEAT_TOKEN.unpack(message)
+        return {'type': kind, 'table_id': table_id, 'token': token.hex()}
+    if kind == 'session':
+        _, token, seq, resumed = SESSION.unpack(message)
+        return {'type': kind, 'session': token.hex(), 'seq': seq, 'resumed': bool(resumed)}
+    if kind == 'busy':
+        _, command, reason, retry_after = BUSY.unpack(message)
+        return {'type': kind, 'command': COMMANDS[command - 1] if command else None, 'reason': BUSY_REASONS[reason],
+                'retry_after': retry_after / 1000, 'message': BUSY_MESSAGES[BUSY_REASONS[reason]]}
+    _, seq, count = LOBBY_DELTA.unpack_from(message)
+    offset = LOBBY_DELTA.size
+    events = []
+    for _ in range(count):
+        event = LOBBY_EVENTS[message[offset] - 1]
+        offset += TYPE.size
+        if event == 'table_removed':
+            events.append({'type': event, 'id': TABLE_ID.unpack_from(message, offset)[0]})
+            offset += TABLE_ID.size
+        else:
+            events.append({'type': event, 'table': decode_row(message, offset)})
+            offset += ROW.size
+    return {'type': kind, 'seq': seq, 'events': events}
+
+
+def encode_command(data, encoding=JSON):
+    #Codifica un comando del cliente
+    if encoding == JSON:
+        return json.dumps(data)
+    command = data['command']
+    code = COMMAND_CODES[command]
+    if command in ('JOIN_TABLE', 'WATCH_TABLE'):
+        return TABLE_COMMAND.pack(code, data['table_id'])
+    if command == 'CREATE_TABLE' and 'size' in data:
+        return CREATE_COMMAND.pack(code, data['size'], data.get('win') or 0)  # 0: en raya por defecto
+    if command == 'MAKE_MOVE':
+        return MOVE_COMMAND.pack(code, data['table_id'], data['position'])
+    if command == 'PLAY_VS_BOT':
+        return BOT_COMMAND.pack(code, BOT_DIFFICULTIES.index(data.get('difficulty', 'hard')))
+    if command == 'RESUME_SEAT':
+        return RESUME_COMMAND.pack(code, bytes.fromhex(data['token']))
+    if command == 'QUICK_MATCH':
+        return MATCH_COMMAND.pack(code, data.get('bucket', 0))
+    if command == 'GET_TABLES' and 'limit' in data:
+        return PAGE_COMMAND.pack(code, PAGE_STATUSES.index(data.get('status')), data['limit'],
+                                 data.get('cursor') or 0)
+    if command == 'SUBSCRIBE_LOBBY' and 'snapshot' in data:
+        return SUBSCRIBE_COMMAND.pack(code, data['snapshot'])
+    return COMMAND.pack(code)
+
+
+def decode_command(message):
+    #Decodifica un comando del cliente (texto JSON o binario); lanza ValueError si es inválido
+    if isinstance(message, str):
+        data = json.loads(message)
+        if not isinstance(data, dict):
+            raise ValueError('El comando JSON debe ser un objeto')
+        return data
+    if not message or not 0 < message[0] <= len(COMMANDS):
+        raise ValueError('Comando binario desconocido')
+    command = COMMANDS[message[0] - 1]
+    try:
+        if command in ('JOIN_TABLE', 'WATCH_TABLE'):
+            _, table_id = TABLE_COMMAND.unpack(message)
+            return {'command': command, 'table_id': table_id}
+        if command == 'CREATE_TABLE' and len(message) > COMMAND.size:
+            _, size, win = CREATE_COMMAND.unpack(message)
+            return {'command': command, 'size': size, 'win': win} if win else {'command': command, 'size': size}
+        if command == 'MAKE_MOVE':
+            _, table_id, position = MOVE_COMMAND.unpack(message)
+            return {'command': command, 'table_id': table_id, 'position': position}
+        if command == 'PLAY_VS_BOT':
+            _, difficulty = BOT_COMMAND.unpack(message)
+            return {'command': command, 'difficulty': BOT_DIFFICULTIES[difficulty]}
+        if command == 'RESUME_SEAT':
+            _, token = RESUME_COMMAND.unpack(message)
+            return {'command': command, 'token': token.hex()}
+        if command == 'QUICK_MATCH':
+            _, bucket = MATCH_COMMAND.unpack(message)
+            return {'command': command, 'bucket': bucket}
+        if command == 'GET_TABLES' and len(message) > COMMAND.size:
+            _, status, limit, cursor = PAGE_COMMAND.unpack(message)
+            return {'command': command, 'status': PAGE_STATUSES[status], 'limit': limit, 'cursor': cursor}
+        if command == 'SUBSCRIBE_LOBBY' and len(message) > COMMAND.size:
+            _, snapshot = SUBSCRIBE_COMMAND.unpack(message)
+            return {'command': command, 'snapshot': bool(snapshot)}
+    except (struct.error, IndexError) as e:
+        raise ValueError(str(e))
+    return {'command': command}
+
+
+def decode_message(message):
+    #Decodifica un mensaje del servidor (texto JSON o binario)
+    if isinstance(message, str):
+        return json.loads(message)
+    try:
+        return decode_binary(message)
+    except (IndexError, struct.error) as e:
+        raise ValueError(f'Mensaje binario inválido: {e}')
+
+
+ENCODERS = {JSON: json.dumps, BINARY: encode_binary}
\ No newline at end of file
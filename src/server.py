@@ -2,206 +2,813 @@
 Servidor del juego Tres en Raya que gestiona las conexiones y el estado del juego.
 """
 
+import argparse
 import asyncio
+import itertools
+import os
+import random
+import secrets
+import time
+from collections import deque
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
 import websockets
-import json
 #import threading
 from models.Game import Game
+from models.Table import Table
+from models.Board import default_win, geometry
+from lobby import Lobby
+from matchmaking import Matchmaker
+from outbox import Outbox, GAME, LOBBY, SPECTATE, REPLY
+from session import Session
+from admission import Admission, RATE_LIMITS, SHED_LAG
+from protocol import Frame, BINARY_SUBPROTOCOL, BINARY, JSON, COMMANDS, BOT_DIFFICULTIES, PAGE_STATUSES, BUSY_MESSAGES, \
+    board_masks, decode_command
+from models.Solver import Solver
+from history import GameLog
+from snapshot import Snapshotter, load_snapshot
+from timers import TimingWheel
+import metrics
+
+BOT_PLAYER_ID = 'bot'
+PAGE_SIZE = 50  # Salas por página de GET_TABLES si el cliente no indica otra
+MAX_PAGE_SIZE = 500
+SPECTATOR_BATCH = 10  # Espectadores atendidos antes de ceder el bucle: pocos, para que los jugadores no esperen
+DEADLINE_BATCH = 32  # Plazos de sala vencidos atendidos antes de ceder el bucle
 
 class GameServer:
-    def __init__(self, host='127.0.0.1', port=8765):
+    def __init__(self, host='127.0.0.1', port=8765, outbox_size=256, outbox_overflow='disconnect',
+                 solver_path=None, history_dir=None, snapshot_path=None, snapshot_interval=5.0,
+                 turn_timeout=None, abandon_timeout=None, idle_timeout=None, session_grace=30.0,
+                 max_connections=None, rate_limits=None, shed_lag=None):
         self.host = host
         self.port = port
+        self.solver_path = solver_path  # Tabla generada con `python -m models.Solver`; si no, se calcula al arrancar
+        self.solver = None
+        self.rng = random.Random()
+        self.history = GameLog(history_dir) if history_dir else None  # Log binario de movimientos y resultados
         self.game = Game()
-        self.clients = {}  # {websocket: {'player_id': str, 'table_id': int}}
+        self.snapshots = Snapshotter(self.game, snapshot_path, snapshot_interval) if snapshot_path else None
+        self.seats = {}  # {token: (table_id, player_id)} para RESUME_SEAT
+        self.fanouts = {}  # {table_id: tarea que envía el último estado a los espectadores}
+        self.timers = TimingWheel()  # Todos los plazos (turno, abandono, inactividad) en una sola rueda
+        self.expiring = deque()  # (sala, versión) con el plazo vencido, pendientes de expire_deadline
+        self.expiry_task = None  # Tarea que atiende expiring por tandas, o None si está vacía
+        self.turn_timeout = turn_timeout  # Segundos para mover antes de perder la partida, o None
+        self.abandon_timeout = abandon_timeout  # Segundos sin cambios en una sala a medias antes de cerrarla, o None
+        self.idle_timeout = idle_timeout  # Segundos sin mensajes antes de cerrar la conexión, o None
+        self.session_grace = session_grace  # Segundos que se guarda la sesión (y el asiento) tras desconectarse
+        self.sessions = {}  # {token de sesión: websocket con el que está registrada en clients}
+        self.detached = set()  # WebSockets cerrados cuya sesión sigue en su periodo de gracia
+        self.clients = {}  # {websocket: Session}
+        self.player_ids = itertools.count(1)  # IDs de jugador: enteros pequeños, no str(websocket)
+        self.outbox_size = outbox_size  # Mensajes pendientes por conexión antes de aplicar la política
+        self.outbox_overflow = outbox_overflow  # 'disconnect' o 'drop' (solo lobby y espectadores; ver Outbox)
+        self.max_connections = max_connections  # Conexiones abiertas a la vez antes de rechazar el handshake, o None
+        # Límites por conexión (p. ej. RATE_LIMITS) y descarte por retraso del bucle (SHED_LAG); sin ellos, desactivado
+        self.admission = Admission(rate_limits, shed_lag)
+        self.lobby = Lobby(self.game, self.broadcast_lobby)
+        self.matchmaker = Matchmaker()  # Cola FIFO de QUICK_MATCH por cubo
+        self.sends = 0  # Mensajes encolados hacia clientes
+        self.reuse_port = False  # SO_REUSEPORT, para varios procesos en el mismo puerto
+        self.game.subscribe(self.on_table_event)
+        self.game.subscribe(self.lobby.on_table_event)
+        metrics.CONNECTED_CLIENTS.func = self.connection_count
+        metrics.DETACHED_SESSIONS.func = lambda: len(self.detached)
+        metrics.MATCH_QUEUE.func = lambda: len(self.matchmaker)
+        metrics.TIMERS.func = lambda: len(self.timers)
+        metrics.LOOP_LAG.func = lambda: self.admission.lag
+        metrics.TABLES.func = lambda: {
+            (status,): self.game.count_tables(status) for status in ('waiting', 'playing', 'finished')
+        }
+
+    def connection_count(self):
+        #Conexiones abiertas en este proceso: las sesiones en su periodo de gracia no cuentan
+        return len(self.clients) - len(self.detached)
+
+    def process_request(self, path, request_headers):
+        #Sirve /metrics por HTTP en el mismo puerto; el resto sigue con el handshake WebSocket
+        if path == '/metrics':
+            body = metrics.REGISTRY.render().encode('utf-8')
+            return HTTPStatus.OK, [('Content-Type', 'text/plain; version=0.0.4')], body
+        # Antes del handshake, que es lo que más cuesta de una conexión nueva
+        if self.max_connections is not None and self.connection_count() >= self.max_connections:
+            metrics.REFUSED_CONNECTIONS.labels('full').inc()
+            return HTTPStatus.SERVICE_UNAVAILABLE, [('Retry-After', '1')], 'Servidor lleno\n'.encode('utf-8')
+        if not self.admission.accepting():
+            metrics.REFUSED_CONNECTIONS.labels('overload').inc()
+            return HTTPStatus.SERVICE_UNAVAILABLE, [('Retry-After', '1')], 'Servidor ocupado\n'.encode('utf-8')
+        return None
+
+    def on_table_event(self, event, table):
+        #Gestiona el ciclo de vida de las salas en el bucle de asyncio, sin hilos por sala
+        if event == 'joined':
+            if self.history and len(table.players) == 1 and not table.moves:
+                # La partida empieza con el primer jugador sentado: todo resultado (también el de un
+                # plazo vencido sin movimientos) va después de este registro, con la geometría del tablero
+                self.history.append_start(table.id, table.size, table.win)
+        elif event == 'removed':
+            if table.deadline:
+                table.deadline.cancel()
+            for token in table.tokens.values():
+                self.seats.pop(token, None)
+            # Sus jugadores y espectadores quedan libres para otra sala (QUICK_MATCH, RESUME_SEAT...)
+            for websocket in table.player_sockets.values():
+                client = self.clients.get(websocket)
+                if client and client.table_id == table.id:
+                    client.table_id = None
+            for websocket in table.spectators:
+                client = self.clients.get(websocket)
+                if client and client.watching == table.id:
+                    client.watching = None
+        elif event in ('finished', 'emptied'):
+            # La sala se libera en la siguiente vuelta del bucle, tras los broadcasts en curso
+            try:
+                asyncio.get_running_loop().call_soon(self.remove_finished_table, table)
+            except RuntimeError:
+                self.remove_finished_table(table)
+
+    def remove_finished_table(self, table):
+        #Quita la sala solo si sigue terminada o vacía: en el hueco pudo entrar un jugador (JOIN_TABLE, RESUME_SEAT)
+        if self.game.get_table(table.id) is table and (table.winner or not table.players):
+            self.game.remove_table(table.id)
 
     async def handle_client(self, websocket, path):
         #Maneja la conexión de un cliente
-        client_id = str(websocket)
-        self.clients[websocket] = {'player_id': client_id, 'table_id': None}
+        client = self.clients[websocket] = Session(
+            next(self.player_ids),
+            BINARY if websocket.subprotocol == BINARY_SUBPROTOCOL else JSON,
+            Outbox(websocket, self.outbox_size, on_overflow=self.outbox_overflow),
+            time.monotonic()
+        )
+        if self.idle_timeout:
+            client.idle = self.timers.schedule(self.idle_timeout, self.on_idle, websocket)
+        if not self.resume_session(websocket, path):
+            self.open_session(websocket)
         
         try:
             async for message in websocket:
-                await self.process_message(websocket, message)
+                client.seen = time.monotonic()  # El plazo no se rearma en cada mensaje: se comprueba al vencer
+                pause = await self.process_message(websocket, message)
+                if pause:
+                    # Quien supera su límite deja de ser leído hasta que le toque: su socket se llena y el
+                    # cliente ya no puede enviar más, en lugar de que el servidor gaste CPU en rechazarlo
+                    await asyncio.sleep(pause)
         except websockets.exceptions.ConnectionClosed:
-            print(f"Cliente desconectado: {client_id}")
+            print(f"Cliente desconectado: {client.player_id}")
         finally:
             await self.handle_disconnect(websocket)
 
     async def process_message(self, websocket, message):
-        #Procesa los mensajes recibidos de los clientes
+        #Procesa los mensajes recibidos de los clientes; retorna los segundos que no se debe leer de la conexión
+        #porque superó su límite, o None
+        start = time.perf_counter()
+        command = None
         try:
-            data = json.loads(message)
+            data = decode_command(message)
             command = data.get('command')
+            client = self.clients.get(websocket)
+            busy = self.admission.check(client, command) if client else None
             
-            if command == 'CREATE_TABLE':
-                await self.handle_create_table(websocket)
+            if busy:
+                self.send_busy(websocket, command, *busy)
+                if busy[0] == 'rate':
+                    return busy[1]
+            elif self.forward(websocket, data):
+                pass  # La sala pertenece a otro proceso, que responde por su cuenta
+            elif command == 'CREATE_TABLE':
+                size = data.get('size', 3)
+                await self.handle_create_table(websocket, size, data.get('win', default_win(size)))
             elif command == 'JOIN_TABLE':
                 table_id = data.get('table_id')
-                await self.handle_join_table(websocket, table_id)
+                await self.on_table(table_id, self.handle_join_table, websocket, table_id)
             elif command == 'MAKE_MOVE':
                 table_id = data.get('table_id')
                 position = data.get('position')
-                await self.handle_make_move(websocket, table_id, position)
+                await self.on_table(table_id, self.handle_make_move, websocket, table_id, position)
             elif command == 'GET_TABLES':
-                await self.send_tables_info(websocket)
-        except json.JSONDecodeError:
+                if {'status', 'cursor', 'limit'} & data.keys():
+                    await self.send_tables_page(websocket, data.get('status'), data.get('cursor'),
+                                                data.get('limit'))
+                else:
+                    await self.send_tables_info(websocket)
+            elif command == 'SUBSCRIBE_LOBBY':
+                # La foto inicial no es reemplazable: sin ella el cliente no puede aplicar los deltas
+                self.send(websocket, self.lobby.subscribe(websocket, data.get('snapshot', True) is not False), REPLY)
+            elif command == 'UNSUBSCRIBE_LOBBY':
+                self.lobby.unsubscribe(websocket)
+            elif command == 'PLAY_VS_BOT':
+                await self.handle_play_vs_bot(websocket, data.get('difficulty', 'hard'))
+            elif command == 'RESUME_SEAT':
+                await self.handle_resume_seat(websocket, data.get('token'))
+            elif command == 'QUICK_MATCH':
+                await self.handle_quick_match(websocket, data.get('bucket', 0))
+            elif command == 'CANCEL_MATCH':
+                self.matchmaker.cancel(websocket)
+            elif command == 'WATCH_TABLE':
+                await self.handle_watch_table(websocket, data.get('table_id'))
+            elif command == 'UNWATCH_TABLE':
+                self.stop_watching(websocket)
+        except ValueError:
             print(f"Error al decodificar mensaje: {message}")
+        finally:
+            label = command if command in COMMANDS else 'unknown'
+            metrics.COMMANDS.labels(label).inc()
+            metrics.COMMAND_LATENCY.labels(label).observe(time.perf_counter() - start)
 
-    async def handle_create_table(self, websocket):
-        # Maneja la creación de una nueva sala
-        table = self.game.create_table()
+    def send_busy(self, websocket, command, reason, retry_after):
+        #Rechaza el comando sin ejecutarlo; el cliente puede reintentarlo pasados retry_after segundos
+        command = command if command in COMMANDS else None
+        metrics.REJECTED_COMMANDS.labels(command or 'unknown', reason).inc()
+        self.send(websocket, {
+            'type': 'busy',
+            'command': command,
+            'reason': reason,
+            'retry_after': round(retry_after, 3),
+            'message': BUSY_MESSAGES[reason]
+        }, REPLY)
+
+    async def on_table(self, table_id, handler, *args):
+        #Ejecuta la orden en el buzón de la sala: en orden con las demás órdenes de esa sala y sin esperar a otras
+        table = self.game.get_table(table_id)
+        if table is None:
+            return await handler(*args)  # El propio handler responde 'Sala no encontrada'
+        return await table.mailbox.submit(handler, *args)
+
+    def forward(self, websocket, data):
+        #Reenvía el comando a otro proceso si la sala no es local (ver cluster.ClusterWorker)
+        return False
+
+    def send(self, websocket, message, kind=GAME):
+        #Encola un mensaje (Frame o diccionario) en la cola de salida del cliente, sin esperar a la red
+        client = self.clients.get(websocket)
+        if client:
+            if not isinstance(message, Frame):
+                message = Frame(message)
+            self.deliver(client, message.encode(client.encoding), kind)
+
+    def deliver(self, client, message, kind):
+        #Los mensajes de partida se numeran y se guardan en el anillo de la sesión; sin conexión solo se guardan
+        self.sends += 1
+        if kind == GAME and client.session:
+            message = client.record(message)
+        if not client.grace:
+            client.outbox.send(message, kind)
+
+    def open_session(self, websocket):
+        #Abre una sesión nueva para la conexión y le envía su token
+        client = self.clients[websocket]
+        client.session = secrets.token_hex(16)
+        self.sessions[client.session] = websocket
+        self.send_session(websocket, False)
+
+    def send_session(self, websocket, resumed):
+        client = self.clients[websocket]
+        self.send(websocket, {'type': 'session', 'session': client.session, 'seq': client.seq,
+                              'resumed': resumed}, REPLY)
+
+    def resume_session(self, websocket, path):
+        #Reanuda la sesión de la URL (?session=<token>&seq=<último recibido>) si sigue viva; si no, retorna False.
+        #Repite solo los mensajes que el cliente no llegó a recibir
+        query = parse_qs(urlsplit(path or '').query)
+        token = query.get('session', [None])[0]
+        previous = self.sessions.get(token)
+        if previous is None:
+            if token:
+                metrics.SESSION_RESUMES.labels('unknown').inc()
+            return False
+        try:
+            seq = int(query.get('seq', ['0'])[0])
+        except ValueError:
+            seq = -1
+        client = self.clients[websocket]
+        old = self.clients.pop(previous)
+        self.detached.discard(previous)
+        if old.grace:
+            old.grace.cancel()
+        else:
+            # La conexión anterior sigue abierta (p. ej. medio caída): la nueva ocupa su lugar
+            old.outbox.close()
+            asyncio.get_running_loop().create_task(previous.close(1000, 'Sesión reanudada en otra conexión'))
+        if old.idle:
+            old.idle.cancel()
+        for key in ('player_id', 'table_id', 'session', 'seq', 'ring'):
+            setattr(client, key, getattr(old, key))
+        self.sessions[token] = websocket
+        self.rebind_session(previous, websocket)
+        self.send_session(websocket, True)
+        missed = client.missed(seq) if old.encoding == client.encoding else None
+        if missed is not None:
+            for message in missed:
+                client.outbox.send(message, GAME)
+            metrics.SESSION_RESUMES.labels('replayed').inc()
+            metrics.REPLAYED_MESSAGES.inc(len(missed))
+        else:
+            # Parte de lo perdido ya salió del anillo: basta con el estado actual de la sala
+            metrics.SESSION_RESUMES.labels('resync').inc()
+            table = self.game.get_table(client.table_id) if client.table_id else None
+            if table and client.player_id in table.players:
+                self.send(websocket, table.frame('table_joined'))
+        return True
+
+    def rebind_session(self, previous, websocket):
+        #La conexión nueva ocupa el lugar de la anterior en su sala
+        client = self.clients[websocket]
+        table = self.game.get_table(client.table_id) if client.table_id else None
+        if table and table.player_sockets.get(client.player_id) is previous:
+            table.player_sockets[client.player_id] = websocket
+
+    def broadcast_lobby(self, recipients, message):
+        #Envía una actualización del lobby; puede reemplazar a otra aún no leída
+        metrics.FANOUT.labels('lobby').observe(len(recipients))
+        for websocket in recipients:
+            self.send(websocket, message, LOBBY)
+
+    async def handle_create_table(self, websocket, size=3, win=3):
+        # Maneja la creación de una nueva sala de size×size con win en raya
+        try:
+            geometry(size, win)
+        except (ValueError, TypeError):
+            self.send(websocket, {
+                'type': 'error',
+                'message': 'Tamaño de tablero no válido.'
+            })
+            return
+        table = self.game.create_table(size=size, win=win)
         if table:
             await self.handle_join_table(websocket, table.id)
-            await self.broadcast_tables_update()
         else:
-            await websocket.send(json.dumps({
+            self.send(websocket, {
                 'type': 'error',
                 'message': 'No se pueden crear más salas en este momento.'
-            }))
+            })
 
     async def handle_join_table(self, websocket, table_id):
         #Maneja la unión de un jugador a una sala
         table = self.game.get_table(table_id)
         if not table:
-            await websocket.send(json.dumps({
+            self.send(websocket, {
                 'type': 'error',
                 'message': 'Sala no encontrada.'
-            }))
+            })
             return
 
-        client_id = self.clients[websocket]['player_id']
+        client_id = self.clients[websocket].player_id
         if table.add_player(client_id, websocket):
-            self.clients[websocket]['table_id'] = table_id
+            self.clients[websocket].table_id = table_id
+            self.matchmaker.cancel(websocket)  # Ya tiene sala: que QUICK_MATCH no le dé otra
             
             # Notificar al jugador que se unió
-            await websocket.send(json.dumps({
-                'type': 'table_joined',
-                'table': table.get_state()
-            }))
+            self.send(websocket, table.frame('table_joined'))
+            self.issue_seat_token(websocket, table, client_id)
+            self.arm_deadline(table)
 
             # Notificar a todos los jugadores de la sala
             await self.broadcast_table_state(table)
-            
-            # Notificar a todos los clientes sobre el cambio en las salas
-            await self.broadcast_tables_update()
 
             # Si la sala está llena, iniciar el juego
             if len(table.players) == 2:
                 await self.broadcast_game_start(table)
         else:
-            await websocket.send(json.dumps({
+            self.send(websocket, {
                 'type': 'error',
                 'message': 'No se puede unir a esta sala.'
-            }))
+            })
+
+    def issue_seat_token(self, websocket, table, player_id):
+        #Entrega al jugador un token con el que recuperar su asiento si el servidor se reinicia
+        token = self.new_seat_token()
+        table.tokens[player_id] = token
+        self.seats[token] = (table.id, player_id)
+        self.send(websocket, {'type': 'seat_token', 'table_id': table.id, 'token': token})
+
+    def new_seat_token(self):
+        #16 bytes aleatorios en hexadecimal (el formato binario los envía tal cual)
+        return secrets.token_hex(16)
+
+    async def handle_resume_seat(self, websocket, token):
+        #Devuelve al jugador el asiento que ocupaba antes del reinicio
+        seat = self.seats.get(token) if isinstance(token, str) else None
+        table = self.game.get_table(seat[0]) if seat else None
+        client = self.clients[websocket]
+        if not table or client.table_id or \
+                not table.replace_player(seat[1], client.player_id, websocket):
+            self.send(websocket, {
+                'type': 'error',
+                'message': 'No se puede recuperar el asiento.'
+            })
+            return
+        self.matchmaker.cancel(websocket)  # Con el asiento recuperado no debe emparejarse en otra sala
+        self.seats[token] = (table.id, client.player_id)
+        client.table_id = table.id
+        self.send(websocket, table.frame('table_joined'))
+        self.arm_deadline(table)
+        await self.broadcast_table_state(table)
 
     async def handle_make_move(self, websocket, table_id, position):
         #Maneja un movimiento en el juego, solo permite marcar al jugador correcto en su turno
         try:
             table = self.game.get_table(table_id)
             if not table:
-                await websocket.send(json.dumps({
+                self.send(websocket, {
                     'type': 'error',
                     'message': 'Sala no encontrada.'
-                }))
+                })
                 return
 
-            client_id = self.clients[websocket]['player_id']
+            client_id = self.clients[websocket].player_id
             if client_id not in table.players:
-                await websocket.send(json.dumps({
+                self.send(websocket, {
                     'type': 'error',
                     'message': 'No eres un jugador de esta sala.'
-                }))
+                })
                 return
 
             if table.make_move(position, client_id):
-                await self.broadcast_table_state(table)
+                self.record_move(table)
+                await self.broadcast_move(table)
                 
                 if table.winner:
                     await self.broadcast_game_end(table)
-                    # Notificar a todos los clientes sobre el cambio en las salas
-                    await self.broadcast_tables_update()
-                    # Eliminar salas finalizadas
-                    self.game.remove_finished_tables()
+                elif table.bot:
+                    await self.play_bot_move(table)
+                self.arm_deadline(table)
             else:
-                await websocket.send(json.dumps({
+                self.send(websocket, {
                     'type': 'error',
                     'message': 'Movimiento inválido o no es tu turno.'
-                }))
+                })
         except Exception as e:
             print(f"Error al procesar movimiento: {str(e)}")  # Debug
-            await websocket.send(json.dumps({
+            self.send(websocket, {
                 'type': 'error',
                 'message': 'Error al procesar el movimiento.'
-            }))
+            })
+
+    def record_move(self, table):
+        #Anexa el último movimiento (y el resultado, si terminó) al historial; no toca el disco
+        if self.history:
+            cell, symbol = table.moves[-1]
+            self.history.append_move(table.id, len(table.moves), cell, symbol)
+            if table.winner:
+                self.history.append_result(table.id, len(table.moves) + 1, table.winner)
+
+    async def handle_play_vs_bot(self, websocket, difficulty):
+        #Crea una sala en la que el jugador (X) se enfrenta al bot del servidor (O)
+        table = self.game.create_table()
+        if not table:
+            self.send(websocket, {
+                'type': 'error',
+                'message': 'No se pueden crear más salas en este momento.'
+            })
+            return
+        table.bot = difficulty if difficulty in BOT_DIFFICULTIES else 'hard'
+        await self.handle_join_table(websocket, table.id)
+        if table.add_player(BOT_PLAYER_ID, None):
+            self.arm_deadline(table)
+            await self.broadcast_game_start(table)
+
+    async def handle_quick_match(self, websocket, bucket):
+        #Empareja al jugador con el primero que espera en su cubo, o lo deja en la cola
+        if not isinstance(bucket, int):
+            bucket = 0
+        if self.seated(self.clients[websocket]):
+            self.matchmaker.cancel(websocket)
+            self.send(websocket, {
+                'type': 'error',
+                'message': 'Ya estás en una sala.'
+            })
+            return
+        match = self.matchmaker.enqueue(websocket, bucket)
+        if match is None:
+            self.send(websocket, {'type': 'match_queued'})
+            return
+        opponent, waited = match
+        metrics.MATCH_WAIT.observe(waited)
+        # La sala nace llena, así que no cuenta para el tope de salas en espera
+        table = self.game.create_table(waiting_limit=None)
+        for player in (opponent, websocket):
+            client = self.clients[player]
+            table.add_player(client.player_id, player)
+            client.table_id = table.id
+            self.issue_seat_token(player, table, client.player_id)
+        self.arm_deadline(table)
+        await self.broadcast_game_start(table)
+
+    def seated(self, client):
+        #Si el cliente ocupa un asiento en una sala que sigue abierta
+        table = self.game.get_table(client.table_id) if client.table_id else None
+        return table is not None and table.winner is None
+
+    async def handle_watch_table(self, websocket, table_id):
+        #Añade al cliente como espectador de la sala (deja de seguir la anterior, si la había)
+        table = self.game.get_table(table_id)
+        if not table:
+            self.send(websocket, {
+                'type': 'error',
+                'message': 'Sala no encontrada.'
+            })
+            return
+        self.stop_watching(websocket)
+        table.watch(websocket)
+        self.clients[websocket].watching = table.id
+        self.send(websocket, table.frame('table_state'), SPECTATE)
+
+    def stop_watching(self, websocket):
+        client = self.clients.get(websocket)
+        if client and client.watching:
+            table = self.game.get_table(client.watching)
+            if table:
+                table.unwatch(websocket)
+            client.watching = None
+
+    async def play_bot_move(self, table):
+        #Responde con la jugada del bot: una búsqueda en la tabla precalculada, sin bloquear el bucle
+        x, o = board_masks(table.game_board)
+        position = self.solver.best_move(x, o, table.bot, self.rng)
+        if position is not None and table.make_move(position, BOT_PLAYER_ID):
+            self.record_move(table)
+            await self.broadcast_move(table)
+            if table.winner:
+                await self.broadcast_game_end(table)
 
     async def handle_disconnect(self, websocket):
-        # Maneja la desconexión de un cliente
-        if websocket in self.clients:
-            client_info = self.clients[websocket]
-            table_id = client_info['table_id']
-            if table_id:
-                table = self.game.get_table(table_id)
-                if table:
-                    table.remove_player(client_info['player_id'])
-                    await self.broadcast_table_state(table)
-                    if len(table.players) == 0:
-                        self.game.remove_table(table_id)  # Detiene el hilo de la sala
-            del self.clients[websocket]
+        # Maneja la desconexión de un cliente: la sesión y su asiento se guardan durante session_grace
+        self.matchmaker.cancel(websocket)
+        self.stop_watching(websocket)
+        self.lobby.unsubscribe(websocket)
+        client_info = self.clients.get(websocket)
+        if client_info and client_info.session and self.session_grace:
+            client_info.outbox.close()
+            if client_info.idle:
+                client_info.idle.cancel()
+                client_info.idle = None
+            client_info.grace = self.timers.schedule(self.session_grace, self.expire_session, websocket)
+            self.detached.add(websocket)
+            return
+        await self.end_session(websocket)
 
-    async def broadcast_table_state(self, table):
-        #Envía el estado actual de la sala a todos sus jugadores."""
-        state = table.get_state()
-        for player_id in table.players:
+    def expire_session(self, websocket):
+        #Vence la gracia sin que el cliente vuelva: se libera su asiento como en una desconexión sin sesión
+        client_info = self.clients.get(websocket)
+        if client_info and client_info.grace:
+            self.sessions.pop(client_info.session, None)  # Ya no se puede reanudar
+            metrics.TIMEOUTS.labels('session').inc()
+            asyncio.get_running_loop().create_task(self.end_session(websocket))
+
+    async def end_session(self, websocket):
+        #Cierra la sesión del cliente y libera su asiento
+        client_info = self.clients.get(websocket)
+        if client_info is None:
+            return  # La sesión se reanudó en otra conexión
+        self.sessions.pop(client_info.session, None)
+        if client_info.idle:
+            client_info.idle.cancel()
+        table_id = client_info.table_id
+        if table_id:
+            table = self.game.get_table(table_id)
+            if table:
+                await table.mailbox.submit(self.leave_table, table, client_info.player_id)
+        client_info.outbox.close()
+        self.clients.pop(websocket, None)
+        self.detached.discard(websocket)
+
+    async def leave_table(self, table, player_id):
+        #Libera el asiento del jugador que se desconecta y avisa a su rival
+        self.seats.pop(table.tokens.pop(player_id, None), None)
+        table.remove_player(player_id)
+        if table.bot:
+            table.remove_player(BOT_PLAYER_ID)  # Sin rival humano la sala se libera
+        self.arm_deadline(table)
+        await self.broadcast_table_state(table)
+
+    def arm_deadline(self, table):
+        #Rearma el único plazo de la sala tras un cambio: el turno si se está jugando, si no el de abandono
+        if table.deadline:
+            table.deadline.cancel()
+            table.deadline = None
+        if table.winner or not table.players:
+            return
+        if len(table.players) == 2 and self.turn_timeout:
+            delay = self.turn_timeout
+        elif self.abandon_timeout:
+            delay = self.abandon_timeout
+        else:
+            return
+        table.deadline = self.timers.schedule(delay, self.on_deadline, table, table.version)
+
+    def on_deadline(self, table, version):
+        #Vence el plazo de la sala (desde la rueda): la orden pasa por su buzón como cualquier otra, por tandas
+        table.deadline = None
+        self.expiring.append((table, version))
+        if self.expiry_task is None:
+            self.expiry_task = asyncio.get_running_loop().create_task(self.expire_deadlines())
+
+    async def expire_deadlines(self):
+        #Una sola tarea atiende los plazos vencidos, DEADLINE_BATCH por vuelta del bucle: miles de salas que vencen
+        #en el mismo tick no crean miles de tareas que luego corren todas en la misma vuelta
+        loop = asyncio.get_running_loop()
+        try:
+            while self.expiring:
+                for _ in range(min(DEADLINE_BATCH, len(self.expiring))):
+                    table, version = self.expiring.popleft()
+                    if table.mailbox.task is not None:
+                        # Sala ocupada: su orden espera en el buzón sin frenar a las demás
+                        loop.create_task(self.on_table(table.id, self.expire_deadline, table, version))
+                        continue
+                    try:
+                        await self.on_table(table.id, self.expire_deadline, table, version)
+                    except Exception as e:
+                        print(f"Error al vencer el plazo de la sala {table.id}: {str(e)}")
+                await asyncio.sleep(0)
+        finally:
+            self.expiry_task = None
+
+    async def expire_deadline(self, table, version):
+        #Sin cambios desde que se armó el plazo: pierde quien tenía el turno, o se liberan los asientos
+        if table.version != version or table.winner or self.game.get_table(table.id) is not table:
+            return  # Hubo una orden antes que el vencimiento; ya se rearmó
+        if len(table.players) == 2:
+            player_id = table.players[0 if table.turn == 'X' else 1]
+            if player_id == BOT_PLAYER_ID or not table.forfeit(player_id):
+                return
+            metrics.TIMEOUTS.labels('turn').inc()
+            if self.history:
+                self.history.append_result(table.id, len(table.moves) + 1, table.winner)
+            await self.broadcast_table_state(table)
+            await self.broadcast_game_end(table)
+            return
+        metrics.TIMEOUTS.labels('abandon').inc()
+        for player_id in list(table.players):
             websocket = table.player_sockets[player_id]
-            await websocket.send(json.dumps({
-                'type': 'table_state',
-                'table': state
-            }))
+            self.seats.pop(table.tokens.pop(player_id, None), None)
+            client = self.clients.get(websocket)
+            if client:
+                client.table_id = None
+                self.send(websocket, {
+                    'type': 'error',
+                    'message': 'La sala se cerró por inactividad.'
+                })
+            table.remove_player(player_id)
+        await self.broadcast_table_state(table)
+
+    def on_idle(self, websocket):
+        #Cierra la conexión si no ha enviado nada durante idle_timeout; si envió algo, vuelve a armar el plazo
+        client = self.clients.get(websocket)
+        if not client:
+            return
+        idle = time.monotonic() - client.seen
+        if idle < self.idle_timeout:
+            client.idle = self.timers.schedule(self.idle_timeout - idle, self.on_idle, websocket)
+            return
+        client.idle = None
+        metrics.TIMEOUTS.labels('idle').inc()
+        asyncio.get_running_loop().create_task(websocket.close(1000, 'Inactividad'))
+
+    def broadcast_table_frame(self, table, kind):
+        #Envía a todos los jugadores de la sala el mismo mensaje, serializado una sola vez.
+        #Los espectadores reciben siempre el estado completo: su cola se salta estados, así que un delta no les sirve
+        frame = table.move_frame() if kind == 'table_move' else table.frame(kind)
+        metrics.FANOUT.labels(kind).observe(len(table.players))
+        for player_id in table.players:
+            self.send(table.player_sockets[player_id], frame)
+        if table.spectators and table.id not in self.fanouts:
+            self.fanouts[table.id] = asyncio.get_running_loop().create_task(self.fan_out_spectators(table))
+
+    async def fan_out_spectators(self, table):
+        #Envía el último estado a los espectadores por tandas, fuera del camino de los jugadores.
+        #Si la sala cambia mientras tanto se hace otra pasada con el estado nuevo; los intermedios se saltan
+        try:
+            await asyncio.sleep(0)  # Los jugadores primero
+            version = None
+            while version != table.version:
+                version = table.version
+                recipients = list(table.spectators)
+                metrics.FANOUT.labels('spectators').observe(len(recipients))
+                for i in range(0, len(recipients), SPECTATOR_BATCH):
+                    frame = table.frame('table_state')  # Siempre el más reciente, codificado una vez
+                    for websocket in recipients[i:i + SPECTATOR_BATCH]:
+                        self.send(websocket, frame, SPECTATE)
+                    await asyncio.sleep(0)
+        finally:
+            del self.fanouts[table.id]
+
+    async def broadcast_table_state(self, table):
+        #Envía el estado actual de la sala a todos sus jugadores
+        self.broadcast_table_frame(table, 'table_state')
+
+    async def broadcast_move(self, table):
+        #Envía a los jugadores solo el último movimiento, no el tablero entero
+        self.broadcast_table_frame(table, 'table_move')
 
     async def broadcast_game_start(self, table):
         #Notifica a los jugadores que el juego ha comenzado
-        for player_id in table.players:
-            websocket = table.player_sockets[player_id]
-            await websocket.send(json.dumps({
-                'type': 'game_start',
-                'table': table.get_state()
-            }))
+        self.broadcast_table_frame(table, 'game_start')
 
     async def broadcast_game_end(self, table):
         #Notifica a los jugadores que el juego ha terminado
-        for player_id in table.players:
-            websocket = table.player_sockets[player_id]
-            await websocket.send(json.dumps({
-                'type': 'game_end',
-                'table': table.get_state()
-            }))
+        self.broadcast_table_frame(table, 'game_end')
 
     async def send_tables_info(self, websocket):
         #Envía la información de las salas disponibles a un cliente
-        await websocket.send(json.dumps({
-            'type': 'tables',
-            'tables': self.game.get_tables_info()
-        }))
-
-    async def broadcast_tables_update(self):
-        #Notifica a todos los clientes sobre cambios en las salas
-        tables_info = self.game.get_tables_info()
-        for websocket in self.clients:
-            try:
-                await websocket.send(json.dumps({
-                    'type': 'tables',
-                    'tables': tables_info
-                }))
-            except websockets.exceptions.ConnectionClosed:
-                continue
+        tables_info, tables_json = self.lobby.snapshot()
+        # Respuesta a su GET_TABLES: como REPLY, para que un delta del lobby no la reemplace
+        self.send(websocket, Frame({'type': 'tables', 'tables': tables_info, 'cursor': None},
+                                   f'{{"type": "tables", "tables": {tables_json}, "cursor": null}}'), REPLY)
+
+    async def send_tables_page(self, websocket, status, cursor, limit):
+        #Envía una página de salas (filtradas por estado) a partir del cursor opaco de la página anterior
+        if status not in PAGE_STATUSES or not isinstance(cursor or 0, int) or not isinstance(limit or 0, int):
+            self.send(websocket, {
+                'type': 'error',
+                'message': 'Petición de salas inválida.'
+            })
+            return
+        limit = min(max(limit or PAGE_SIZE, 1), MAX_PAGE_SIZE)
+        tables_info, next_cursor = self.lobby.page(status, cursor or 0, limit)
+        # Se envía como REPLY: una página no puede ser reemplazada por un delta del lobby
+        self.send(websocket, {'type': 'tables', 'tables': tables_info, 'cursor': next_cursor}, REPLY)
+
+    def restore_snapshot(self, path):
+        #Recupera las salas en juego de la última foto; los asientos quedan reservados hasta RESUME_SEAT
+        next_table_id, records = load_snapshot(path)
+        tables = []
+        for table_id, size, win, turn, bot, moves, tokens in records:
+            table = Table(table_id, size=size, win=win)
+            table.bot = bot
+            for seat, token in enumerate(tokens):
+                if token:
+                    player_id = f'resume:{token}'
+                    table.tokens[player_id] = token
+                    self.seats[token] = (table_id, player_id)
+                elif bot and seat == 1:
+                    player_id = BOT_PLAYER_ID
+                else:
+                    continue
+                table.players.append(player_id)
+                table.player_sockets[player_id] = None
+            table.available = len(table.players) < 2
+            table.replay(moves)
+            table.turn = turn
+            tables.append(table)
+        self.game.restore_tables(tables)
+        for table in tables:
+            self.arm_deadline(table)  # Si nadie recupera el asiento, la sala no queda ocupada para siempre
+        self.game.table_id = max(self.game.table_id, next_table_id)
+        return len(tables)
 
     async def start(self):
         #Inicia el servidor
-        async with websockets.serve(self.handle_client, self.host, self.port):
-            print(f"Servidor iniciado en ws://{self.host}:{self.port}")
-            await asyncio.Future()  # Mantener el servidor en ejecución
+        if self.solver is None:
+            self.solver = Solver.load(self.solver_path) if self.solver_path else Solver()
+        if self.history:
+            self.history.start()
+        self.timers.start()
+        self.admission.start()
+        if self.snapshots:
+            if os.path.exists(self.snapshots.path):
+                start = time.perf_counter()
+                count = self.restore_snapshot(self.snapshots.path)
+                print(f"{count} salas restauradas en {time.perf_counter() - start:.3f} s")
+            self.snapshots.start()
+        try:
+            async with websockets.serve(self.handle_client, self.host, self.port,
+                                        subprotocols=[BINARY_SUBPROTOCOL],
+                                        process_request=self.process_request,
+                                        reuse_port=self.reuse_port):
+                print(f"Servidor iniciado en ws://{self.host}:{self.port}")
+                try:
+                    await asyncio.Future()  # Mantener el servidor en ejecución
+                finally:
+                    if self.snapshots:
+                        self.snapshots.close()  # Antes de cerrar las conexiones, para no fotografiar salas vacías
+        finally:
+            self.timers.close()
+            self.admission.close()
+            if self.history:
+                self.history.close()
 
 if __name__ == '__main__':
-    server = GameServer()
-    asyncio.run(server.start())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Servidor del juego Tres en Raya')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--solver', help='Tabla del bot generada con `python -m models.Solver`')
+    parser.add_argument('--history', help='Directorio del historial binario de partidas')
+    parser.add_argument('--snapshot', help='Fichero de fotos periódicas de las salas, restaurado al arrancar')
+    parser.add_argument('--turn-timeout', type=float, default=60, help='Segundos por turno; al agotarlos se pierde')
+    parser.add_argument('--abandon-timeout', type=float, default=300,
+                        help='Segundos que una sala a medias puede seguir sin cambios antes de cerrarse')
+    parser.add_argument('--idle-timeout', type=float, help='Segundos sin mensajes antes de cerrar la conexión')
+    parser.add_argument('--session-grace', type=float, default=30,
+                        help='Segundos que se guarda el asiento de un cliente desconectado para que reanude su sesión')
+    parser.add_argument('--max-connections', type=int, help='Conexiones abiertas a la vez; las demás reciben 503')
+    parser.add_argument('--admission', action='store_true',
+                        help='Límites por conexión y descarte de comandos cuando el servidor va atrasado')
+    args = parser.parse_args()
+    server = GameServer(args.host, args.port, solver_path=args.solver, history_dir=args.history,
+                        snapshot_path=args.snapshot, turn_timeout=args.turn_timeout,
+                        abandon_timeout=args.abandon_timeout, idle_timeout=args.idle_timeout,
+                        session_grace=args.session_grace, max_connections=args.max_connections,
+                        rate_limits=RATE_LIMITS if args.admission else None,
+                        shed_lag=SHED_LAG if args.admission else None)
+    asyncio.run(server.start())
@@ -0,0 +1,55 @@
+"""
+Registro de cada conexión en el servidor y de la sesión con la que se reanuda.
+
+Es una clase con __slots__ en lugar de un diccionario por cliente, y el
+jugador se identifica con un entero pequeño (ver GameServer.player_ids) en
+lugar de la representación del WebSocket. Con decenas de miles de conexiones
+inactivas lo que más pesa es lo que cada una tiene reservado por si acaso,
+así que el anillo de la sesión se crea con el primer mensaje de partida y es
+una lista que crece con los mensajes (una deque con maxlen reserva de golpe
+un bloque de 64 huecos).
+"""
+
+from protocol import number_message
+
+SESSION_RING = 64  # Mensajes de partida que guarda como mínimo cada sesión para repetirlos al reanudarla
+
+class Session:
+    __slots__ = ('player_id', 'table_id', 'watching', 'encoding', 'outbox', 'seen', 'idle', 'session', 'seq',
+                 'ring', 'grace', 'limits')
+
+    def __init__(self, player_id, encoding, outbox, seen=None):
+        self.player_id = player_id
+        self.table_id = None
+        self.watching = None  # Sala que sigue como espectador
+        self.encoding = encoding
+        self.outbox = outbox
+        self.seen = seen  # Último mensaje recibido, para el plazo de inactividad
+        self.idle = None  # Timer del plazo de inactividad
+        self.session = None  # Token con el que el cliente reanuda la sesión al reconectar
+        self.seq = 0  # Número del último mensaje de partida de la sesión
+        # Últimos mensajes de partida sin numerar (los mismos objetos que reciben los demás destinatarios);
+        # el último es el número seq y los anteriores van de uno en uno hacia atrás. Guarda entre
+        # SESSION_RING y 2 * SESSION_RING: se recorta por bloques para no mover la lista en cada mensaje
+        self.ring = None
+        self.grace = None  # Timer de la gracia mientras la sesión está desconectada
+        self.limits = None  # Cubos de fichas por clase de comando (ver admission.py), creados con el primer comando
+
+    def record(self, message):
+        #Guarda un mensaje de partida en el anillo y lo retorna con su número de secuencia
+        if self.ring is None:
+            self.ring = []
+        elif len(self.ring) >= 2 * SESSION_RING:
+            del self.ring[:SESSION_RING]
+        self.ring.append(message)
+        self.seq += 1
+        return number_message(message, self.seq)
+
+    def missed(self, seq):
+        #Mensajes posteriores a seq ya numerados, o None si alguno ya salió del anillo
+        ring = self.ring or ()
+        count = self.seq - seq
+        if not 0 <= count <= len(ring):
+            return None
+        first = seq + 1
+        return [number_message(message, first + i) for i, message in enumerate(ring[len(ring) - count:])]
\ No newline at end of file
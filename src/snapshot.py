@@ -0,0 +1,127 @@
+"""
+Fotos periódicas de las salas en juego y recuperación al arrancar.
+
+La foto es un fichero binario compacto:
+    cabecera: magia, siguiente ID de sala (u32), número de salas (u32)
+    por sala: id (u32), lado, en raya, turno, bot, jugadores (u8 cada uno),
+              movimientos (u16), dos bytes por movimiento (casilla | símbolo
+              << 15) y el token de reanudación (16 bytes) de cada asiento.
+Las fotos del formato anterior (TRS1, solo 3×3 y un byte por movimiento)
+se siguen pudiendo leer.
+
+Es incremental: el registro de una sala se guarda junto a su versión y solo
+se vuelve a codificar si la sala cambió. Las salas se recorren por tandas,
+cediendo el bucle entre una y otra, y el fichero se escribe en un hilo aparte
+(primero a un temporal y luego con os.replace), así la pausa del bucle no
+crece con el número de salas.
+"""
+
+import asyncio
+import os
+import struct
+
+from protocol import BOT_DIFFICULTIES
+
+MAGIC = b'TRS2'
+LEGACY_MAGIC = b'TRS1'
+HEADER = struct.Struct('<4sII')
+TABLE = struct.Struct('<IBBBBBH')
+LEGACY_TABLE = struct.Struct('<IBBBB')
+MOVE = struct.Struct('<H')
+TOKEN_BYTES = 16
+BOTS = (None,) + BOT_DIFFICULTIES
+
+
+def encode_table(table):
+    #Registro binario de una sala (requiere que tenga token por jugador o sea el bot)
+    moves = b''.join(MOVE.pack(cell | (symbol == 'O') << 15) for cell, symbol in table.moves)
+    tokens = b''.join(bytes.fromhex(table.tokens[player_id]) if player_id in table.tokens else bytes(TOKEN_BYTES)
+                      for player_id in table.players)
+    return TABLE.pack(table.id, table.size, table.win, table.turn == 'O', BOTS.index(table.bot), len(table.players),
+                      len(table.moves)) + moves + tokens
+
+
+def decode_snapshot(data):
+    #Retorna (siguiente ID de sala, [(id, lado, en raya, turno, bot, [(casilla, símbolo)], [token o None])])
+    magic, next_table_id, count = HEADER.unpack_from(data)
+    if magic not in (MAGIC, LEGACY_MAGIC):
+        raise ValueError('No es una foto de salas')
+    offset = HEADER.size
+    tables = []
+    for _ in range(count):
+        if magic == LEGACY_MAGIC:
+            table_id, turn, bot, players, moves = LEGACY_TABLE.unpack_from(data, offset)
+            size = win = 3
+            offset += LEGACY_TABLE.size
+            move_list = [(byte & 15, 'O' if byte >> 4 else 'X') for byte in data[offset:offset + moves]]
+            offset += moves
+        else:
+            table_id, size, win, turn, bot, players, moves = TABLE.unpack_from(data, offset)
+            offset += TABLE.size
+            move_list = [(value & 0x7FFF, 'O' if value >> 15 else 'X')
+                         for value, in MOVE.iter_unpack(data[offset:offset + moves * MOVE.size])]
+            offset += moves * MOVE.size
+        tokens = []
+        for _ in range(players):
+            token = data[offset:offset + TOKEN_BYTES]
+            tokens.append(token.hex() if any(token) else None)
+            offset += TOKEN_BYTES
+        tables.append((table_id, size, win, 'O' if turn else 'X', BOTS[bot], move_list, tokens))
+    return next_table_id, tables
+
+
+def load_snapshot(path):
+    with open(path, 'rb') as f:
+        return decode_snapshot(f.read())
+
+
+class Snapshotter:
+    def __init__(self, game, path, interval=5.0, batch=2000):
+        self.game = game
+        self.path = path
+        self.interval = interval  # Segundos entre fotos
+        self.batch = batch  # Salas por tanda antes de ceder el bucle
+        self.records = {}  # {table_id: (versión, registro)}
+        self.task = None
+        self.last_duration = None
+
+    async def snapshot(self):
+        #Toma una foto de las salas no terminadas y la escribe fuera del bucle
+        start = asyncio.get_running_loop().time()
+        tables = list(self.game.tables.values())
+        records = {}
+        parts = []
+        for i in range(0, len(tables), self.batch):
+            for table in tables[i:i + self.batch]:
+                if table.winner is not None or not table.players:
+                    continue
+                cached = self.records.get(table.id)
+                if cached is None or cached[0] != table.version:
+                    cached = (table.version, encode_table(table))
+                records[table.id] = cached
+                parts.append(cached[1])
+            await asyncio.sleep(0)
+        self.records = records
+        header = HEADER.pack(MAGIC, self.game.table_id, len(parts))
+        await asyncio.get_running_loop().run_in_executor(None, self.write, header, parts)
+        self.last_duration = asyncio.get_running_loop().time() - start
+
+    def write(self, header, parts):
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(header)
+            f.write(b''.join(parts))
+        os.replace(temporary, self.path)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.snapshot()
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def close(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
\ No newline at end of file
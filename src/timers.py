@@ -0,0 +1,127 @@
+"""
+Rueda de temporizadores jerárquica para los plazos de turno y de inactividad.
+
+Todos los plazos del servidor comparten una sola rueda movida por una única
+tarea, en lugar de un temporizador o una tarea por sala. La rueda tiene
+LEVELS niveles de SLOTS casillas: el nivel 0 avanza una casilla por tick y
+cada casilla del nivel n abarca SLOTS**n ticks. Armar, cancelar y vencer un
+plazo cuesta O(1) sea cual sea el número de salas; los plazos lejanos bajan
+de nivel (en bloque, por casilla) a medida que se acercan.
+
+La precisión es de un tick: un plazo vence como pronto en su tick y como
+tarde un tick después. Si vencen muchos a la vez (p. ej. miles de salas
+abandonadas juntas), se atienden por tandas cediendo el bucle entre ellas.
+"""
+
+import asyncio
+
+SLOTS = 64
+LEVELS = 4
+BITS = SLOTS.bit_length() - 1
+MASK = SLOTS - 1
+EXPIRE_BATCH = 256  # Plazos vencidos atendidos antes de ceder el bucle
+
+class Timer:
+    __slots__ = ('expires', 'callback', 'args', 'slot')
+
+    def __init__(self, expires, callback, args):
+        self.expires = expires  # Tick en el que vence
+        self.callback = callback
+        self.args = args
+        self.slot = None  # Casilla (set) en la que espera, o None si ya venció o se canceló
+
+    def cancel(self):
+        #Desarma el plazo; no hace nada si ya venció
+        if self.slot is not None:
+            self.slot.discard(self)
+            self.slot = None
+
+class TimingWheel:
+    def __init__(self, tick=0.1):
+        self.tick = tick  # Segundos por casilla del nivel 0
+        self.wheels = [[set() for _ in range(SLOTS)] for _ in range(LEVELS)]
+        self.current = 0  # Último tick procesado
+        self.origin = None  # Hora del bucle que corresponde al tick 0
+        self.task = None
+
+    def __len__(self):
+        #Plazos armados; recorre las casillas, así que es para métricas, no para el camino caliente
+        return sum(len(slot) for wheel in self.wheels for slot in wheel)
+
+    def now(self):
+        #Tick actual según el reloj del bucle
+        loop = asyncio.get_running_loop()
+        if self.origin is None:
+            self.origin = loop.time() - self.current * self.tick
+        return int((loop.time() - self.origin) / self.tick)
+
+    def schedule(self, delay, callback, *args):
+        #Llama a callback(*args) dentro de delay segundos; retorna el Timer para poder cancelarlo
+        try:
+            base = max(self.now(), self.current)
+        except RuntimeError:
+            base = self.current  # Sin bucle (p. ej. al restaurar antes de arrancar)
+        timer = Timer(base + max(1, round(delay / self.tick)), callback, args)
+        self.place(timer)
+        return timer
+
+    def place(self, timer):
+        #Coloca el plazo en el nivel más bajo cuyo alcance lo cubre
+        ticks = timer.expires - self.current
+        level = 0
+        while level < LEVELS - 1 and ticks >= SLOTS ** (level + 1):
+            level += 1
+        if ticks >= SLOTS ** LEVELS:
+            # Más allá del alcance de la rueda: espera en la casilla más lejana y se recoloca al llegar
+            slot = self.wheels[level][(self.current >> (BITS * level)) - 1 & MASK]
+        else:
+            slot = self.wheels[level][timer.expires >> (BITS * level) & MASK]
+        slot.add(timer)
+        timer.slot = slot
+
+    def advance(self, until):
+        #Procesa los ticks hasta until: baja de nivel los plazos que se acercan y retorna los que vencen.
+        #Siguen armados (y se pueden cancelar) hasta que fire los ejecuta
+        expired = []
+        while self.current < until:
+            self.current += 1
+            level = 1
+            while level < LEVELS and self.current & ((1 << (BITS * level)) - 1) == 0:
+                slot = self.wheels[level][self.current >> (BITS * level) & MASK]
+                pending = list(slot)
+                slot.clear()
+                for timer in pending:
+                    self.place(timer)
+                level += 1
+            slot = self.wheels[0][self.current & MASK]
+            if slot:
+                expired.extend(slot)
+                slot.clear()
+        return expired
+
+    @staticmethod
+    def fire(timers):
+        #Ejecuta los plazos vencidos que no se cancelaron entretanto
+        for timer in timers:
+            if timer.slot is not None:
+                timer.slot = None
+                timer.callback(*timer.args)
+
+    async def run(self):
+        #Mueve la rueda una vez por tick mientras el servidor está en marcha
+        while True:
+            await asyncio.sleep(self.tick)
+            expired = self.advance(self.now())
+            for i in range(0, len(expired), EXPIRE_BATCH):
+                if i:
+                    await asyncio.sleep(0)
+                self.fire(expired[i:i + EXPIRE_BATCH])
+
+    def start(self):
+        self.now()
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def close(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Torneos de partidas entre estrategias, sin servidor ni conexiones.
+
+Cada partida se juega con las reglas de Table (turnos, casillas válidas y
+detección del ganador), en el tablero que se elija. Las partidas de cada
+pareja de estrategias se reparten en tandas entre los procesos de un
+ProcessPoolExecutor; cada tanda vuelve con sus recuentos en cuanto termina y
+se acumulan en victorias, derrotas y empates por pareja, además de las
+partidas por segundo de cada proceso.
+
+Estrategias (ver STRATEGIES):
+    random     casilla libre al azar
+    perfect    juego perfecto con la tabla del bot (Solver); solo en 3×3
+    heuristic  gana si puede, si no tapa la raya del rival y si no juega
+               junto a las fichas que ya hay (o en el centro)
+
+Uso (desde src/):
+    python tournament.py --games 1000000 --strategies random perfect heuristic
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+from models.Board import default_win, geometry
+from models.Solver import Solver
+from models.Table import Table
+
+CHUNK = 5000  # Partidas por tanda enviada a un proceso
+PLAYERS = ('X', 'O')  # IDs de jugador en la sala: el primero juega con X
+
+_solver = None  # Tabla del bot en cada proceso, cargada una sola vez
+
+
+def random_move(table, rng):
+    occupied = table.board.x | table.board.o
+    return rng.choice([cell for cell in range(table.board.geometry.cells) if not occupied >> cell & 1])
+
+
+def perfect_move(table, rng):
+    return _solver.best_move(table.board.x, table.board.o, 'hard', rng)
+
+
+def heuristic_move(table, rng):
+    board = table.board
+    geometry = board.geometry
+    occupied = board.x | board.o
+    free = [cell for cell in range(geometry.cells) if not occupied >> cell & 1]
+    mine, theirs = (board.x, board.o) if table.turn == 'X' else (board.o, board.x)
+    # Ganar si se puede; si no, tapar la raya del rival
+    for mask in (mine, theirs):
+        for cell in free:
+            if geometry.wins(mask | 1 << cell, cell):
+                return cell
+    if not occupied:
+        return geometry.cells // 2
+    # Junto a las fichas que ya hay: la casilla libre con más vecinas ocupadas
+    best, best_cells = -1, []
+    for cell in free:
+        score = sum(occupied >> side[0] & 1 for ray in geometry.rays[cell] for side in ray if side)
+        if score > best:
+            best, best_cells = score, [cell]
+        elif score == best:
+            best_cells.append(cell)
+    return rng.choice(best_cells)
+
+
+STRATEGIES = {'random': random_move, 'perfect': perfect_move, 'heuristic': heuristic_move}
+CLASSIC_ONLY = ('perfect',)  # La tabla del bot solo resuelve el 3×3
+
+
+def check_strategies(names, size, win):
+    #Lanza ValueError si alguna estrategia no existe o no sirve para el tablero
+    geometry(size, win)
+    for name in names:
+        if name not in STRATEGIES:
+            raise ValueError(f'Estrategia desconocida: {name}')
+        if name in CLASSIC_ONLY and (size, win) != (3, 3):
+            raise ValueError(f'La estrategia {name} solo juega en 3×3')
+
+
+def init_worker(solver_path):
+    #Inicializa cada proceso: la tabla del bot se genera o se carga una vez, no por tanda
+    global _solver
+    _solver = Solver.load(solver_path) if solver_path else Solver()
+
+
+def play_game(first, second, size, win, rng):
+    #Una partida con las reglas de Table; retorna (ganador 'X'/'O'/'Draw', movimientos)
+    table = Table(0, size=size, win=win)
+    for player_id in PLAYERS:
+        table.add_player(player_id, None)
+    strategies = (first, second)
+    while not table.winner:
+        turn = 0 if table.turn == 'X' else 1
+        if not table.make_move(strategies[turn](table, rng), PLAYERS[turn]):
+            raise RuntimeError(f'Movimiento inválido de {strategies[turn].__name__}')
+    return table.winner, len(table.moves)
+
+
+def play_chunk(first, second, size, win, games, seed):
+    #Juega una tanda en un proceso del pool; retorna recuentos, movimientos, segundos y PID
+    rng = random.Random(seed)
+    strategies = (STRATEGIES[first], STRATEGIES[second])
+    results = {'X': 0, 'O': 0, 'Draw': 0}
+    moves = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        winner, length = play_game(*strategies, size, win, rng)
+        results[winner] += 1
+        moves += length
+    return first, second, results, moves, time.perf_counter() - start, os.getpid()
+
+
+class Tournament:
+    def __init__(self, strategies, size=3, win=3, workers=None, chunk=CHUNK, solver_path=None, seed=0):
+        check_strategies(strategies, size, win)
+        self.strategies = list(strategies)
+        self.size = size
+        self.win = win
+        self.workers = workers or os.cpu_count()
+        self.chunk = chunk
+        self.solver_path = solver_path
+        self.seed = seed
+        self.pairs = {}  # {(X, O): {'X': victorias de X, 'O': de O, 'Draw': empates, 'moves': movimientos}}
+        self.worker_stats = {}  # {PID: [partidas, segundos jugando]}
+
+    def jobs(self, games):
+        #Tandas (X, O, partidas, semilla) de cada pareja ordenada, incluida cada estrategia contra sí misma
+        seed = self.seed
+        for first, second in product(self.strategies, repeat=2):
+            for start in range(0, games, self.chunk):
+                yield first, second, min(self.chunk, games - start), seed
+                seed += 1
+
+    def run(self, games, on_chunk=None):
+        #Juega games partidas por pareja; llama a on_chunk(tanda) a medida que vuelven las tandas
+        with ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(self.solver_path,)) as executor:
+            futures = [executor.submit(play_chunk, first, second, self.size, self.win, count, seed)
+                       for first, second, count, seed in self.jobs(games)]
+            for future in as_completed(futures):
+                chunk = future.result()
+                self.add(*chunk)
+                if on_chunk:
+                    on_chunk(chunk)
+        return self.pairs
+
+    def add(self, first, second, results, moves, elapsed, pid):
+        totals = self.pairs.setdefault((first, second), {'X': 0, 'O': 0, 'Draw': 0, 'moves': 0})
+        for key, count in results.items():
+            totals[key] += count
+        totals['moves'] += moves
+        stats = self.worker_stats.setdefault(pid, [0, 0.0])
+        stats[0] += sum(results.values())
+        stats[1] += elapsed
+
+    def report(self):
+        #Texto con los resultados por pareja y el ritmo de cada proceso
+        lines = [f"{'X':<12}{'O':<12}{'partidas':>12}{'gana X':>9}{'gana O':>9}{'empate':>9}{'movs/partida':>14}"]
+        for (first, second), totals in sorted(self.pairs.items()):
+            played = totals['X'] + totals['O'] + totals['Draw']
+            lines.append(f"{first:<12}{second:<12}{played:>12,}{totals['X'] / played:>9.1%}"
+                         f"{totals['O'] / played:>9.1%}{totals['Draw'] / played:>9.1%}"
+                         f"{totals['moves'] / played:>14.1f}")
+        lines.append('')
+        for pid, (played, seconds) in sorted(self.worker_stats.items()):
+            lines.append(f"proceso {pid}: {played:,} partidas, {played / seconds:,.0f} partidas/s")
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Torneo de estrategias en paralelo, sin servidor')
+    parser.add_argument('--games', type=int, default=100000, help='Partidas por pareja de estrategias')
+    parser.add_argument('--strategies', nargs='+', default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument('--size', type=int, default=3, help='Lado del tablero')
+    parser.add_argument('--win', type=int, help='Fichas en raya (por defecto, min(lado, 5))')
+    parser.add_argument('--workers', type=int, help='Procesos (por defecto, uno por núcleo)')
+    parser.add_argument('--chunk', type=int, default=CHUNK, help='Partidas por tanda')
+    parser.add_argument('--solver', help='Tabla del bot generada con `python -m models.Solver`')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    win = args.win or default_win(args.size)
+    try:
+        tournament = Tournament(args.strategies, args.size, win, args.workers, args.chunk, args.solver, args.seed)
+    except ValueError as e:
+        sys.exit(str(e))
+    total = args.games * len(args.strategies) ** 2
+    done = [0]
+    start = time.perf_counter()
+
+    def progress(chunk):
+        done[0] += sum(chunk[2].values())
+        print(f"\r{done[0]:,}/{total:,} partidas, {done[0] / (time.perf_counter() - start):,.0f} partidas/s",
+              end='', file=sys.stderr, flush=True)
+    tournament.run(args.games, progress)
+    print(file=sys.stderr)
+    print(tournament.report())
\ No newline at end of file